@@ -0,0 +1,244 @@
+# bench_api.py
+# Prueba de carga de las rutas de app.py sin red ni Supabase: la app corre en el
+# mismo proceso (cliente de pruebas de Flask) contra supabase_local.ClienteLocal,
+# con latencia inyectable por consulta. Cada ruta recibe peticiones concurrentes y
+# se informa p50/p95/p99, req/s y códigos de estado. El resultado se guarda en JSON
+# (con el commit de git) para comparar ejecuciones entre versiones.
+#
+# Uso: python bench_api.py [--peticiones 500] [--concurrencia 16] [--latencia-ms 5]
+#                          [--jitter-ms 2] [--lecturas 20000] [--sin-cache]
+#                          [--rutas sensores,login] [--salida r.json] [--comparar base.json]
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from supabase_local import ClienteLocal
+
+FORMATO = 'hcsr05-bench-api/1'
+USUARIO = 'bench'
+PASSWORD = 'bench-password'
+
+
+def sembrar(cliente, lecturas, horas, dispositivos, bcrypt_rounds):
+    """Datos iniciales: lecturas repartidas en las últimas `horas`, 3 LEDs, 3 pulsadores
+    y un usuario con hash del mismo coste que la API (sin rehash en el login)."""
+    import bcrypt
+    ahora = datetime.now(timezone.utc)
+    paso = timedelta(hours=horas) / max(lecturas, 1)
+    cliente.cargar('sensores', [{
+        'tipo': 'HC-SR05',
+        'valor': round(100 + 80 * ((i * 7919) % 1000) / 1000, 1),
+        'usuario_id': None,
+        'dispositivo': f'esp32-{i % dispositivos + 1}',
+        'seq': i // dispositivos,
+        'fecha': ahora - paso * (lecturas - i),
+    } for i in range(lecturas)])
+    cliente.cargar('leds', [{'id': i, 'nombre': f'LED {i}', 'estado': False} for i in (1, 2, 3)])
+    cliente.cargar('pulsadores', [{'id': i, 'nombre': f'Pulsador {i}', 'estado': False} for i in (1, 2, 3)])
+    cliente.cargar('usuarios', [{
+        'username': USUARIO,
+        'email': f'{USUARIO}@example.com',
+        'password_hash': bcrypt.hashpw(PASSWORD.encode('utf-8'),
+                                       bcrypt.gensalt(bcrypt_rounds)).decode('utf-8'),
+    }])
+    cliente.cargar('eventos', [{
+        'usuario': USUARIO, 'accion': 'led_toggle', 'detalles': f'LED {i % 3 + 1}',
+        'fecha': ahora - timedelta(minutes=i),
+    } for i in range(500)])
+
+
+def escenarios():
+    """nombre -> función(i) que devuelve (método, url, json). `i` numera las peticiones."""
+    seq = itertools.count(10 ** 6)
+    hasta = datetime.now(timezone.utc).replace(microsecond=0)
+    ventana = f'desde={(hasta - timedelta(hours=24)).isoformat()}&hasta={hasta.isoformat()}'.replace('+', '%2B')
+    return {
+        'sensores': lambda i: ('GET', '/api/sensores', None),
+        'sensores_filtro': lambda i: (
+            'GET', f'/api/sensores?dispositivo=esp32-{i % 2 + 1}&fields=valor,fecha&limit=500', None),
+        'estadisticas': lambda i: (
+            'GET', '/api/sensores/estadisticas?percentiles=50,95,99&bucket=1h', None),
+        'serie': lambda i: ('GET', f'/api/sensores/serie?{ventana}', None),
+        'leds': lambda i: ('GET', '/api/leds', None),
+        'led_put': lambda i: ('PUT', f'/api/leds/{i % 3 + 1}',
+                              {'estado': i % 2 == 0, 'usuario': USUARIO, 'fuente': 'BENCH'}),
+        'pulsador_put': lambda i: ('PUT', f'/api/pulsadores/{i % 3 + 1}',
+                                   {'estado': i % 2 == 0, 'usuario': USUARIO, 'fuente': 'BENCH'}),
+        'eventos': lambda i: ('GET', '/api/eventos', None),
+        'sensores_lote': lambda i: ('POST', '/api/sensores/lote', {
+            'dispositivo': 'bench',
+            'lecturas': [{'valor': 50 + n % 100, 'seq': next(seq)} for n in range(50)],
+        }),
+        'login': lambda i: ('POST', '/api/auth/login', {'username': USUARIO, 'password': PASSWORD}),
+        'export': lambda i: ('GET', '/api/export/sensores?formato=ndjson', None),
+    }
+
+
+def percentil(ordenados, p):
+    """Percentil con interpolación lineal (mismo criterio que percentile_cont)."""
+    if not ordenados:
+        return 0.0
+    pos = p / 100 * (len(ordenados) - 1)
+    bajo = int(pos)
+    alto = min(bajo + 1, len(ordenados) - 1)
+    return ordenados[bajo] + (ordenados[alto] - ordenados[bajo]) * (pos - bajo)
+
+
+def medir(app, cliente_db, peticion, n, concurrencia, calentamiento):
+    """Lanza `n` peticiones con `concurrencia` hilos; cada hilo usa su propio test_client."""
+    locales = threading.local()
+
+    def una(i):
+        cliente = getattr(locales, 'cliente', None)
+        if cliente is None:
+            cliente = locales.cliente = app.test_client()
+        metodo, url, cuerpo = peticion(i)
+        t0 = time.perf_counter()
+        respuesta = cliente.open(url, method=metodo, json=cuerpo)
+        respuesta.get_data()   # las respuestas en streaming se consumen enteras
+        return (time.perf_counter() - t0) * 1000.0, respuesta.status_code
+
+    with ThreadPoolExecutor(max_workers=concurrencia) as pool:
+        list(pool.map(una, range(calentamiento)))
+        llamadas = cliente_db.llamadas
+        t0 = time.perf_counter()
+        resultados = list(pool.map(una, range(calentamiento, calentamiento + n)))
+        total = time.perf_counter() - t0
+        llamadas = cliente_db.llamadas - llamadas
+
+    tiempos = sorted(ms for ms, _ in resultados)
+    estados = {}
+    for _, status in resultados:
+        estados[str(status)] = estados.get(str(status), 0) + 1
+    return {
+        'peticiones': n,
+        'errores': sum(1 for _, status in resultados if status >= 400),
+        'estados': estados,
+        'req_s': n / total if total else 0.0,
+        'p50_ms': percentil(tiempos, 50),
+        'p95_ms': percentil(tiempos, 95),
+        'p99_ms': percentil(tiempos, 99),
+        'media_ms': sum(tiempos) / n if n else 0.0,
+        'max_ms': tiempos[-1] if tiempos else 0.0,
+        # Consultas al sustituto de Supabase por petición (incluye las de segundo plano)
+        'consultas_por_peticion': llamadas / n if n else 0.0,
+    }
+
+
+def calcular_sin_cache(grupo, key, compute):
+    """Sustituye a ResponseCache.get_or_compute con --sin-cache."""
+    response = compute()
+    return response.get_data(), response.status_code, response.mimetype, [], False
+
+
+def commit_git():
+    """Commit corto del árbol (con '+' si hay cambios sin confirmar), o None fuera de git."""
+    try:
+        raiz = os.path.dirname(os.path.abspath(__file__))
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=raiz,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        sucio = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=raiz,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return commit + ('+' if sucio else '')
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def imprimir(resultados, base=None):
+    print(f"{'ruta':<16} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errores':>8}"
+          + ('   Δp50     Δp95     Δreq/s' if base else ''))
+    for nombre, r in resultados.items():
+        linea = (f"{nombre:<16} {r['req_s']:>9.1f} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} "
+                 f"{r['p99_ms']:>9.2f} {r['errores']:>8}")
+        anterior = (base or {}).get(nombre)
+        if anterior:
+            linea += ''.join(f' {delta(r[c], anterior[c]):>8}' for c in ('p50_ms', 'p95_ms', 'req_s'))
+        print(linea)
+
+
+def delta(actual, anterior):
+    return f'{(actual - anterior) / anterior * 100:+.1f}%' if anterior else '-'
+
+
+def main():
+    nombres = list(escenarios())
+    parser = argparse.ArgumentParser(description='Benchmark de las rutas de la API con Supabase en memoria')
+    parser.add_argument('--peticiones', type=int, default=500, help='Peticiones medidas por ruta')
+    parser.add_argument('--concurrencia', type=int, default=16, help='Peticiones simultáneas')
+    parser.add_argument('--calentamiento', type=int, default=20, help='Peticiones previas no medidas')
+    parser.add_argument('--latencia-ms', type=float, default=5.0, help='Latencia por consulta a la base de datos')
+    parser.add_argument('--jitter-ms', type=float, default=2.0, help='Latencia extra aleatoria (uniforme)')
+    parser.add_argument('--lecturas', type=int, default=20000, help='Lecturas de sensor iniciales')
+    parser.add_argument('--horas', type=float, default=24.0, help='Horas que abarcan las lecturas')
+    parser.add_argument('--dispositivos', type=int, default=2)
+    parser.add_argument('--bcrypt-rounds', type=int, help='Coste bcrypt de la API (por defecto BCRYPT_ROUNDS)')
+    parser.add_argument('--sin-cache', action='store_true', help='Desactiva la caché de respuestas')
+    parser.add_argument('--rutas', default=','.join(nombres), help=f'Subconjunto de: {",".join(nombres)}')
+    parser.add_argument('--salida', help='Fichero JSON de resultados (por defecto bench_api_<commit>.json)')
+    parser.add_argument('--comparar', help='JSON de una ejecución anterior para mostrar diferencias')
+    args = parser.parse_args()
+
+    rutas = [r for r in args.rutas.split(',') if r]
+    desconocidas = set(rutas) - set(nombres)
+    if desconocidas:
+        parser.error(f'rutas desconocidas: {", ".join(sorted(desconocidas))}')
+
+    # La configuración de app.py se lee de variables de entorno al importarla
+    if args.bcrypt_rounds is not None:
+        os.environ['BCRYPT_ROUNDS'] = str(args.bcrypt_rounds)
+    import app as api
+
+    db = ClienteLocal(args.latencia_ms, args.jitter_ms, semilla=1234)
+    sembrar(db, args.lecturas, args.horas, max(args.dispositivos, 1), api.BCRYPT_ROUNDS)
+    # ClienteDiferido no ha creado aún el cliente real: basta con sustituir los globales
+    api.supabase = api.supabase_admin = db
+    if args.sin_cache:
+        # Con TTL 0 las peticiones iguales seguirían esperándose entre sí (single-flight):
+        # se salta la caché entera y cada petición calcula su respuesta
+        api.cache.get_or_compute = calcular_sin_cache
+
+    base = None
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            base = json.load(f).get('rutas')
+
+    definiciones = escenarios()
+    resultados = {}
+    for nombre in rutas:
+        resultados[nombre] = medir(api.app, db, definiciones[nombre], args.peticiones,
+                                   args.concurrencia, args.calentamiento)
+        api.cache.clear()
+        print(f"  {nombre}: {resultados[nombre]['req_s']:.1f} req/s", file=sys.stderr, flush=True)
+
+    commit = commit_git()
+    informe = {
+        'formato': FORMATO,
+        'commit': commit,
+        'fecha': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'config': {k: v for k, v in vars(args).items() if k not in ('salida', 'comparar')},
+        'rutas': resultados,
+    }
+    salida = args.salida or f"bench_api_{(commit or 'sin-git').rstrip('+')}.json"
+    with open(salida, 'w', encoding='utf-8') as f:
+        json.dump(informe, f, indent=2, ensure_ascii=False)
+
+    print(f"\nCommit {commit or '-'}, concurrencia {args.concurrencia}, "
+          f"latencia {args.latencia_ms} ms + jitter {args.jitter_ms} ms, caché {'no' if args.sin_cache else 'sí'}")
+    imprimir(resultados, base)
+    print(f'\nResultados guardados en {salida}')
+
+
+if __name__ == '__main__':
+    main()
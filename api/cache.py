@@ -0,0 +1,137 @@
+# cache.py
+# Caché de respuestas en memoria para los endpoints de lectura más consultados.
+# Entradas con TTL por grupo, límite LRU de tamaño e invalidación inmediata
+# desde las rutas de escritura del mismo grupo. Cada entrada guarda también su
+# ETag, calculado una sola vez, para responder 304 a los clientes que ya la tienen.
+
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import request, current_app
+
+
+class ResponseCache:
+    """Caché LRU con TTL; las claves incluyen ruta y parámetros de la query.
+
+    Cada entrada pertenece a un grupo (p.ej. 'leds'); `invalidate('leds')` borra
+    todas las del grupo. Mientras una petición calcula una clave, las demás que
+    piden la misma esperan su resultado en lugar de consultar también a Supabase.
+    """
+
+    def __init__(self, max_entries=512, ttls=None, default_ttl=2.0):
+        self.max_entries = max_entries
+        self.ttls = dict(ttls or {})
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # clave -> (expira, grupo, cuerpo, status, mimetype, cabeceras)
+        self._inflight = {}             # clave -> Lock del cálculo en curso
+        self._generation = {}           # grupo -> contador de invalidaciones
+        # Estadísticas
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def ttl(self, grupo):
+        return self.ttls.get(grupo, self.default_ttl)
+
+    def _get_locked(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def get_or_compute(self, grupo, key, compute):
+        """Devuelve (cuerpo, status, mimetype, cabeceras, hit). `compute` produce un
+        Response de Flask; sólo se guardan las respuestas 200."""
+        with self._lock:
+            entry = self._get_locked(key, time.monotonic())
+            if entry is not None:
+                self.hits += 1
+                return entry[2], entry[3], entry[4], entry[5], True
+            flight = self._inflight.setdefault(key, threading.Lock())
+
+        with flight:
+            # Otra petición pudo haberla calculado mientras esperábamos
+            with self._lock:
+                entry = self._get_locked(key, time.monotonic())
+                if entry is not None:
+                    self.hits += 1
+                    return entry[2], entry[3], entry[4], entry[5], True
+                self.misses += 1
+                generation = self._generation.get(grupo, 0)
+            try:
+                response = compute()
+                body = response.get_data()
+                headers = []
+                if response.status_code == 200:
+                    if response.get_etag()[0] is None:
+                        response.add_etag()
+                    headers = [(h, v) for h, v in response.headers.items()
+                               if h not in ('Content-Type', 'Content-Length')]
+                    self._store(grupo, key, generation, body, response.status_code,
+                                response.mimetype, headers)
+                return body, response.status_code, response.mimetype, headers, False
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+
+    def _store(self, grupo, key, generation, body, status, mimetype, headers):
+        with self._lock:
+            # Si hubo una escritura mientras se calculaba, el resultado ya es viejo
+            if self._generation.get(grupo, 0) != generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl(grupo), grupo, body, status,
+                                  mimetype, headers)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *grupos):
+        """Borra todas las entradas de los grupos indicados."""
+        with self._lock:
+            for grupo in grupos:
+                self._generation[grupo] = self._generation.get(grupo, 0) + 1
+            for key in [k for k, e in self._entries.items() if e[1] in grupos]:
+                del self._entries[key]
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / total if total else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'ttls': dict(self.ttls, default=self.default_ttl),
+            }
+
+    def cached(self, grupo):
+        """Decorador para vistas GET; la clave es la ruta más los parámetros ordenados."""
+        def decorator(f):
+            @wraps(f)
+            def decorated(*args, **kwargs):
+                key = (request.path, tuple(sorted(request.args.items(multi=True))))
+                body, status, mimetype, headers, hit = self.get_or_compute(
+                    grupo, key, lambda: current_app.make_response(f(*args, **kwargs)))
+                response = current_app.response_class(body, status=status, mimetype=mimetype)
+                response.headers.extend(headers)
+                response.headers['X-Cache'] = 'HIT' if hit else 'MISS'
+                return response
+            return decorated
+        return decorator
@@ -0,0 +1,100 @@
+# concurrencia.py
+# Pool de hilos compartido para lanzar en paralelo llamadas independientes a
+# Supabase desde un mismo handler (p.ej. dos RPC de estadísticas). El cliente
+# de supabase-py reutiliza conexiones HTTP keep-alive y es seguro entre hilos.
+# También el pool acotado de bcrypt, para que una ráfaga de logins no acapare la CPU.
+
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+logger = logging.getLogger(__name__)
+
+# Hilos de E/S por proceso (configurable con SUPABASE_IO_THREADS)
+IO_THREADS = int(os.getenv('SUPABASE_IO_THREADS', '16'))
+
+io_pool = ThreadPoolExecutor(max_workers=IO_THREADS, thread_name_prefix='supabase-io')
+
+
+class PoolSaturado(Exception):
+    """No queda hueco en la cola de un PoolAcotado (la API responde 503)."""
+
+
+class PoolAcotado:
+    """ThreadPoolExecutor con un máximo de tareas en curso más en espera.
+
+    bcrypt libera el GIL mientras calcula, así que `workers` hilos ocupan como
+    mucho `workers` núcleos y el resto de rutas sigue teniendo CPU. Lo que no
+    cabe en la cola se rechaza enseguida en lugar de acumular esperas.
+    """
+
+    def __init__(self, workers, max_pendientes, nombre):
+        self.workers = workers
+        self.max_pendientes = max_pendientes
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=nombre)
+        self._huecos = threading.BoundedSemaphore(workers + max_pendientes)
+        self._lock = threading.Lock()
+        self.en_curso = 0
+        self.completadas = 0
+        self.rechazadas = 0
+
+    def ejecutar(self, funcion, *args):
+        """Ejecuta `funcion(*args)` en el pool y espera su resultado (PoolSaturado si no cabe)."""
+        if not self._huecos.acquire(blocking=False):
+            with self._lock:
+                self.rechazadas += 1
+            raise PoolSaturado('Demasiadas peticiones en cola')
+        with self._lock:
+            self.en_curso += 1
+        try:
+            return self._pool.submit(funcion, *args).result()
+        finally:
+            with self._lock:
+                self.en_curso -= 1
+                self.completadas += 1
+            self._huecos.release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'max_pendientes': self.max_pendientes,
+                'en_curso': self.en_curso,
+                'completadas': self.completadas,
+                'rechazadas': self.rechazadas,
+            }
+
+
+# Hilos para bcrypt (por defecto todos los núcleos menos uno) y peticiones que
+# pueden esperar turno antes de responder 503
+BCRYPT_WORKERS = int(os.getenv('BCRYPT_WORKERS', str(max(1, (os.cpu_count() or 2) - 1))))
+BCRYPT_MAX_PENDIENTES = int(os.getenv('BCRYPT_MAX_PENDIENTES', '64'))
+
+bcrypt_pool = PoolAcotado(BCRYPT_WORKERS, BCRYPT_MAX_PENDIENTES, 'bcrypt')
+
+
+def en_segundo_plano(funcion, *args):
+    """Lanza `funcion(*args)` en io_pool sin esperarla; los errores sólo se registran."""
+    def tarea():
+        try:
+            funcion(*args)
+        except Exception:
+            logger.exception('Tarea en segundo plano fallida: %s', getattr(funcion, '__name__', funcion))
+    return io_pool.submit(tarea)
+
+
+def en_paralelo(*funciones):
+    """Ejecuta las funciones a la vez y devuelve sus resultados en el mismo orden.
+
+    La primera la ejecuta el hilo llamador (que de todos modos esperaría); si alguna
+    lanza una excepción, se propaga tras esperar a las demás.
+    """
+    if not funciones:
+        return []
+    futuros = [io_pool.submit(f) for f in funciones[1:]]
+    try:
+        primero = funciones[0]()
+    finally:
+        wait(futuros)
+    return [primero] + [f.result() for f in futuros]
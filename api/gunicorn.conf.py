@@ -0,0 +1,25 @@
+# gunicorn.conf.py
+# Configuración de producción de la API, toda ajustable por variables de entorno.
+#
+# Importante: la caché (cache.py) y el canal en tiempo real (pubsub.py) viven en
+# memoria de cada proceso. Con GUNICORN_WORKERS > 1 cada worker tiene su propio
+# hub y un cliente SSE sólo ve los cambios escritos a través de su worker; por eso
+# el valor por defecto es 1 proceso con muchos hilos. Cada conexión /api/stream
+# ocupa un hilo mientras está abierta: GUNICORN_THREADS debe cubrir los clientes
+# en tiempo real más las peticiones normales concurrentes. Con gevent
+# (GUNICORN_WORKER_CLASS=gevent, pip install gevent) cada conexión es una greenlet.
+
+import os
+
+bind = os.getenv('GUNICORN_BIND', f"0.0.0.0:{os.getenv('API_PORT', '5000')}")
+workers = int(os.getenv('GUNICORN_WORKERS', '1'))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS', '256'))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', '1000'))  # sólo gevent
+# Los streams SSE envían un heartbeat cada STREAM_HEARTBEAT s, muy por debajo del timeout
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+backlog = int(os.getenv('GUNICORN_BACKLOG', '2048'))
+accesslog = os.getenv('GUNICORN_ACCESSLOG', '-')
+loglevel = os.getenv('GUNICORN_LOGLEVEL', 'info')
@@ -0,0 +1,43 @@
+# perfil.py
+# Medición del arranque de la API por fases (importaciones, configuración,
+# registro de rutas, primer cliente de Supabase). Se activa con
+# `python app.py --profile-startup` o PROFILE_STARTUP=1 (útil con gunicorn).
+
+import os
+import sys
+import time
+
+
+class PerfilArranque:
+    """Cronómetro de fases; desactivado, `marcar` no hace nada."""
+
+    def __init__(self, activo=False, salida=None):
+        self.activo = activo
+        self.salida = salida or sys.stderr
+        self.t0 = time.perf_counter()
+        self._ultimo = self.t0
+        self.fases = []   # (fase, ms de la fase, ms acumulados)
+
+    @classmethod
+    def desde_argv(cls, argv=None):
+        argv = sys.argv if argv is None else argv
+        return cls('--profile-startup' in argv or os.getenv('PROFILE_STARTUP') == '1')
+
+    def marcar(self, fase):
+        """Cierra la fase en curso con el nombre `fase`."""
+        if not self.activo:
+            return
+        ahora = time.perf_counter()
+        self.fases.append((fase, (ahora - self._ultimo) * 1000.0, (ahora - self.t0) * 1000.0))
+        self._ultimo = ahora
+
+    def informe(self, titulo='Arranque de la API'):
+        """Escribe las fases registradas desde el último informe."""
+        if not self.activo or not self.fases:
+            return
+        ancho = max(len(f[0]) for f in self.fases)
+        lineas = [f'[perfil] {titulo}:']
+        for fase, ms, total in self.fases:
+            lineas.append(f'[perfil]   {fase:<{ancho}}  {ms:8.1f} ms  (t={total:8.1f} ms)')
+        print('\n'.join(lineas), file=self.salida, flush=True)
+        self.fases.clear()
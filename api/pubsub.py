@@ -0,0 +1,132 @@
+# pubsub.py
+# Hub de publicación/suscripción en memoria para el canal en tiempo real (/api/stream).
+# Las rutas de escritura publican cada cambio; cada suscriptor tiene una cola
+# acotada y, si no la vacía a tiempo, se le desconecta en lugar de frenar al resto.
+# Un anillo con los últimos eventos permite reanudar desde Last-Event-ID.
+
+import threading
+import time
+from collections import deque
+
+
+class Subscription:
+    """Cola de un suscriptor. `get` bloquea hasta que hay eventos, vence el
+    timeout (lista vacía) o la suscripción se cierra (None)."""
+
+    def __init__(self, hub, tipos=None):
+        self._hub = hub
+        self.tipos = set(tipos) if tipos else None
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self.closed = False
+        self.reason = None
+
+    def wants(self, tipo):
+        return self.tipos is None or tipo in self.tipos
+
+    def _offer(self, event, limit):
+        """Encola (llamado con el lock del hub). False si la cola ya estaba llena."""
+        with self._cond:
+            if len(self._queue) >= limit:
+                return False
+            self._queue.append(event)
+            self._cond.notify()
+            return True
+
+    def close(self, reason=None):
+        with self._cond:
+            if not self.closed:
+                self.closed = True
+                self.reason = reason
+            self._cond.notify_all()
+
+    def get(self, timeout=None):
+        with self._cond:
+            if not self._queue and not self.closed:
+                self._cond.wait(timeout)
+            if self._queue:
+                events = list(self._queue)
+                self._queue.clear()
+                return events
+            return None if self.closed else []
+
+
+class PubSubHub:
+    """Publica eventos (id, tipo, datos) a todos los suscriptores interesados.
+
+    Los ids tienen la forma "<época>-<n>": la época cambia en cada arranque del
+    proceso, así un Last-Event-ID de otro arranque se reconoce y se pide recarga.
+    """
+
+    def __init__(self, queue_size=256, replay_size=1000):
+        self.queue_size = queue_size
+        self.epoch = format(int(time.time()), 'x')
+        self._n = 0
+        self._replay = deque(maxlen=replay_size)   # (n, id, tipo, datos)
+        self._subs = set()
+        self._lock = threading.Lock()
+        # Estadísticas
+        self.published = 0
+        self.delivered = 0
+        self.evicted = 0
+
+    def publish(self, tipo, datos):
+        with self._lock:
+            self._n += 1
+            event = (f'{self.epoch}-{self._n}', tipo, datos)
+            self._replay.append((self._n,) + event)
+            self.published += 1
+            for sub in list(self._subs):
+                if not sub.wants(tipo):
+                    continue
+                if sub._offer(event, self.queue_size):
+                    self.delivered += 1
+                else:
+                    # Consumidor lento: se le desconecta; al reconectar reanuda con Last-Event-ID
+                    self._subs.discard(sub)
+                    sub.close('lento')
+                    self.evicted += 1
+            return event[0]
+
+    def subscribe(self, last_id=None, tipos=None):
+        """Nueva suscripción; con `last_id` recibe primero los eventos posteriores
+        guardados en el anillo, o un evento 'reset' si ya no están disponibles."""
+        sub = Subscription(self, tipos)
+        with self._lock:
+            if last_id:
+                n = self._parse_id(last_id)
+                oldest = self._replay[0][0] if self._replay else self._n + 1
+                pending = [] if n is None else [
+                    (event_id, tipo, datos) for m, event_id, tipo, datos in self._replay
+                    if m > n and sub.wants(tipo)
+                ]
+                if n is None or n + 1 < oldest or len(pending) > self.queue_size:
+                    # El cliente debe recargar el estado completo con los GET normales
+                    pending = [(f'{self.epoch}-{self._n}', 'reset',
+                                {'motivo': 'historial no disponible'})]
+                for event in pending:
+                    sub._offer(event, self.queue_size)
+            self._subs.add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subs.discard(sub)
+        sub.close()
+
+    def _parse_id(self, event_id):
+        epoch, _, n = str(event_id).partition('-')
+        if epoch != self.epoch or not n.isdigit():
+            return None
+        return int(n)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'subscribers': len(self._subs),
+                'published': self.published,
+                'delivered': self.delivered,
+                'evicted': self.evicted,
+                'replay': len(self._replay),
+                'queue_size': self.queue_size,
+            }
@@ -0,0 +1,461 @@
+# supabase_local.py
+# Sustituto en memoria del cliente de Supabase para pruebas de carga (bench_api.py).
+# Implementa sólo la parte de supabase-py que usa app.py:
+# table().select().eq().gt().gte().lt().in_().or_().order().limit().execute(),
+# insert/upsert/update y rpc() de las funciones SQL de supabase/migrations,
+# calculadas en Python. Cada execute() puede esperar una latencia fija más un
+# jitter aleatorio, para simular el viaje de ida y vuelta a la base de datos.
+
+import math
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+# Tablas cuya clave primaria es uuid (el resto, bigserial)
+TABLAS_UUID = {'usuarios'}
+# Columnas que en la base de datos son timestamptz
+COLUMNAS_FECHA = {'fecha', 'bucket', 'created_at'}
+
+# date_trunc sobre fechas ya normalizadas ('2025-10-21T12:34:56.000000+00:00'):
+# prefijo que se conserva y lo que se añade detrás
+TRUNCAR = {
+    'minute': (16, ':00+00:00'),
+    'hour': (13, ':00:00+00:00'),
+    'day': (10, 'T00:00:00+00:00'),
+}
+RESOLUCIONES = {'1m': 'minute', '1h': 'hour', '1d': 'day'}
+
+
+def a_fecha(valor):
+    """ISO 8601 (con o sin zona; sin zona se asume UTC) -> datetime con zona UTC."""
+    if isinstance(valor, datetime):
+        d = valor
+    else:
+        d = datetime.fromisoformat(str(valor).replace('Z', '+00:00'))
+    if d.tzinfo is None:
+        d = d.replace(tzinfo=timezone.utc)
+    return d.astimezone(timezone.utc)
+
+
+def normalizar_fecha(valor):
+    """Mismo texto para el mismo instante, como lo devuelve PostgREST: así las
+    fechas se comparan y ordenan como cadenas."""
+    if valor is None:
+        return None
+    return a_fecha(valor).isoformat(timespec='microseconds')
+
+
+def coaccionar(columna, valor, referencia):
+    """Convierte el valor de un filtro (texto en la URL de PostgREST) al tipo de la columna."""
+    if valor is None:
+        return None
+    if columna in COLUMNAS_FECHA:
+        return normalizar_fecha(valor)
+    if isinstance(referencia, bool):
+        return valor if isinstance(valor, bool) else str(valor).lower() == 'true'
+    if isinstance(referencia, (int, float)) and isinstance(valor, str):
+        return float(valor) if '.' in valor else int(valor)
+    return valor
+
+
+OPERADORES = {
+    'eq': lambda a, b: a == b,
+    'neq': lambda a, b: a != b,
+    'gt': lambda a, b: a > b,
+    'gte': lambda a, b: a >= b,
+    'lt': lambda a, b: a < b,
+    'lte': lambda a, b: a <= b,
+}
+
+
+def condicion(columna, op, valor):
+    """Predicado sobre una fila; NULL no cumple ninguna comparación, como en SQL."""
+    if op == 'is':
+        esperado = None if str(valor).lower() == 'null' else str(valor).lower() == 'true'
+        return lambda fila: fila.get(columna) is esperado
+    comparar = OPERADORES[op]
+    convertidos = {}   # tipo de la columna -> valor del filtro ya convertido
+
+    def predicado(fila):
+        actual = fila.get(columna)
+        if actual is None:
+            return False
+        tipo = type(actual)
+        if tipo not in convertidos:
+            convertidos[tipo] = coaccionar(columna, valor, actual)
+        return comparar(actual, convertidos[tipo])
+    return predicado
+
+
+def partir(texto):
+    """Separa por comas de primer nivel (fuera de paréntesis y comillas)."""
+    partes, actual, nivel, comillas = [], [], 0, False
+    for c in texto:
+        if c == '"':
+            comillas = not comillas
+        elif not comillas and c == '(':
+            nivel += 1
+        elif not comillas and c == ')':
+            nivel -= 1
+        elif not comillas and nivel == 0 and c == ',':
+            partes.append(''.join(actual))
+            actual = []
+            continue
+        actual.append(c)
+    if actual:
+        partes.append(''.join(actual))
+    return partes
+
+
+def parsear_logico(texto):
+    """Expresión de .or_() ('a.lt.1,and(b.eq."x",c.gt.2)') -> lista de predicados."""
+    predicados = []
+    for termino in partir(texto.strip()):
+        termino = termino.strip()
+        for grupo, combinar in (('and(', all), ('or(', any)):
+            if termino.startswith(grupo) and termino.endswith(')'):
+                internos = parsear_logico(termino[len(grupo):-1])
+                predicados.append(lambda fila, p=internos, f=combinar: f(q(fila) for q in p))
+                break
+        else:
+            columna, op, valor = termino.split('.', 2)
+            if len(valor) >= 2 and valor[0] == valor[-1] == '"':
+                valor = valor[1:-1]
+            predicados.append(condicion(columna, op, valor))
+    return predicados
+
+
+class Respuesta:
+    """Lo que devuelve execute(): sólo `.data` (y `.count`, siempre None)."""
+
+    def __init__(self, data):
+        self.data = data
+        self.count = None
+
+
+class ConsultaLocal:
+    """Builder encadenable de una tabla; cada filtro devuelve el mismo objeto, como supabase-py."""
+
+    def __init__(self, cliente, tabla):
+        self._cliente = cliente
+        self._tabla = tabla
+        self._operacion = 'select'
+        self._columnas = None
+        self._filtros = []
+        self._orden = []
+        self._limite = None
+        self._valores = None
+        self._on_conflict = None
+        self._ignorar_duplicados = False
+
+    # ---------------- Operaciones ----------------
+    def select(self, columnas='*', count=None):
+        self._columnas = None if columnas.strip() == '*' else [c.strip() for c in columnas.split(',')]
+        return self
+
+    def insert(self, filas):
+        self._operacion = 'insert'
+        self._valores = filas
+        return self
+
+    def upsert(self, filas, on_conflict='', ignore_duplicates=False):
+        self._operacion = 'upsert'
+        self._valores = filas
+        self._on_conflict = [c for c in on_conflict.split(',') if c] or ['id']
+        self._ignorar_duplicados = ignore_duplicates
+        return self
+
+    def update(self, valores):
+        self._operacion = 'update'
+        self._valores = valores
+        return self
+
+    def delete(self):
+        self._operacion = 'delete'
+        return self
+
+    # ---------------- Filtros ----------------
+    def _filtro(self, op, columna, valor):
+        self._filtros.append(condicion(columna, op, valor))
+        return self
+
+    def eq(self, columna, valor):
+        return self._filtro('eq', columna, valor)
+
+    def neq(self, columna, valor):
+        return self._filtro('neq', columna, valor)
+
+    def gt(self, columna, valor):
+        return self._filtro('gt', columna, valor)
+
+    def gte(self, columna, valor):
+        return self._filtro('gte', columna, valor)
+
+    def lt(self, columna, valor):
+        return self._filtro('lt', columna, valor)
+
+    def lte(self, columna, valor):
+        return self._filtro('lte', columna, valor)
+
+    def in_(self, columna, valores):
+        predicados = [condicion(columna, 'eq', v) for v in valores]
+        self._filtros.append(lambda fila: any(p(fila) for p in predicados))
+        return self
+
+    def or_(self, expresion):
+        predicados = parsear_logico(expresion)
+        self._filtros.append(lambda fila: any(p(fila) for p in predicados))
+        return self
+
+    def order(self, columna, desc=False):
+        self._orden.append((columna, desc))
+        return self
+
+    def limit(self, n):
+        self._limite = n
+        return self
+
+    # ---------------- Ejecución ----------------
+    def execute(self):
+        self._cliente.esperar()
+        with self._cliente.lock:
+            filas = self._cliente.tablas.setdefault(self._tabla, [])
+            if self._operacion == 'insert':
+                return Respuesta(self._cliente.insertar(self._tabla, self._valores))
+            if self._operacion == 'upsert':
+                return Respuesta(self._upsert())
+            elegidas = [f for f in filas if all(p(f) for p in self._filtros)]
+            if self._operacion == 'update':
+                valores = self._cliente.preparar(self._valores)
+                for fila in elegidas:
+                    fila.update(valores)
+                self._cliente.indices.pop(self._tabla, None)
+                return Respuesta([dict(f) for f in elegidas])
+            if self._operacion == 'delete':
+                borradas = {id(f) for f in elegidas}
+                filas[:] = [f for f in filas if id(f) not in borradas]
+                self._cliente.indices.pop(self._tabla, None)
+                return Respuesta([dict(f) for f in elegidas])
+            # Orden estable: se aplica de la última clave a la primera.
+            # NULL al final en ASC y al principio en DESC, como Postgres.
+            for columna, desc in reversed(self._orden):
+                elegidas.sort(key=lambda f, c=columna: (f.get(c) is None, 0 if f.get(c) is None else f[c]),
+                              reverse=desc)
+            if self._limite is not None:
+                elegidas = elegidas[:self._limite]
+            if self._columnas is None:
+                return Respuesta([dict(f) for f in elegidas])
+            return Respuesta([{c: f.get(c) for c in self._columnas} for f in elegidas])
+
+    def _upsert(self):
+        clave = tuple(self._on_conflict)
+        existentes = self._cliente.indice(self._tabla, clave)
+        afectadas = []
+        for nueva in self._valores if isinstance(self._valores, list) else [self._valores]:
+            k = tuple(nueva.get(c) for c in clave)
+            # Con algún NULL en la clave no hay conflicto posible (índice único de Postgres)
+            fila = existentes.get(k) if None not in k else None
+            if fila is None:
+                afectadas.extend(self._cliente.insertar(self._tabla, [nueva]))
+            elif not self._ignorar_duplicados:
+                fila.update(self._cliente.preparar(nueva))
+                afectadas.append(dict(fila))
+        return afectadas
+
+
+class RpcLocal:
+    def __init__(self, cliente, funcion, params):
+        self._cliente = cliente
+        self._funcion = funcion
+        self._params = params or {}
+
+    def execute(self):
+        implementacion = getattr(self._cliente, f'rpc_{self._funcion}', None)
+        if implementacion is None:
+            raise ValueError(f'Función no encontrada: {self._funcion}')
+        self._cliente.esperar()
+        with self._cliente.lock:
+            return Respuesta(implementacion(**self._params))
+
+
+def percentil_cont(ordenados, p):
+    """percentile_cont de Postgres (interpolación lineal) sobre una lista ordenada."""
+    if not ordenados:
+        return None
+    pos = p * (len(ordenados) - 1)
+    bajo = math.floor(pos)
+    alto = min(bajo + 1, len(ordenados) - 1)
+    return ordenados[bajo] + (ordenados[alto] - ordenados[bajo]) * (pos - bajo)
+
+
+def resumen(valores, percentiles=()):
+    n = len(valores)
+    media = sum(valores) / n if n else 0
+    desviacion = math.sqrt(sum((v - media) ** 2 for v in valores) / (n - 1)) if n > 1 else 0
+    ordenados = sorted(valores) if percentiles and n else []
+    return {
+        'total': n,
+        'promedio': media,
+        'minimo': min(valores) if n else 0,
+        'maximo': max(valores) if n else 0,
+        'desviacion': desviacion,
+        'percentiles': [percentil_cont(ordenados, p) for p in percentiles] if ordenados else [],
+    }
+
+
+class ClienteLocal:
+    """Cliente de Supabase en memoria, seguro entre hilos (un solo lock, como una
+    base de datos serializada). `latencia_ms` + uniforme(0, `jitter_ms`) por execute()."""
+
+    def __init__(self, latencia_ms=0.0, jitter_ms=0.0, semilla=None):
+        self.latencia = latencia_ms / 1000.0
+        self.jitter = jitter_ms / 1000.0
+        self._rnd = random.Random(semilla)
+        self.lock = threading.RLock()
+        self.tablas = {}
+        self._ids = {}
+        self.indices = {}   # tabla -> {columnas de on_conflict -> {clave: fila}}
+        self._lock_llamadas = threading.Lock()
+        self.llamadas = 0
+
+    def esperar(self):
+        # Fuera del lock de datos: las esperas de distintas peticiones se solapan como en red
+        with self._lock_llamadas:
+            self.llamadas += 1
+        espera = self.latencia + (self._rnd.uniform(0, self.jitter) if self.jitter else 0)
+        if espera > 0:
+            time.sleep(espera)
+
+    def table(self, tabla):
+        return ConsultaLocal(self, tabla)
+
+    def rpc(self, funcion, params=None):
+        return RpcLocal(self, funcion, params)
+
+    # ---------------- Datos ----------------
+    def preparar(self, fila):
+        return {c: normalizar_fecha(v) if c in COLUMNAS_FECHA else v for c, v in fila.items()}
+
+    def indice(self, tabla, columnas):
+        """Índice único de `tabla` por `columnas` (se crea en el primer upsert y se
+        mantiene en cada insert; update/delete lo descartan)."""
+        por_tabla = self.indices.setdefault(tabla, {})
+        if columnas not in por_tabla:
+            por_tabla[columnas] = {
+                k: f for f in self.tablas.get(tabla, [])
+                if None not in (k := tuple(f.get(c) for c in columnas))
+            }
+        return por_tabla[columnas]
+
+    def insertar(self, tabla, filas):
+        """Inserta con id autoincremental (o uuid) y fecha=now() por defecto; devuelve copias."""
+        if isinstance(filas, dict):
+            filas = [filas]
+        destino = self.tablas.setdefault(tabla, [])
+        ahora = normalizar_fecha(datetime.now(timezone.utc))
+        nuevas = []
+        for fila in filas:
+            fila = self.preparar(fila)
+            if tabla in TABLAS_UUID:
+                fila.setdefault('id', str(uuid.uuid4()))
+            elif fila.get('id') is None:
+                fila['id'] = self._ids[tabla] = self._ids.get(tabla, 0) + 1
+            else:
+                self._ids[tabla] = max(self._ids.get(tabla, 0), fila['id'])
+            fila.setdefault('fecha', ahora)
+            destino.append(fila)
+            for columnas, indice in self.indices.get(tabla, {}).items():
+                k = tuple(fila.get(c) for c in columnas)
+                if None not in k:
+                    indice[k] = fila
+            nuevas.append(dict(fila))
+        return nuevas
+
+    def cargar(self, tabla, filas):
+        """Carga inicial sin latencia."""
+        with self.lock:
+            return self.insertar(tabla, filas)
+
+    def _lecturas(self, p_desde=None, p_hasta=None, p_tipo=None):
+        desde, hasta = normalizar_fecha(p_desde), normalizar_fecha(p_hasta)
+        return [f for f in self.tablas.get('sensores', [])
+                if (desde is None or f['fecha'] >= desde)
+                and (hasta is None or f['fecha'] < hasta)
+                and (p_tipo is None or f.get('tipo') == p_tipo)]
+
+    def _por_intervalo(self, filas, unidad):
+        n, sufijo = TRUNCAR[unidad]
+        grupos = {}
+        for f in filas:
+            grupos.setdefault(f['fecha'][:n] + sufijo, []).append(float(f['valor']))
+        return sorted(grupos.items())
+
+    # ---------------- Funciones (supabase/migrations) ----------------
+    def rpc_sensor_estadisticas(self, p_desde=None, p_hasta=None, p_tipo=None, p_percentiles=()):
+        valores = [float(f['valor']) for f in self._lecturas(p_desde, p_hasta, p_tipo)]
+        return resumen(valores, p_percentiles or ())
+
+    def rpc_sensor_estadisticas_buckets(self, p_bucket, p_desde=None, p_hasta=None, p_tipo=None,
+                                        p_percentiles=()):
+        filas = self._lecturas(p_desde, p_hasta, p_tipo)
+        salida = []
+        for bucket, valores in self._por_intervalo(filas, p_bucket):
+            r = resumen(valores, p_percentiles or ())
+            del r['desviacion']
+            salida.append({'bucket': bucket, **r})
+        return salida
+
+    def rpc_sensor_serie(self, p_resolucion, p_desde, p_hasta, p_tipo=None):
+        # Sin tablas de agregados: se agrupan las lecturas crudas al vuelo
+        unidad = RESOLUCIONES.get(p_resolucion)
+        if unidad is None:
+            raise ValueError(f'resolución inválida: {p_resolucion}')
+        n, sufijo = TRUNCAR[unidad]
+        desde = normalizar_fecha(p_desde)[:n] + sufijo
+        filas = self._lecturas(desde, p_hasta, p_tipo)
+        salida = []
+        for bucket, valores in self._por_intervalo(filas, unidad):
+            r = resumen(valores)
+            del r['percentiles']
+            salida.append({'bucket': bucket, **r})
+        return salida
+
+    def _actualizar_estado(self, tabla, tabla_hist, columna, id_, estado, usuario, fuente):
+        fila = next((f for f in self.tablas.get(tabla, []) if f['id'] == id_), None)
+        if fila is None:
+            return None
+        fila['estado'] = estado
+        hist = self.insertar(tabla_hist, [{
+            'usuario': usuario, columna: id_, 'estado': estado, 'fuente': fuente,
+        }])[0]
+        return dict(fila), hist
+
+    def rpc_actualizar_led(self, p_led_id, p_estado, p_usuario='API', p_fuente='WEB'):
+        r = self._actualizar_estado('leds', 'led_hist', 'led_id', p_led_id, p_estado, p_usuario, p_fuente)
+        if r is None:
+            return None
+        evento = self.insertar('eventos', [{
+            'usuario': p_usuario,
+            'accion': 'led_toggle',
+            'detalles': f"LED {p_led_id} -> {'ON' if p_estado else 'OFF'} ({p_fuente})",
+        }])[0]
+        return {'led': r[0], 'hist': r[1], 'evento': evento}
+
+    def rpc_actualizar_pulsador(self, p_pulsador_id, p_estado, p_usuario='API', p_fuente='WEB'):
+        r = self._actualizar_estado('pulsadores', 'pulsador_hist', 'pulsador_id', p_pulsador_id,
+                                    p_estado, p_usuario, p_fuente)
+        if r is None:
+            return None
+        return {'pulsador': r[0], 'hist': r[1]}
+
+    def rpc_purgar_sensores(self, p_dias_crudo, p_dias_minuto=90):
+        if p_dias_crudo is None or p_dias_crudo < 1:
+            raise ValueError('p_dias_crudo debe ser >= 1')
+        limite = normalizar_fecha(datetime.now(timezone.utc) - timedelta(days=p_dias_crudo))
+        filas = self.tablas.get('sensores', [])
+        antes = len(filas)
+        filas[:] = [f for f in filas if f['fecha'] >= limite]
+        self.indices.pop('sensores', None)
+        return {'crudo': antes - len(filas), 'minuto': 0}
@@ -0,0 +1,27 @@
+# La API se ejecuta desde api/ (módulos sueltos: app, cache, pubsub...)
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def api(monkeypatch):
+    """Módulo app.py contra supabase_local.ClienteLocal, con caché y canal vacíos."""
+    import app as api
+    from supabase_local import ClienteLocal
+    db = ClienteLocal()
+    # ClienteDiferido no ha creado el cliente real: basta con sustituir los globales
+    monkeypatch.setattr(api, 'supabase', db)
+    monkeypatch.setattr(api, 'supabase_admin', db)
+    api.cache.clear()
+    monkeypatch.setattr(api, 'db', db, raising=False)
+    yield api
+    api.cache.clear()
+
+
+@pytest.fixture
+def client(api):
+    return api.app.test_client()
@@ -0,0 +1,130 @@
+import threading
+import time
+
+from flask import Flask, jsonify
+
+from cache import ResponseCache
+
+
+def make_app(cache, calls, grupo='leds'):
+    app = Flask(__name__)
+
+    @app.route('/datos')
+    @cache.cached(grupo)
+    def datos():
+        calls.append(1)
+        return jsonify({'n': len(calls)}), 200
+
+    @app.route('/falla')
+    @cache.cached(grupo)
+    def falla():
+        calls.append(1)
+        return jsonify({'error': 'x'}), 500
+
+    return app.test_client()
+
+
+def test_hit_and_miss():
+    cache, calls = ResponseCache(), []
+    client = make_app(cache, calls)
+    r1 = client.get('/datos')
+    r2 = client.get('/datos')
+    assert r1.headers['X-Cache'] == 'MISS' and r2.headers['X-Cache'] == 'HIT'
+    assert r1.get_json() == r2.get_json() == {'n': 1}
+    assert r1.headers['ETag'] == r2.headers['ETag']
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+
+def test_query_params_are_part_of_the_key():
+    cache, calls = ResponseCache(), []
+    client = make_app(cache, calls)
+    client.get('/datos?a=1&b=2')
+    assert client.get('/datos?b=2&a=1').headers['X-Cache'] == 'HIT'
+    assert client.get('/datos?a=2').headers['X-Cache'] == 'MISS'
+
+
+def test_errors_are_not_cached():
+    cache, calls = ResponseCache(), []
+    client = make_app(cache, calls)
+    client.get('/falla')
+    client.get('/falla')
+    assert len(calls) == 2
+
+
+def test_invalidate_only_touches_its_group():
+    cache, calls = ResponseCache(), []
+    client = make_app(cache, calls, grupo='leds')
+    client.get('/datos')
+    cache.get_or_compute('otro', 'k', lambda: Flask(__name__).response_class('x'))
+    cache.invalidate('leds')
+    assert client.get('/datos').get_json() == {'n': 2}
+    assert cache.stats()['entries'] == 2
+    assert cache.get_or_compute('otro', 'k', None)[4] is True
+
+
+def test_ttl_expiry():
+    cache, calls = ResponseCache(ttls={'leds': 0.05}), []
+    client = make_app(cache, calls)
+    client.get('/datos')
+    time.sleep(0.06)
+    assert client.get('/datos').headers['X-Cache'] == 'MISS'
+
+
+def test_lru_eviction():
+    cache = ResponseCache(max_entries=2)
+    resp = Flask(__name__).response_class
+    for key in ('a', 'b'):
+        cache.get_or_compute('g', key, lambda: resp(key))
+    cache.get_or_compute('g', 'a', None)            # 'a' pasa a ser la más reciente
+    cache.get_or_compute('g', 'c', lambda: resp('c'))
+    assert cache.stats()['evictions'] == 1
+    assert cache.get_or_compute('g', 'a', None)[4] is True
+    assert cache.get_or_compute('g', 'b', lambda: resp('b'))[4] is False
+
+
+def test_write_during_compute_is_not_cached():
+    cache = ResponseCache()
+    resp = Flask(__name__).response_class
+
+    def compute_viejo():
+        cache.invalidate('g')   # una escritura llega mientras se consulta
+        return resp('viejo')
+
+    cache.get_or_compute('g', 'k', compute_viejo)
+    assert cache.get_or_compute('g', 'k', lambda: resp('nuevo'))[0] == b'nuevo'
+
+
+def test_concurrent_misses_compute_once():
+    cache = ResponseCache()
+    resp = Flask(__name__).response_class
+    calls, start = [], threading.Event()
+
+    def compute():
+        calls.append(1)
+        start.wait(1.0)
+        return resp('x')
+
+    threads = [threading.Thread(target=cache.get_or_compute, args=('g', 'k', compute))
+               for _ in range(5)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    start.set()
+    for t in threads:
+        t.join(2.0)
+    assert len(calls) == 1
+
+
+def test_led_update_invalidates_cached_list(api, client):
+    api.db.insertar('leds', [{'id': i, 'estado': False} for i in (1, 2, 3)])
+    assert client.get('/api/leds').headers['X-Cache'] == 'MISS'
+    assert client.get('/api/leds').headers['X-Cache'] == 'HIT'
+
+    api.db.tablas['leds'][0]['estado'] = True   # sin pasar por la API: la caché no lo ve
+    assert client.get('/api/leds').get_json()[0]['estado'] is False
+
+    r = client.put('/api/leds/2', json={'estado': True})
+    assert r.status_code == 200
+    r = client.get('/api/leds')
+    assert r.headers['X-Cache'] == 'MISS'
+    assert [led['estado'] for led in r.get_json()] == [True, True, False]
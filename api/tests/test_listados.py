@@ -0,0 +1,55 @@
+def sembrar(api, n):
+    api.db.insertar('eventos', [
+        {'usuario': 'ana', 'accion': 'login', 'detalles': '', 'fecha': f'2024-05-01T12:00:{i:02d}+00:00'}
+        for i in range(n)])
+
+
+def test_etag_gives_304(api, client):
+    sembrar(api, 3)
+    r = client.get('/api/eventos')
+    etag = r.headers['ETag']
+    r = client.get('/api/eventos', headers={'If-None-Match': etag})
+    assert r.status_code == 304 and r.data == b''
+
+    api.db.insertar('eventos', {'usuario': 'ana', 'accion': 'x', 'detalles': ''})
+    api.cache.invalidate('eventos')
+    r = client.get('/api/eventos', headers={'If-None-Match': etag})
+    assert r.status_code == 200 and r.headers['ETag'] != etag
+
+
+def test_last_modified_is_the_newest_row(api, client):
+    sembrar(api, 3)
+    r = client.get('/api/eventos')
+    assert r.headers['Last-Modified'] == 'Wed, 01 May 2024 12:00:02 GMT'
+    r = client.get('/api/eventos', headers={'If-Modified-Since': r.headers['Last-Modified']})
+    assert r.status_code == 304
+
+
+def test_since_id_returns_only_new_rows_ascending(api, client):
+    sembrar(api, 5)
+    r = client.get('/api/eventos?since_id=3')
+    assert [e['id'] for e in r.get_json()] == [4, 5]
+    assert client.get('/api/eventos?since_id=5').get_json() == []
+
+
+def test_since_date(api, client):
+    sembrar(api, 5)
+    r = client.get('/api/eventos?since=2024-05-01T12:00:02Z')
+    assert [e['id'] for e in r.get_json()] == [4, 5]
+
+
+def test_cursor_pages_cover_all_rows(api, client):
+    sembrar(api, 5)
+    ids, url = [], '/api/eventos?limit=2'
+    while url:
+        r = client.get(url)
+        ids += [e['id'] for e in r.get_json()]
+        cursor = r.headers.get('X-Next-Cursor')
+        url = f'/api/eventos?limit=2&cursor={cursor}' if cursor else None
+    assert ids == [5, 4, 3, 2, 1]
+
+
+def test_bad_list_params(client):
+    assert client.get('/api/eventos?limit=0').status_code == 400
+    assert client.get('/api/eventos?fields=password').status_code == 400
+    assert client.get('/api/eventos?cursor=xx').status_code == 400
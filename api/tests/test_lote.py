@@ -0,0 +1,94 @@
+import json
+
+
+def post_lote(client, cuerpo, **kwargs):
+    return client.post('/api/sensores/lote', data=json.dumps(cuerpo), content_type='application/json',
+                       **kwargs)
+
+
+def test_valid_batch_is_inserted(api, client):
+    r = post_lote(client, {'dispositivo': 'esp32-1', 'lecturas': [
+        {'valor': 10.5, 'seq': 1, 'edad_ms': 200},
+        {'valor': 11, 'seq': 2, 'fecha': '2024-05-01T12:00:00Z'},
+    ]})
+    assert r.status_code == 201
+    assert r.get_json() == {'recibidas': 2, 'insertadas': 2, 'duplicadas': 0, 'errores': []}
+    filas = api.db.tablas['sensores']
+    assert [(f['dispositivo'], f['seq'], f['valor']) for f in filas] == [('esp32-1', 1, 10.5),
+                                                                          ('esp32-1', 2, 11)]
+
+
+def test_duplicates_are_ignored(api, client):
+    lote = {'dispositivo': 'esp32-1', 'lecturas': [{'valor': 1, 'seq': 1}, {'valor': 2, 'seq': 2}]}
+    post_lote(client, lote)
+    lote['lecturas'].append({'valor': 3, 'seq': 3})
+    r = post_lote(client, lote)
+    assert r.status_code == 201
+    assert r.get_json()['insertadas'] == 1 and r.get_json()['duplicadas'] == 2
+    assert len(api.db.tablas['sensores']) == 3
+
+
+def test_bad_rows_are_reported_per_index(api, client):
+    usuario = api.db.insertar('usuarios', {'username': 'ana'})[0]['id']
+    cuerpo = ('{"dispositivo": "esp32-1", "lecturas": ['
+              '{"valor": 1, "seq": 1, "usuario_id": "%s"},'
+              '{"valor": NaN, "seq": 2},'
+              '{"valor": Infinity, "seq": 3},'
+              '{"valor": 4, "usuario_id": "no-es-uuid"},'
+              '{"valor": 5, "usuario_id": "00000000-0000-0000-0000-000000000000"},'
+              '{"valor": 6, "tipo": "%s"},'
+              '{"valor": 7, "seq": -1},'
+              '{"valor": 8, "seq": 9223372036854775808},'
+              '{"valor": 9, "fecha": "ayer"},'
+              '{"valor": true},'
+              '"texto",'
+              '{"valor": 12, "seq": 12}]}') % (usuario, 'x' * 65)
+    r = client.post('/api/sensores/lote', data=cuerpo, content_type='application/json')
+    assert r.status_code == 207
+    body = r.get_json()
+    assert body['recibidas'] == 12 and body['insertadas'] == 2
+    errores = {e['indice']: e['error'] for e in body['errores']}
+    assert sorted(errores) == list(range(1, 11))
+    assert 'finito' in errores[1] and 'finito' in errores[2]
+    assert 'UUID' in errores[3]
+    assert errores[4] == 'usuario_id no existe'
+    assert 'tipo' in errores[5]
+    assert 'seq' in errores[6] and 'seq' in errores[7]
+    assert [f['seq'] for f in api.db.tablas['sensores']] == [1, 12]
+
+
+def test_batch_without_valid_rows_is_rejected(api, client):
+    r = post_lote(client, [{'valor': 'diez'}, {}])
+    assert r.status_code == 400
+    assert [e['indice'] for e in r.get_json()['errores']] == [0, 1]
+    assert not api.db.tablas.get('sensores')
+
+
+def test_ndjson_body(api, client):
+    cuerpo = b'{"valor": 1, "seq": 1}\n\n{"valor": 2, "seq": 2}\n'
+    r = client.post('/api/sensores/lote?dispositivo=esp32-2', data=cuerpo,
+                    content_type='application/x-ndjson')
+    assert r.status_code == 201
+    assert {f['dispositivo'] for f in api.db.tablas['sensores']} == {'esp32-2'}
+
+
+def test_unreadable_body(client):
+    assert client.post('/api/sensores/lote', data=b'{', content_type='application/json').status_code == 400
+    assert post_lote(client, {'lecturas': 5}).status_code == 400
+    r = client.post('/api/sensores/lote', data=b'{"valor": 1}\nroto\n',
+                    content_type='application/x-ndjson')
+    assert r.status_code == 400 and 'Línea 2' in r.get_json()['error']
+
+
+def test_too_many_rows(api, client, monkeypatch):
+    monkeypatch.setattr(api, 'LOTE_MAX_FILAS', 2)
+    assert post_lote(client, [{'valor': i} for i in range(3)]).status_code == 413
+
+
+def test_batch_invalidates_the_sensor_cache(api, client):
+    post_lote(client, {'dispositivo': 'esp32-1', 'lecturas': [{'valor': 1, 'seq': 1}]})
+    assert client.get('/api/sensores').headers['X-Cache'] == 'MISS'
+    assert client.get('/api/sensores').headers['X-Cache'] == 'HIT'
+    post_lote(client, {'dispositivo': 'esp32-1', 'lecturas': [{'valor': 2, 'seq': 2}]})
+    r = client.get('/api/sensores')
+    assert r.headers['X-Cache'] == 'MISS' and len(r.get_json()) == 2
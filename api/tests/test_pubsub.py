@@ -0,0 +1,61 @@
+import threading
+
+from pubsub import PubSubHub
+
+
+def test_fanout_and_type_filter():
+    hub = PubSubHub()
+    todos, leds = hub.subscribe(), hub.subscribe(tipos=['led'])
+    hub.publish('led', {'id': 1})
+    hub.publish('sensor', {'valor': 2})
+    assert [e[1] for e in todos.get(0)] == ['led', 'sensor']
+    assert [e[1] for e in leds.get(0)] == ['led']
+    assert hub.stats()['delivered'] == 3
+
+
+def test_get_waits_for_events():
+    hub = PubSubHub()
+    sub = hub.subscribe()
+    assert sub.get(0.01) == []
+    threading.Timer(0.02, hub.publish, ('led', {})).start()
+    assert len(sub.get(1.0)) == 1
+    hub.unsubscribe(sub)
+    assert sub.get(0.01) is None
+
+
+def test_slow_subscriber_is_evicted_without_blocking_others():
+    hub = PubSubHub(queue_size=2)
+    lento, rapido = hub.subscribe(), hub.subscribe()
+    for i in range(3):
+        hub.publish('sensor', i)
+        assert len(rapido.get(0)) == 1
+    assert lento.closed and lento.reason == 'lento'
+    assert [e[2] for e in lento.get(0)] == [0, 1]   # lo ya encolado se entrega
+    assert lento.get(0) is None
+    assert hub.stats()['evicted'] == 1 and hub.stats()['subscribers'] == 1
+
+
+def test_resume_from_last_event_id():
+    hub = PubSubHub()
+    ids = [hub.publish('sensor', i) for i in range(5)]
+    sub = hub.subscribe(last_id=ids[2])
+    assert [e[2] for e in sub.get(0)] == [3, 4]
+    assert hub.subscribe(last_id=ids[-1]).get(0) == []
+
+
+def test_resume_without_history_sends_reset():
+    hub = PubSubHub(replay_size=2)
+    ids = [hub.publish('sensor', i) for i in range(5)]
+    assert [e[1] for e in hub.subscribe(last_id=ids[0]).get(0)] == ['reset']
+    assert [e[1] for e in hub.subscribe(last_id='otro-3').get(0)] == ['reset']
+
+
+def test_writes_are_published(api, client):
+    api.db.insertar('leds', [{'id': 1, 'estado': False}])
+    sub = api.hub.subscribe(tipos=['led'])
+    try:
+        assert client.put('/api/leds/1', json={'estado': True}).status_code == 200
+        eventos = sub.get(1.0)
+        assert [(e[1], e[2]['estado']) for e in eventos] == [('led', True)]
+    finally:
+        api.hub.unsubscribe(sub)
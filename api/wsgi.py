@@ -0,0 +1,9 @@
+# wsgi.py
+# Punto de entrada WSGI para servir la API con varios workers/hilos, p.ej.:
+#   cd api
+#   gunicorn -c gunicorn.conf.py wsgi:application
+# Para desarrollo sigue valiendo `python app.py`.
+
+from app import app
+
+application = app
@@ -3,22 +3,79 @@
 # Se conecta a MySQL (XAMPP) y guarda usuarios, lecturas y eventos
 
 # --- IMPORTANTE ---
-# Ajustar SERIAL_PORT y DB_CONFIG antes de correr el sistema
+# Ajustar SERIAL_PORT (o SERIAL_PORTS) y DB_CONFIG antes de correr el sistema
+import argparse
+import os
 import sys
-import serial
 import json
 import threading
-import bcrypt
-import mysql.connector
+import time
 from datetime import datetime
+
+from startup_profiler import StartupProfiler
+
+# Perfil de arranque por fases (--profile-startup o HCSR05_PROFILE_STARTUP=1).
+# mysql.connector, bcrypt y numpy no se importan aquí sino en su primer uso
+# (ver get_db_pool, verify_login y DeviceState), después de pintar el login
+PROFILER = StartupProfiler.from_argv()
+
 from PyQt5.QtWidgets import (QApplication, QWidget, QVBoxLayout, QLabel, QPushButton,
                              QLineEdit, QMessageBox, QGridLayout, QMainWindow, QHBoxLayout,
-                             QFrame, QTextBrowser, QStatusBar)
-from PyQt5.QtCore import Qt, QTimer, QTime
+                             QFrame, QStatusBar, QComboBox)
+from PyQt5.QtCore import Qt, QTimer, QTime, QObject, QRunnable, QThreadPool, pyqtSignal
+PROFILER.mark("import PyQt5")
+
+from db_pool import ConnectionPool
+from write_behind import WriteBehindQueue
+from spool import SqliteSpool
+from device_manager import DeviceManager, parse_ports
+from gui_model import PanelModel
+from log_view import LogModel, LogView
+from distance_plot import DistancePlot, PLOT_WINDOWS
+from event_policy import EventPolicy
+from signal_filters import FilterPipeline
+PROFILER.mark("import módulos de la app")
 
 # ---------------- CONFIG ----------------
-SERIAL_PORT = "COM3"  # Cambia según tu puerto real
-BAUD_RATE = 9600
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+# Puerto del ESP32 (variable de entorno HCSR05_SERIAL_PORT); con el simulador
+# (esp32_simulator.py) es la ruta del pty que imprime, p.ej. /dev/pts/5
+SERIAL_PORT = os.environ.get("HCSR05_SERIAL_PORT", "COM3")  # Cambia según tu puerto real
+# Puertos que se leen a la vez (un hilo lector por ESP32, ver device_manager.py):
+# lista separada por comas o "auto" para detectar los ESP32 por su VID USB.
+# Se puede sobreescribir con la variable de entorno HCSR05_PUERTOS o con --port
+SERIAL_PORTS = os.environ.get("HCSR05_PUERTOS", SERIAL_PORT)
+DEVICE_RESCAN_MS = 5000  # cada cuánto se buscan equipos nuevos o desconectados
+# Velocidad del enlace (debe coincidir con Serial.begin del firmware); se puede
+# sobreescribir con la variable de entorno HCSR05_BAUD (p.ej. 460800, 921600)
+BAUD_RATE = int(os.environ.get("HCSR05_BAUD", "115200"))
+SERIAL_BUFFER_SIZE = 65536  # bytes del búfer de recepción preasignado
+
+# Intervalo mínimo entre repintados de la GUI (≈30 fps); las tramas que llegan
+# entre medias se acumulan y sólo se pinta el último valor
+GUI_FRAME_MS = 33
+
+# Display LCD: líneas que se conservan en pantalla y archivo opcional (con rotación)
+# donde van las líneas expulsadas; None desactiva el archivo
+LOG_CAPACITY = 2000
+LOG_ROTATE_PATH = None  # p.ej. os.path.join(APP_DIR, "lcd.log")
+
+# Gráfico de distancia: muestras crudas que se guardan (el resto, agregado por segundo)
+PLOT_RAW_CAPACITY = 200_000
+# Protocolo serial: "json" (líneas JSON), "bin" (tramas binarias) o "auto"
+# ("auto" pide modo binario al ESP32 y acepta ambos formatos; ver serial_protocol.py)
+SERIAL_PROTOCOL = "auto"
+
+# Filtros de la lectura del sensor (ver signal_filters.py); "" desactiva el filtrado.
+# Se puede sobreescribir con la variable de entorno HCSR05_FILTROS
+SENSOR_FILTER_SPEC = os.environ.get("HCSR05_FILTROS", "rango:2:400,hampel:7:3,mediana:5,ema:0.3")
+# Qué se guarda en 'sensores':
+#   "ambos": cada lectura cruda (tipo SENSOR_TIPO) y su valor filtrado (SENSOR_TIPO_FILTRADO)
+#   "filtrado": sólo el valor filtrado, como mucho una fila cada SENSOR_PERSIST_INTERVAL s
+SENSOR_PERSIST = "ambos"
+SENSOR_PERSIST_INTERVAL = 1.0
+SENSOR_TIPO = "HC-SR05"
+SENSOR_TIPO_FILTRADO = "HC-SR05/filtrado"
 
 DB_CONFIG = {
     "host": "localhost",
@@ -27,83 +84,319 @@ DB_CONFIG = {
     "database": "proyecto_hcsr05"
 }
 
+# Pool de conexiones compartido (ver db_pool.py)
+DB_POOL_CONFIG = {
+    "max_size": 5,                 # conexiones simultáneas como máximo
+    "idle_timeout": 300,           # s sin uso antes de cerrar una conexión libre
+    "health_check_interval": 30,   # s de inactividad tras los que se hace ping
+    "checkout_timeout": 10,        # s máximos esperando una conexión libre
+}
+
+# Cola de escritura diferida (ver write_behind.py). Política de backpressure:
+#   "block" (espera), "drop_oldest" (descarta lo más antiguo) o "spill" (desborda al diario)
+WRITE_BEHIND_CONFIG = {
+    "batch_size": 200,     # filas por lote executemany
+    "max_age": 0.5,        # s máximos que una fila espera antes de escribirse
+    "capacity": 10000,     # filas en memoria como máximo
+    "policy": "spill",
+    "retry_interval": 5,   # s entre intentos de reproducir el diario si la BD está caída
+}
+
+# Diario local (SQLite WAL) donde esperan las filas mientras MySQL no responde
+SPOOL_PATH = os.path.join(APP_DIR, "hcsr05_spool.db")
+
+# Sentencias usadas por la cola (una por tabla para agrupar en executemany).
+# 'dispositivo' es el puerto del ESP32 que originó la fila (NULL si viene de la UI
+# sin equipo). En una BD creada antes de la lectura multi-dispositivo la columna se
+# añade en la primera conexión (ver ensure_schema).
+SQL_INSERT_EVENTO = ("INSERT INTO eventos (usuario, accion, detalles, dispositivo, fecha) "
+                     "VALUES (%s, %s, %s, %s, %s)")
+SQL_INSERT_LED_HIST = ("INSERT INTO led_hist (usuario, led_id, estado, fuente, dispositivo, fecha) "
+                       "VALUES (%s, %s, %s, %s, %s, %s)")
+SQL_INSERT_PULS_HIST = ("INSERT INTO pulsador_hist (usuario, pulsador_id, estado, fuente, dispositivo, fecha) "
+                        "VALUES (%s, %s, %s, %s, %s, %s)")
+SQL_INSERT_SENSOR = "INSERT INTO sensores (tipo, valor, dispositivo, fecha) VALUES (%s, %s, %s, %s)"
+SQL_UPDATE_LED = "UPDATE leds SET estado=%s WHERE id=%s"
+SQL_UPDATE_PULSADOR = "UPDATE pulsadores SET estado=%s WHERE id=%s"
+
+# Migración de la columna 'dispositivo' y, si no se puede aplicar (p.ej. el usuario
+# de MySQL no tiene permiso ALTER), sentencias sin ella: sentencia -> (tabla,
+# sentencia antigua, posición del parámetro 'dispositivo')
+DISPOSITIVO_TABLES = ("sensores", "eventos", "led_hist", "pulsador_hist")
+SQL_ADD_DISPOSITIVO = "ALTER TABLE {} ADD COLUMN dispositivo VARCHAR(64) NULL"
+LEGACY_STATEMENTS = {
+    SQL_INSERT_EVENTO: ("eventos", "INSERT INTO eventos (usuario, accion, detalles, fecha) "
+                                   "VALUES (%s, %s, %s, %s)", 3),
+    SQL_INSERT_LED_HIST: ("led_hist", "INSERT INTO led_hist (usuario, led_id, estado, fuente, fecha) "
+                                      "VALUES (%s, %s, %s, %s, %s)", 4),
+    SQL_INSERT_PULS_HIST: ("pulsador_hist", "INSERT INTO pulsador_hist (usuario, pulsador_id, estado, "
+                                            "fuente, fecha) VALUES (%s, %s, %s, %s, %s)", 4),
+    SQL_INSERT_SENSOR: ("sensores", "INSERT INTO sensores (tipo, valor, fecha) VALUES (%s, %s, %s)", 2),
+}
+
+# Política de eventos (ver event_policy.py). Las lecturas del sensor ya van a
+# 'sensores'; en 'eventos' sólo quedan los cambios relevantes:
+#   - sensor_deadband: cm que debe moverse la lectura para generar 'sensor_read'
+#   - sensor_thresholds: cm cuyo cruce genera 'sensor_umbral'; sensor_hysteresis:
+#     cm que debe alejarse la lectura del umbral antes de contar otro cruce
+#   - rules: acción -> min_interval (s) entre filas; lo que llega antes se agrupa
+#     en una fila "... (xN)". "por": "accion" limita la acción entera.
+EVENT_POLICY_CONFIG = {
+    "sensor_deadband": 5.0,
+    "sensor_thresholds": [10.0, 30.0],
+    "sensor_hysteresis": 1.0,
+    "default_rule": {"min_interval": 2.0, "por": "detalles"},
+    "rules": {
+        "login": {"min_interval": 0},
+        "logout": {"min_interval": 0},
+        "sensor_read": {"min_interval": 60.0, "por": "accion"},
+        "sensor_umbral": {"min_interval": 1.0, "por": "accion"},
+        "led_toggle_hw": {"min_interval": 1.0, "por": "detalles"},
+        "pulsador_change_hw": {"min_interval": 1.0, "por": "detalles"},
+    },
+}
+
+# Coste de bcrypt para los hashes de 'usuarios'. Un hash guardado con otro coste
+# se recalcula (y se actualiza en la BD) en el siguiente login correcto
+BCRYPT_ROUNDS = int(os.environ.get("HCSR05_BCRYPT_ROUNDS", "12"))
+
 # ---------------- DB FUNCTIONS ----------------
-def get_db_connection():
-    return mysql.connector.connect(**DB_CONFIG)
+_db_pool = None
+_write_queue = None
+_event_policy = EventPolicy(**EVENT_POLICY_CONFIG)
+_db_pool_lock = threading.Lock()
+_schema_lock = threading.Lock()
+_schema_checked = False
+_legacy_tables = set()   # tablas sin columna 'dispositivo' (ver ensure_schema)
 
-# ---------------- EVENT LOG ----------------
-def save_event(usuario: str, accion: str, detalles: str = None):
-    """Guarda un evento de usuario en la tabla 'eventos'.
-    Se asume una tabla con columnas: id (AI), usuario VARCHAR, accion VARCHAR,
-    detalles TEXT NULL, fecha DATETIME.
+
+def ensure_schema(conn):
+    """Añade la columna 'dispositivo' a las tablas que no la tienen (idempotente).
+
+    Las tablas donde no se pudo añadir quedan en _legacy_tables y sus INSERT se
+    escriben sin la columna (ver adapt_statement) en vez de fallar y acabar en
+    'spool_rechazados'.
     """
+    cur = conn.cursor()
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            INSERT INTO eventos (usuario, accion, detalles, fecha)
-            VALUES (%s, %s, %s, %s)
-            """,
-            (usuario, accion, detalles, datetime.now())
-        )
+        marks = ", ".join(["%s"] * len(DISPOSITIVO_TABLES))
+        cur.execute("SELECT TABLE_NAME FROM information_schema.COLUMNS "
+                    "WHERE TABLE_SCHEMA = DATABASE() AND COLUMN_NAME = 'dispositivo' "
+                    f"AND TABLE_NAME IN ({marks})", DISPOSITIVO_TABLES)
+        present = {row[0] for row in cur.fetchall()}
+        legacy = set()
+        for table in DISPOSITIVO_TABLES:
+            if table in present:
+                continue
+            try:
+                cur.execute(SQL_ADD_DISPOSITIVO.format(table))
+            except Exception as e:
+                # 1060: otra instancia la añadió a la vez
+                if getattr(e, "errno", None) != 1060:
+                    legacy.add(table)
+                    print(f"[BD] No se pudo añadir 'dispositivo' a {table} ({e}); "
+                          f"se escribirá sin esa columna", file=sys.stderr)
         conn.commit()
-    except Exception:
-        # Evitar que un fallo de logging detenga la app
-        pass
     finally:
+        cur.close()
+    _legacy_tables.clear()
+    _legacy_tables.update(legacy)
+
+
+def connect_db():
+    """Conexión nueva del pool; la primera que se abre comprueba el esquema."""
+    global _schema_checked
+    import mysql.connector
+    conn = mysql.connector.connect(**DB_CONFIG)
+    if not _schema_checked:
+        with _schema_lock:
+            if not _schema_checked:
+                try:
+                    ensure_schema(conn)
+                except Exception:
+                    conn.close()
+                    raise
+                _schema_checked = True
+    return conn
+
+
+def adapt_statement(sql, rows):
+    """Quita 'dispositivo' de los INSERT de tablas sin la columna (hook de WriteBehindQueue)."""
+    legacy = LEGACY_STATEMENTS.get(sql)
+    if legacy is None or legacy[0] not in _legacy_tables:
+        return sql, rows
+    _table, legacy_sql, pos = legacy
+    return legacy_sql, [tuple(r[:pos]) + tuple(r[pos + 1:]) for r in rows]
+
+
+def get_db_pool() -> ConnectionPool:
+    """Devuelve el pool compartido, creándolo en el primer uso."""
+    global _db_pool
+    import mysql.connector  # ~100 ms: sólo cuando hace falta la BD
+    with _db_pool_lock:
+        if _db_pool is None:
+            _db_pool = ConnectionPool(
+                connect_db,
+                connection_errors=(mysql.connector.errors.OperationalError,
+                                   mysql.connector.errors.InterfaceError),
+                **DB_POOL_CONFIG
+            )
+        return _db_pool
+
+
+def db_execute(sql: str, params=(), fetch=None):
+    """Ejecuta una sentencia usando una conexión del pool (con commit)."""
+    return get_db_pool().execute(sql, params, fetch=fetch)
+
+
+def get_write_queue() -> WriteBehindQueue:
+    """Devuelve la cola write-behind compartida, creándola en el primer uso."""
+    global _write_queue
+    pool = get_db_pool()
+    with _db_pool_lock:
+        if _write_queue is None:
+            _write_queue = WriteBehindQueue(pool, spool=SqliteSpool(SPOOL_PATH),
+                                            adapt=adapt_statement,
+                                            **WRITE_BEHIND_CONFIG)
+        return _write_queue
+
+
+def db_enqueue(sql: str, params):
+    """Encola una escritura; la hace el hilo escritor en lote, fuera del hilo llamador."""
+    get_write_queue().put(sql, params)
+
+
+def flush_writes(timeout: float = 5.0) -> bool:
+    """Espera a que se escriba todo lo encolado (logout)."""
+    with _db_pool_lock:
+        queue = _write_queue
+    return queue.flush(timeout) if queue is not None else True
+
+
+def warm_up():
+    """Trabajo de arranque que no hace falta para pintar el login: importa los
+    módulos pesados y abre el pool y la cola de escritura. Se lanza en un hilo
+    tras la primera pintura; si la BD no responde, el login lo reintentará."""
+    try:
+        import bcrypt  # noqa: F401
+        import distance_series  # noqa: F401  (numpy)
+        PROFILER.mark("segundo plano: bcrypt + numpy")
+        get_write_queue()
+        with get_db_pool().connection():
+            pass
+        PROFILER.mark("segundo plano: pool de BD conectado")
+    except Exception:
+        PROFILER.mark("segundo plano: BD no disponible")
+    PROFILER.report("Inicialización en segundo plano")
+
+
+def close_db_pool():
+    """Vacía la cola de escritura y cierra las conexiones del pool (al salir)."""
+    global _write_queue
+    flush_events(everything=True)
+    with _db_pool_lock:
+        queue, _write_queue = _write_queue, None
+    if queue is not None:
+        if queue.close() and queue.spool is not None:
+            queue.spool.close()
+    with _db_pool_lock:
+        if _db_pool is not None:
+            _db_pool.close_all()
+
+# ---------------- EVENT LOG ----------------
+def save_event(usuario: str, accion: str, detalles: str = None, dispositivo: str = None):
+    """Guarda un evento de usuario en la tabla 'eventos'.
+    Se asume una tabla con columnas: id (AI), usuario VARCHAR, accion VARCHAR,
+    detalles TEXT NULL, dispositivo VARCHAR NULL, fecha DATETIME.
+    Pasa por la política de eventos: los repetidos se agrupan en una fila con contador.
+    """
+    _write_event_rows(_event_policy.submit(usuario, accion, detalles, dispositivo))
+
+
+def save_sensor_event(usuario: str, value, dispositivo: str = None):
+    """Evento de sensor sólo si la lectura sale de la banda muerta o cruza un umbral."""
+    _write_event_rows(_event_policy.sensor(usuario, value, dispositivo=dispositivo))
+
+
+def flush_events(everything: bool = False):
+    """Escribe las filas agrupadas cuyo plazo venció (o todas, al cerrar sesión)."""
+    _write_event_rows(_event_policy.flush_all() if everything else _event_policy.flush_due())
+
+
+def _write_event_rows(rows):
+    for usuario, accion, detalles, dispositivo in rows:
         try:
-            conn.close()
+            db_enqueue(SQL_INSERT_EVENTO, (usuario, accion, detalles, dispositivo, datetime.now()))
         except Exception:
+            # Evitar que un fallo de logging detenga la app
             pass
 
 # ---------------- ORGANISED HISTORY TABLES ----------------
 # Nota: crear tablas en MySQL (ver SQL que te proporcioné en el chat):
-#   led_hist(id AI, usuario, led_id, estado, fuente, fecha)
-#   pulsador_hist(id AI, usuario, pulsador_id, estado, fuente, fecha)
+#   led_hist(id AI, usuario, led_id, estado, fuente, dispositivo, fecha)
+#   pulsador_hist(id AI, usuario, pulsador_id, estado, fuente, dispositivo, fecha)
 
-def save_led_hist(usuario: str, led_id: int, estado: bool, fuente: str):
+def save_led_hist(usuario: str, led_id: int, estado: bool, fuente: str, dispositivo: str = None):
     """Guarda histórico de cambios de LED (fuente: 'UI' o 'HW')."""
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute(
-            """
-            INSERT INTO led_hist (usuario, led_id, estado, fuente, fecha)
-            VALUES (%s, %s, %s, %s, %s)
-            """,
-            (usuario, led_id, bool(estado), fuente, datetime.now())
-        )
-        conn.commit()
+        db_enqueue(SQL_INSERT_LED_HIST,
+                   (usuario, led_id, bool(estado), fuente, dispositivo, datetime.now()))
     except Exception:
         pass
-    finally:
-        try:
-            conn.close()
-        except Exception:
-            pass
 
 
-def save_pulsador_hist(usuario: str, pulsador_id: int, estado: bool, fuente: str):
+def save_pulsador_hist(usuario: str, pulsador_id: int, estado: bool, fuente: str,
+                       dispositivo: str = None):
     """Guarda histórico de pulsadores (fuente: 'UI' o 'HW')."""
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute(
-            """
-            INSERT INTO pulsador_hist (usuario, pulsador_id, estado, fuente, fecha)
-            VALUES (%s, %s, %s, %s, %s)
-            """,
-            (usuario, pulsador_id, bool(estado), fuente, datetime.now())
-        )
-        conn.commit()
+        db_enqueue(SQL_INSERT_PULS_HIST,
+                   (usuario, pulsador_id, bool(estado), fuente, dispositivo, datetime.now()))
     except Exception:
         pass
-    finally:
+
+# ---------------- LOGIN ----------------
+def verify_login(username: str, password: str) -> bool:
+    """Comprueba usuario y contraseña (consulta + bcrypt: bloqueante, no llamar
+    desde el hilo de la GUI). Rehace el hash si su coste no es BCRYPT_ROUNDS."""
+    import bcrypt
+    result = db_execute("SELECT password_hash FROM usuarios WHERE username=%s",
+                        (username,), fetch="one")
+    if not result:
+        return False
+    stored = result[0].encode("utf-8")
+    if not bcrypt.checkpw(password.encode("utf-8"), stored):
+        return False
+    partes = result[0].split("$")
+    if len(partes) > 3 and partes[2] != f"{BCRYPT_ROUNDS:02d}":
         try:
-            conn.close()
+            nuevo = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(BCRYPT_ROUNDS))
+            db_execute("UPDATE usuarios SET password_hash=%s WHERE username=%s",
+                       (nuevo.decode("utf-8"), username))
         except Exception:
+            # El login es válido aunque no se haya podido actualizar el hash
             pass
+    return True
+
+
+class LoginSignals(QObject):
+    finished = pyqtSignal(str, bool, str)  # usuario, válido, error (vacío si no hubo)
+
+
+class LoginTask(QRunnable):
+    """Ejecuta verify_login en el QThreadPool; el resultado vuelve por señal al hilo de la GUI."""
+
+    def __init__(self, username, password):
+        super().__init__()
+        self.username = username
+        self.password = password
+        self.signals = LoginSignals()
+
+    def run(self):
+        try:
+            ok = verify_login(self.username, self.password)
+            self.signals.finished.emit(self.username, ok, "")
+        except Exception as e:
+            self.signals.finished.emit(self.username, False, str(e))
 
 # ---------------- LOGIN WINDOW ----------------
 class LoginWindow(QWidget):
@@ -174,22 +467,42 @@ class LoginWindow(QWidget):
         inner_layout.addWidget(self.button_login)
 
         layout.addWidget(frame, alignment=Qt.AlignCenter)
+        self._painted = False
+        PROFILER.mark("login: widgets")
 
-    def check_login(self):
-        username = self.input_user.text()
-        password = self.input_pass.text()
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._painted:
+            self._painted = True
+            PROFILER.mark("login: primera pintura")
+            PROFILER.report("Ventana de login")
+            # El resto del arranque, fuera del hilo de la GUI
+            threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
 
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT password_hash FROM usuarios WHERE username=%s", (username,))
-        result = cursor.fetchone()
-        conn.close()
+    def check_login(self):
+        # La consulta y bcrypt van a un hilo del pool: la ventana sigue respondiendo
+        self.set_busy(True)
+        self._login_task = LoginTask(self.input_user.text(), self.input_pass.text())
+        self._login_task.signals.finished.connect(self.on_login_result)
+        QThreadPool.globalInstance().start(self._login_task)
 
-        if result and bcrypt.checkpw(password.encode("utf-8"), result[0].encode("utf-8")):
+    def on_login_result(self, username, ok, error):
+        self._login_task = None
+        if ok:
             self.accept_login(username)
+            return
+        self.set_busy(False)
+        if error:
+            QMessageBox.warning(self, "Error", f"No se pudo verificar el usuario: {error}")
         else:
             QMessageBox.warning(self, "Error", "Usuario o contraseña incorrectos")
 
+    def set_busy(self, busy):
+        self.button_login.setEnabled(not busy)
+        self.input_user.setEnabled(not busy)
+        self.input_pass.setEnabled(not busy)
+        self.button_login.setText("Verificando..." if busy else "Iniciar Sesión")
+
     def accept_login(self, username):
         self.close()
         # Log de evento: inicio de sesión correcto
@@ -200,19 +513,54 @@ class LoginWindow(QWidget):
         self.main_window = MainWindow(username)
         self.main_window.show()
 
+# ---------------- WORKER -> GUI ----------------
+class GuiBridge(QObject):
+    """Puente hilo lector -> GUI: la señal se emite desde el hilo lector y Qt la
+    entrega en el hilo de la GUI (conexión en cola)."""
+    changed = pyqtSignal()
+    devices_changed = pyqtSignal(list, list)  # abiertos, cerrados (ver rescan_devices)
+
+# ---------------- ESTADO POR DISPOSITIVO ----------------
+class DeviceState:
+    """Estado de un ESP32: lo escribe su hilo lector (nunca toca widgets) y la GUI
+    lo pinta como mucho una vez por fotograma."""
+
+    def __init__(self, label=None):
+        from distance_series import DistanceHistory  # numpy: ya importado por warm_up()
+        self.label = label
+        self.model = PanelModel()
+        self.history = DistanceHistory(raw_capacity=PLOT_RAW_CAPACITY)
+        # Acondicionamiento de la lectura del sensor (ver signal_filters.py)
+        self.sensor_filter = FilterPipeline.from_spec(SENSOR_FILTER_SPEC)
+        # Estados previos de pulsadores recibidos por hardware para registrar cambios
+        self.last_puls_hw = [None, None, None]
+        self.last_sensor_persist = 0.0
+        self.card = None  # QLabel con el resumen del dispositivo (hilo GUI)
+
 # ---------------- MAIN WINDOW ----------------
 class MainWindow(QMainWindow):
     def __init__(self, username):
         super().__init__()
         self.setWindowTitle(f"Panel Principal - Bienvenido {username}")
-        self.setFixedSize(950, 700)
+        self.setFixedSize(950, 960)
         self.username = username
         # Evita eco serial cuando el estado del LED viene del hardware
         self.suppress_serial_echo = False
-        # Contador de lecturas para el footer
-        self.readings_count = 0
-        # Estados previos de pulsadores recibidos por hardware para registrar cambios
-        self._last_puls_hw = [None, None, None]
+        # Un DeviceState por ESP32; el panel muestra el dispositivo seleccionado.
+        # Sin ningún equipo conectado se usa un estado local (simulación desde la UI)
+        self.device = None
+        self.state = self._local_state = DeviceState()
+        self.devices = DeviceManager(self.process_serial_batch, baud_rate=BAUD_RATE,
+                                     protocol=SERIAL_PROTOCOL, buffer_size=SERIAL_BUFFER_SIZE,
+                                     make_state=DeviceState)
+        self.bridge = GuiBridge()
+        self.bridge.changed.connect(self.schedule_render)
+        self.bridge.devices_changed.connect(self.on_devices_changed)
+        self._rescanning = False
+        self._closing = False
+        self._painted = False
+        self._scanned = False
+        self._last_render = 0.0
 
         # --------- STYLES ----------
         self.setStyleSheet("""
@@ -245,7 +593,7 @@ class MainWindow(QMainWindow):
                 background: #4CAF50;
                 color: white;
             }
-            QTextBrowser {
+            QListView {
                 background: black;
                 color: lime;
                 font-family: monospace;
@@ -265,12 +613,24 @@ class MainWindow(QMainWindow):
         header.setStyleSheet("font-size: 20px; font-weight: bold; color: white;")
         header_layout.addWidget(header)
 
+        self.device_combo = QComboBox()
+        self.device_combo.setToolTip("Dispositivo mostrado en el panel")
+        self.device_combo.currentIndexChanged.connect(self.on_device_selected)
+        header_layout.addWidget(self.device_combo)
+
         self.btn_logout = QPushButton("🚪 Cerrar sesión")
         self.btn_logout.setStyleSheet("background: #8e2de2; padding: 8px; font-weight: bold;")
         self.btn_logout.clicked.connect(self.logout)
         header_layout.addWidget(self.btn_logout, alignment=Qt.AlignRight)
         main_layout.addLayout(header_layout)
 
+        # ----- DISPOSITIVOS -----
+        self.cards_layout = QHBoxLayout()
+        self.label_sin_dispositivos = QLabel("🔌 Sin dispositivos conectados")
+        self.cards_layout.addWidget(self.label_sin_dispositivos)
+        self.cards_layout.addStretch()
+        main_layout.addLayout(self.cards_layout)
+
         # ----- GRID -----
         grid = QGridLayout()
 
@@ -373,11 +733,31 @@ class MainWindow(QMainWindow):
         log_title = QLabel("📟 Display LCD")
         log_title.setStyleSheet("font-size: 16px; font-weight: bold; color: #bbb;")
         log_layout.addWidget(log_title)
-        self.log_display = QTextBrowser()
-        self.log_display.append(">> Sistema iniciado...")
+        self.log_model = LogModel(LOG_CAPACITY, rotate_path=LOG_ROTATE_PATH, parent=self)
+        self.log_display = LogView(self.log_model)
+        self.log_model.append_lines([">> Sistema iniciado..."])
         log_layout.addWidget(self.log_display)
         grid.addWidget(log_box, 1, 1)
 
+        # Gráfico de distancia
+        plot_box = QFrame()
+        plot_layout = QVBoxLayout(plot_box)
+        plot_header = QHBoxLayout()
+        plot_title = QLabel("📈 Distancia en tiempo real")
+        plot_title.setStyleSheet("font-size: 16px; font-weight: bold; color: #bbb;")
+        plot_header.addWidget(plot_title)
+        plot_header.addStretch()
+        self.plot_window = QComboBox()
+        for label, seconds in PLOT_WINDOWS:
+            self.plot_window.addItem(label, seconds)
+        self.plot_window.currentIndexChanged.connect(
+            lambda _i: self.plot.set_span(self.plot_window.currentData()))
+        plot_header.addWidget(self.plot_window)
+        plot_layout.addLayout(plot_header)
+        self.plot = DistancePlot(self.state.history)
+        plot_layout.addWidget(self.plot)
+        grid.addWidget(plot_box, 2, 0, 1, 2)
+
         main_layout.addLayout(grid)
 
         # FOOTER
@@ -390,39 +770,53 @@ class MainWindow(QMainWindow):
         self.timer.timeout.connect(self.update_time)
         self.timer.start(1000)
 
-        # Conexión serial en segundo plano
-        self.serial_thread = threading.Thread(target=self.read_serial, daemon=True)
-        try:
-            self.ser = serial.Serial(SERIAL_PORT, BAUD_RATE, timeout=1)
-            self.serial_thread.start()
-        except Exception as e:
-            QMessageBox.warning(self, "Serial", f"No se pudo abrir puerto serial: {e}")
-            self.ser = None
+        # Timer de repintado (un disparo por fotograma como máximo)
+        self.render_timer = QTimer(self)
+        self.render_timer.setSingleShot(True)
+        self.render_timer.timeout.connect(self.render_tick)
+
+        # Conexión serial: un hilo lector por dispositivo. Los puertos se abren tras
+        # la primera pintura (paintEvent) y luego se revisan cada DEVICE_RESCAN_MS
+        self.serial_ports = parse_ports(SERIAL_PORTS)
+        self.device_timer = QTimer(self)
+        self.device_timer.timeout.connect(self.rescan_devices)
+        PROFILER.mark("panel: widgets")
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._painted:
+            self._painted = True
+            PROFILER.mark("panel: primera pintura")
+            self.rescan_devices()
+            self.device_timer.start(DEVICE_RESCAN_MS)
 
     # ----------- FUNCIONES LEDs ------------
     def toggle_led(self, index):
         state = self.led_buttons[index-1].isChecked()
         # Actualiza texto/estado del botón sin emitir señales extra
         self.update_led_button(index, state)
+        self.notify(self.state.model.set_led(index, state))
         # Persiste en BD
         self.save_led_db(index, state)
+        dispositivo = self.device.id if self.device else None
         # Log de evento de usuario (sólo si proviene de UI)
         if not self.suppress_serial_echo:
             try:
-                save_event(self.username, "led_toggle", f"LED {index} -> {'ON' if state else 'OFF'} (UI)")
+                save_event(self.username, "led_toggle",
+                           f"LED {index} -> {'ON' if state else 'OFF'} (UI)", dispositivo)
             except Exception:
                 pass
             # Histórico organizado (LED)
             try:
-                save_led_hist(self.username, index, state, "UI")
+                save_led_hist(self.username, index, state, "UI", dispositivo)
             except Exception:
                 pass
         # Solo enviar al hardware si el cambio se originó en la UI (no desde hardware)
-        if self.ser and not self.suppress_serial_echo:
+        if self.device and not self.suppress_serial_echo:
             msg = json.dumps({"led": index, "state": state})
-            self.ser.write((msg + "\n").encode())
+            self.device.write((msg + "\n").encode())
         # Log
-        self.log_display.append(f">> LED {index} {'encendido' if state else 'apagado'}")
+        self.log(f">> LED {index} {'encendido' if state else 'apagado'}")
 
     def update_led_button(self, index, state):
         """Actualiza el botón del LED indexado (1..3) sin provocar señales de clic."""
@@ -434,81 +828,155 @@ class MainWindow(QMainWindow):
         finally:
             btn.blockSignals(was_blocked)
 
-    def apply_led_state_from_hw(self, index, state):
-        """Aplica estado de LED proveniente del hardware evitando eco serial y bucles."""
-        self.suppress_serial_echo = True
+    def apply_led_state_from_hw(self, dev, index, state):
+        """Aplica estado de LED proveniente del hardware (hilo lector de `dev`).
+
+        Sólo actualiza el modelo; el botón se repinta en el hilo de la GUI con
+        las señales bloqueadas, por lo que no hay eco hacia el puerto serial.
+        """
+        self.notify(dev.state.model.set_led(index, state))
+        self.save_led_db(index, state)
+        self.log(f">> LED {index} {'encendido' if state else 'apagado'} (hardware)", dev)
+        # Registrar evento de hardware
         try:
-            self.update_led_button(index, state)
-            self.save_led_db(index, state)
-            self.log_display.append(f">> LED {index} {'encendido' if state else 'apagado'} (hardware)")
-            # Registrar evento de hardware
-            try:
-                save_event(self.username, "led_toggle_hw", f"LED {index} -> {'ON' if state else 'OFF'} (HW)")
-            except Exception:
-                pass
-            # Histórico organizado (LED)
-            try:
-                save_led_hist(self.username, index, state, "HW")
-            except Exception:
-                pass
-        finally:
-            self.suppress_serial_echo = False
+            save_event(self.username, "led_toggle_hw",
+                       f"LED {index} -> {'ON' if state else 'OFF'} (HW)", dev.id)
+        except Exception:
+            pass
+        # Histórico organizado (LED)
+        try:
+            save_led_hist(self.username, index, state, "HW", dev.id)
+        except Exception:
+            pass
 
     def save_led_db(self, led_id, state):
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("UPDATE leds SET estado=%s WHERE id=%s", (state, led_id))
-        conn.commit()
-        conn.close()
+        db_enqueue(SQL_UPDATE_LED, (state, led_id))
 
-    # ----------- LECTURA SERIAL ------------
-    def read_serial(self):
-        if not self.ser:
+    # ----------- DISPOSITIVOS ------------
+    def rescan_devices(self):
+        """Abre los equipos nuevos y retira los desconectados en un hilo aparte
+        (abrir un puerto puede tardar); los widgets se actualizan en on_devices_changed."""
+        if self._rescanning:
+            return
+        self._rescanning = True
+        threading.Thread(target=self._rescan_worker, name="device-rescan", daemon=True).start()
+
+    def _rescan_worker(self):
+        try:
+            added, removed = self.devices.rescan(self.serial_ports)
+        except Exception:
+            added, removed = [], []
+        self.bridge.devices_changed.emit(added, removed)
+
+    def on_devices_changed(self, added, removed):
+        self._rescanning = False
+        if self._closing:
+            # Sesión cerrada mientras se abrían puertos
+            self.devices.close_all()
             return
-        while True:
+        for dev in removed:
+            self.remove_device_widgets(dev)
+            self.log(f">> Dispositivo desconectado: {dev.id}")
+        for dev in added:
+            self.add_device_widgets(dev)
+            self.log(f">> Dispositivo conectado: {dev.id}", dev)
+        if not self._scanned:
+            self._scanned = True
+            PROFILER.mark("panel: puertos abiertos")
+            PROFILER.report("Panel principal")
+            if not len(self.devices):
+                detalle = "; ".join(f"{p}: {e}" for p, e in self.devices.errors.items())
+                QMessageBox.warning(self, "Serial", "No se pudo abrir puerto serial: "
+                                    f"{detalle or 'no se detectó ningún ESP32'}")
+
+    def add_device_widgets(self, dev):
+        card = QLabel(f"📡 {dev.id}: -- cm")
+        card.setStyleSheet("background: #1c1f26; border-radius: 8px; padding: 4px 10px;")
+        dev.state.card = card
+        self.cards_layout.insertWidget(self.cards_layout.count() - 1, card)
+        self.label_sin_dispositivos.setVisible(False)
+        # El primero que se añade queda seleccionado (currentIndexChanged)
+        self.device_combo.addItem(dev.id, dev.port)
+
+    def remove_device_widgets(self, dev):
+        if dev.state.card is not None:
+            dev.state.card.deleteLater()
+            dev.state.card = None
+        i = self.device_combo.findData(dev.port)
+        if i >= 0:
+            self.device_combo.removeItem(i)
+        if self.device is dev:
+            self.select_device(None)
+        self.label_sin_dispositivos.setVisible(not len(self.devices))
+
+    def on_device_selected(self, index):
+        port = self.device_combo.itemData(index) if index >= 0 else None
+        self.select_device(self.devices.get(port) if port else None)
+
+    def select_device(self, dev):
+        """Muestra en el panel (sensor, LEDs, pulsadores, gráfico) el estado de `dev`."""
+        self.device = dev
+        self.state = dev.state if dev else self._local_state
+        self.label_sensor.setText("-- cm")
+        self.plot.set_history(self.state.history)
+        # El próximo fotograma repinta todo el estado del dispositivo elegido
+        self.notify(self.state.model.touch_all())
+
+    def _states(self):
+        states = [dev.state for dev in self.devices.devices()]
+        if self.state not in states:
+            states.append(self.state)
+        return states
+
+    # ----------- LECTURA SERIAL ------------
+    def process_serial_batch(self, dev, frames):
+        """Recibe un lote de tramas ya decodificadas desde el hilo lector de `dev`."""
+        for data in frames:
             try:
-                line = self.ser.readline().decode().strip()
-                if line:
-                    data = json.loads(line)
-                    self.process_serial_data(data)
+                self.process_serial_data(dev, data)
             except Exception:
                 continue
 
-    def process_serial_data(self, data):
+    def process_serial_data(self, dev, data):
+        """Procesa una trama en el hilo lector: persiste y actualiza el modelo (sin widgets)."""
+        ds = dev.state
         if "sensor" in data:
-            value = data["sensor"]
-            self.label_sensor.setText(f"{value} cm")
-            self.save_sensor_db(value)
-            self.log_display.append(f">> Distancia medida: {value} cm")
-            # Actualiza contador y última actualización
-            self.readings_count += 1
-            self.ultima_act.setText(f"Última actualización: {datetime.now().strftime('%I:%M:%S %p').lower()}")
-            # Refrescar footer inmediatamente
-            self.update_time()
-            # Registrar evento HW para lectura de sensor
-            try:
-                save_event(self.username, "sensor_read", f"HC-SR05={value} cm (HW)")
-            except Exception:
-                pass
+            raw = data["sensor"]
+            now = time.time()
+            value = ds.sensor_filter.update(raw, now)
+            self.save_sensor_db(dev, raw, value, now)
+            if value is None:
+                self.log(f">> Lectura descartada: {raw} cm", dev)
+            else:
+                value = round(value, 1)
+                ds.history.add(now, value)
+                self.notify(ds.model.set_sensor(value))
+                self.log(f">> Distancia medida: {value} cm", dev)
+                # Evento HW sólo si la lectura cambia lo suficiente (ver EVENT_POLICY_CONFIG)
+                try:
+                    save_sensor_event(self.username, value, dev.id)
+                except Exception:
+                    pass
  
         if "pulsadores" in data:
             states = data["pulsadores"]
             for i, state in enumerate(states):
-                self.puls_labels[i].setText(
-                    f"Pulsador {i+1}: {'Presionado' if state else 'No Presionado'}"
-                )
+                state = bool(state)
+                # Sólo las transiciones reales llegan a la GUI y a la BD
+                if i >= len(ds.last_puls_hw) or ds.last_puls_hw[i] == state:
+                    continue
+                ds.last_puls_hw[i] = state
+                self.notify(ds.model.set_pulsador(i+1, state))
                 self.save_puls_db(i+1, state)
-                # Registrar evento de HW sólo cuando cambie el estado respecto al previo
                 try:
-                    if self._last_puls_hw[i] is None or bool(self._last_puls_hw[i]) != bool(state):
-                        estado_txt = "Presionado" if state else "No Presionado"
-                        save_event(self.username, "pulsador_change_hw", f"Pulsador {i+1}: {estado_txt} (HW)")
-                        self._last_puls_hw[i] = bool(state)
+                    estado_txt = "Presionado" if state else "No Presionado"
+                    save_event(self.username, "pulsador_change_hw",
+                               f"Pulsador {i+1}: {estado_txt} (HW)", dev.id)
                 except Exception:
                     pass
                 # Histórico organizado (Pulsador)
                 try:
-                    save_pulsador_hist(self.username, i+1, bool(state), "HW")
+                    save_pulsador_hist(self.username, i+1, state, "HW", dev.id)
                 except Exception:
                     pass
  
@@ -518,7 +986,7 @@ class MainWindow(QMainWindow):
                 idx = int(data["led"])  # 1..3
                 st = bool(data.get("state", data.get("on", False)))
                 if 1 <= idx <= len(self.led_buttons):
-                    self.apply_led_state_from_hw(idx, st)
+                    self.apply_led_state_from_hw(dev, idx, st)
             except Exception:
                 pass
  
@@ -526,29 +994,137 @@ class MainWindow(QMainWindow):
             try:
                 leds_states = list(data["leds"])  # [true,false,true]
                 for i, st in enumerate(leds_states, start=1):
-                    if i <= len(self.led_buttons):
-                        self.apply_led_state_from_hw(i, bool(st))
+                    # Las tramas JSON repiten el estado completo: sólo se aplican cambios
+                    if i <= len(self.led_buttons) and ds.model.led_state(i) != bool(st):
+                        self.apply_led_state_from_hw(dev, i, bool(st))
             except Exception:
                 pass
 
-    def save_sensor_db(self, value):
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("INSERT INTO sensores (tipo, valor, fecha) VALUES (%s, %s, %s)",
-                       ("HC-SR05", value, datetime.now()))
-        conn.commit()
-        conn.close()
+    def save_sensor_db(self, dev, raw, filtered, t):
+        """Guarda la lectura según SENSOR_PERSIST (filtered es None si se descartó)."""
+        fecha = datetime.fromtimestamp(t)
+        if SENSOR_PERSIST == "ambos":
+            db_enqueue(SQL_INSERT_SENSOR, (SENSOR_TIPO, raw, dev.id, fecha))
+            if filtered is not None:
+                db_enqueue(SQL_INSERT_SENSOR, (SENSOR_TIPO_FILTRADO, round(filtered, 1), dev.id, fecha))
+        elif filtered is not None and t - dev.state.last_sensor_persist >= SENSOR_PERSIST_INTERVAL:
+            dev.state.last_sensor_persist = t
+            db_enqueue(SQL_INSERT_SENSOR, (SENSOR_TIPO_FILTRADO, round(filtered, 1), dev.id, fecha))
 
     def save_puls_db(self, puls_id, state):
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("UPDATE pulsadores SET estado=%s WHERE id=%s", (state, puls_id))
-        conn.commit()
-        conn.close()
+        db_enqueue(SQL_UPDATE_PULSADOR, (state, puls_id))
+
+    # ----------- PIPELINE DE REPINTADO ------------
+    def log(self, line, dev=None):
+        """Añade una línea al LCD desde cualquier hilo (se pinta en el próximo fotograma).
+        Con varios equipos conectados, las líneas de un dispositivo llevan su puerto."""
+        if dev is not None and len(self.devices) > 1:
+            line = f"[{dev.id}] {line}"
+        self.notify((dev.state if dev else self.state).model.add_log(line))
+
+    def notify(self, became_dirty):
+        """Avisa a la GUI sólo cuando el modelo pasa de limpio a sucio."""
+        if became_dirty:
+            self.bridge.changed.emit()
+
+    def schedule_render(self):
+        """Programa un repintado respetando GUI_FRAME_MS entre fotogramas (hilo GUI)."""
+        if self.render_timer.isActive():
+            return
+        elapsed_ms = (time.monotonic() - self._last_render) * 1000.0
+        self.render_timer.start(int(max(0.0, GUI_FRAME_MS - elapsed_ms)))
+
+    def render_tick(self):
+        """Aplica a los widgets los cambios acumulados desde el último fotograma."""
+        self._last_render = time.monotonic()
+        lines, dropped, updated = [], 0, False
+        for ds in self._states():
+            snap = ds.model.take()
+            if snap is None:
+                continue
+            if snap.sensor is not None and ds.card is not None:
+                ds.card.setText(f"📡 {ds.label}: {snap.sensor} cm")
+            if ds is self.state:
+                self.apply_snapshot(snap)
+            lines.extend(snap.log)
+            dropped += snap.log_dropped
+            updated = updated or snap.last_update is not None
+        if dropped:
+            lines.insert(0, f">> ({dropped} líneas omitidas)")
+        if lines:
+            self.log_model.append_lines(lines)
+        if updated:
+            self.update_time()
+
+    def apply_snapshot(self, snap):
+        """Pinta los cambios del dispositivo mostrado en el panel."""
+        if snap.sensor is not None:
+            self.label_sensor.setText(f"{snap.sensor} cm")
+            self.plot.refresh()
+        for i, state in snap.pulsadores.items():
+            if i <= len(self.puls_labels):
+                self.puls_labels[i-1].setText(
+                    f"Pulsador {i}: {'Presionado' if state else 'No Presionado'}"
+                )
+        for i, state in snap.leds.items():
+            if i <= len(self.led_buttons):
+                self.update_led_button(i, state)
 
     def update_time(self):
+        # Filas agrupadas de la política de eventos cuyo plazo ya venció
+        flush_events()
         hora = QTime.currentTime().toString("HH:mm:ss")
-        self.status.showMessage(f"✔ Conectado | Hora: {hora}")
+        lecturas, ultima = 0, None
+        for ds in self._states():
+            n, t = ds.model.readings()
+            lecturas += n
+            if t is not None and (ultima is None or t > ultima):
+                ultima = t
+        ultima_txt = ultima.strftime('%I:%M:%S %p').lower() if ultima else "--"
+        self.status.showMessage(
+            f"✔ Conectado | Lecturas: {lecturas} | Última actualización: {ultima_txt} | Hora: {hora}"
+        )
+        # Estadísticas del pool de BD en el tooltip del footer. Se leen los globales
+        # sin crearlos: get_db_pool()/get_write_queue() importarían mysql.connector y
+        # abrirían el diario en el hilo de la GUI
+        with _db_pool_lock:
+            pool, queue = _db_pool, _write_queue
+        if pool is not None:
+            st = pool.stats()
+            bd = (f"BD: {st['checkouts']} checkouts | espera media {st['wait_avg_ms']:.1f} ms "
+                  f"(máx {st['wait_max_ms']:.1f} ms) | reconexiones {st['reconnects']} | "
+                  f"en uso {st['in_use']}/{st['max_size']}")
+        else:
+            bd = "BD: —"
+        if queue is not None:
+            wq = queue.stats()
+            escritura = (
+                f"Escritura: {wq['written']}/{wq['enqueued']} filas en {wq['batches']} lotes "
+                f"(media {wq['avg_batch']:.1f}) | en cola {wq['queued']} | "
+                f"descartadas {wq['dropped']}\n"
+                f"Diario local: {wq['spool_depth']} pendientes | reproducidas {wq['replayed']} "
+                f"({wq['replay_rows_s']:.0f} filas/s) | duplicadas omitidas {wq['duplicates']} | "
+                f"rechazadas {wq['rejected']}"
+            )
+        else:
+            escritura = "Escritura: —\nDiario local: —"
+        fs = self.state.sensor_filter.stats()
+        ev = _event_policy.stats()
+        lines = [
+            bd,
+            escritura,
+            f"Filtro: {fs['samples']} muestras | descartadas {fs['rejected']} | "
+            f"atípicas corregidas {fs['outliers']}",
+            f"Eventos: {ev['emitted']} escritos de {ev['submitted']} | "
+            f"agrupados {ev['suppressed']} | pendientes {ev['pending']}",
+        ]
+        for port, sr in self.devices.stats().items():
+            lines.append(
+                f"Serial {port}: {sr['bytes_s']:.0f} B/s | {sr['frames_s']:.1f} tramas/s | "
+                f"malformadas {sr['malformed']} (CRC {sr['crc_errors']}, perdidas {sr['lost']}) | "
+                f"búfer máx {sr['buffer_high_water']}/{sr['buffer_capacity']} B"
+            )
+        self.status.setToolTip("\n".join(lines))
 
     def logout(self):
         # Log de evento: cierre de sesión
@@ -556,6 +1132,12 @@ class MainWindow(QMainWindow):
             save_event(self.username, "logout", "Cierre de sesión")
         except Exception:
             pass
+        # Liberar los puertos y escribir lo pendiente antes de cambiar de sesión
+        self._closing = True
+        self.device_timer.stop()
+        self.devices.close_all()
+        flush_events(everything=True)
+        flush_writes()
         self.close()
         self.login = LoginWindow()
         self.login.show()
@@ -565,9 +1147,10 @@ class MainWindow(QMainWindow):
         # 1) Mostrar 'Presionado' en la UI
         if 1 <= index <= len(self.puls_labels):
             self.puls_labels[index-1].setText("Presionado")
+        dispositivo = self.device.id if self.device else None
         # 1.1) Log de evento de usuario (acción en UI)
         try:
-            save_event(self.username, "pulsador_press", f"Pulsador {index} (UI)")
+            save_event(self.username, "pulsador_press", f"Pulsador {index} (UI)", dispositivo)
         except Exception:
             pass
         # 2) Guardar estado de pulsador en BD (presionado)
@@ -577,7 +1160,8 @@ class MainWindow(QMainWindow):
             pass
         # 3) Conmutar el LED correspondiente (mismo índice 1..3)
         if 1 <= index <= len(self.led_buttons):
-            new_state = not self.led_buttons[index-1].isChecked()
+            # El modelo tiene el estado más reciente (puede haber un cambio HW sin pintar)
+            new_state = not self.state.model.led_state(index)
             # Fijar estado y ejecutar la lógica estándar (BD + Serial + Log)
             self.led_buttons[index-1].setChecked(new_state)
             self.toggle_led(index)
@@ -591,20 +1175,32 @@ class MainWindow(QMainWindow):
             self.save_puls_db(index, False)
         except Exception:
             pass
+        dispositivo = self.device.id if self.device else None
         # Log de evento de usuario (liberación)
         try:
-            save_event(self.username, "pulsador_release", f"Pulsador {index} (UI)")
+            save_event(self.username, "pulsador_release", f"Pulsador {index} (UI)", dispositivo)
         except Exception:
             pass
         # Histórico organizado (Pulsador UI)
         try:
-            save_pulsador_hist(self.username, index, False, "UI")
+            save_pulsador_hist(self.username, index, False, "UI", dispositivo)
         except Exception:
             pass
 
 # ---------------- MAIN APP ----------------
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
+    parser = argparse.ArgumentParser(description="Panel de control HC-SR05")
+    parser.add_argument("--port", action="append",
+                        help="puerto serial (repetible, o lista separada por comas, o 'auto')")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="mostrar el tiempo de cada fase del arranque")
+    # El resto de argumentos (-style, -platform...) son para Qt
+    args, qt_args = parser.parse_known_args()
+    if args.port:
+        SERIAL_PORTS = ",".join(args.port)
+    app = QApplication(sys.argv[:1] + qt_args)
+    PROFILER.mark("QApplication")
+    app.aboutToQuit.connect(close_db_pool)
     login = LoginWindow()
     login.show()
     sys.exit(app.exec_())
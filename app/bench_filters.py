@@ -0,0 +1,53 @@
+# bench_filters.py
+# Microbenchmark del coste por muestra de los filtros de signal_filters.py.
+#
+# Uso: python bench_filters.py [--samples 200000] [--spec "rango:2:400,hampel:7:3,mediana:5,ema:0.3"]
+
+import argparse
+import random
+import time
+
+from signal_filters import FilterPipeline, FILTERS
+
+
+def make_samples(n):
+    """Señal lenta con ruido y un 2 % de ecos falsos / timeouts."""
+    rnd = random.Random(1234)
+    out = []
+    value = 100.0
+    for i in range(n):
+        value = min(max(value + rnd.gauss(0, 0.5), 5.0), 390.0)
+        x = value + rnd.gauss(0, 1.0)
+        if rnd.random() < 0.02:
+            x = rnd.choice((0.0, 450.0, rnd.uniform(2.0, 400.0)))
+        out.append((i * 0.02, x))
+    return out
+
+
+def run(label, pipeline, samples):
+    update = pipeline.update
+    t0 = time.perf_counter()
+    for t, x in samples:
+        update(x, t)
+    wall = time.perf_counter() - t0
+    print(f"{label:<40} {wall / len(samples) * 1e9:>10.0f} {len(samples) / wall:>14,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de filtros del sensor")
+    parser.add_argument("--samples", type=int, default=200000)
+    parser.add_argument("--spec", default="rango:2:400,hampel:7:3,mediana:5,ema:0.3,pendiente:300")
+    args = parser.parse_args()
+
+    samples = make_samples(args.samples)
+    print(f"{'filtro':<40} {'ns/muestra':>10} {'muestras/s':>14}")
+    run("(sin filtros)", FilterPipeline(), samples)
+    for name in FILTERS:
+        run(name, FilterPipeline.from_spec(name), samples)
+    for n in (5, 11, 21):
+        run(f"mediana:{n}", FilterPipeline.from_spec(f"mediana:{n}"), samples)
+    run(args.spec, FilterPipeline.from_spec(args.spec), samples)
+
+
+if __name__ == "__main__":
+    main()
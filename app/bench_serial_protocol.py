@@ -0,0 +1,77 @@
+# bench_serial_protocol.py
+# Benchmark de decodificación serial: JSON por líneas (como el readline() original)
+# frente a tramas binarias, medido en tramas/s y CPU por trama.
+#
+# Uso: python bench_serial_protocol.py [--frames 200000] [--chunk 4096]
+
+import argparse
+import io
+import json
+import random
+import time
+
+from serial_protocol import FrameDecoder, encode_frame, encode_json_frame
+
+
+def make_stream(n, binary):
+    rnd = random.Random(1234)
+    parts = []
+    for seq in range(n):
+        dist = round(rnd.uniform(2.0, 400.0), 1)
+        puls = [rnd.random() < 0.1 for _ in range(3)]
+        if binary:
+            parts.append(encode_frame(seq, dist, puls))
+        else:
+            parts.append(encode_json_frame(dist, puls))
+    return b"".join(parts)
+
+
+def bench_readline(stream):
+    """Ruta original: readline().decode().strip() + json.loads por trama."""
+    f = io.BytesIO(stream)
+    count = 0
+    while True:
+        raw = f.readline()
+        if not raw:
+            break
+        line = raw.decode().strip()
+        if line:
+            json.loads(line)
+            count += 1
+    return count
+
+
+def bench_decoder(stream, mode, chunk):
+    dec = FrameDecoder(mode)
+    count = 0
+    for i in range(0, len(stream), chunk):
+        count += len(dec.feed(stream[i:i + chunk]))
+    return count
+
+
+def run(label, fn, n_bytes):
+    t0, c0 = time.perf_counter(), time.process_time()
+    frames = fn()
+    wall, cpu = time.perf_counter() - t0, time.process_time() - c0
+    print(f"{label:<28} {frames:>9} {frames / wall:>14,.0f} {cpu / frames * 1e6:>12.2f} "
+          f"{n_bytes / frames:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del protocolo serial")
+    parser.add_argument("--frames", type=int, default=200000)
+    parser.add_argument("--chunk", type=int, default=4096, help="bytes por lectura simulada")
+    args = parser.parse_args()
+
+    js = make_stream(args.frames, binary=False)
+    bn = make_stream(args.frames, binary=True)
+
+    print(f"{'modo':<28} {'tramas':>9} {'tramas/s':>14} {'CPU µs/tr':>12} {'bytes/tr':>10}")
+    run("json readline (original)", lambda: bench_readline(js), len(js))
+    run("json FrameDecoder", lambda: bench_decoder(js, "json", args.chunk), len(js))
+    run("bin FrameDecoder", lambda: bench_decoder(bn, "bin", args.chunk), len(bn))
+    run("bin FrameDecoder (auto)", lambda: bench_decoder(bn, "auto", args.chunk), len(bn))
+
+
+if __name__ == "__main__":
+    main()
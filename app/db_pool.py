@@ -0,0 +1,213 @@
+# db_pool.py
+# Pool de conexiones MySQL compartido por la aplicación de escritorio.
+# Evita abrir/autenticar/cerrar una conexión TCP por cada INSERT/UPDATE.
+
+import threading
+import time
+from contextlib import contextmanager
+
+
+class PoolTimeout(Exception):
+    """No hubo conexión libre dentro del tiempo de espera configurado."""
+
+
+class ConnectionPool:
+    """Pool acotado de conexiones con health-check, expulsión por inactividad
+    y reconexión ante fallos.
+
+    `connect_fn` crea una conexión nueva (p.ej. ``mysql.connector.connect``).
+    `connection_errors` son las excepciones que indican conexión rota; ante
+    ellas la conexión se descarta en lugar de volver al pool.
+    """
+
+    def __init__(self, connect_fn, max_size=5, idle_timeout=300.0,
+                 health_check_interval=30.0, checkout_timeout=10.0,
+                 connection_errors=()):
+        self._connect_fn = connect_fn
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.checkout_timeout = checkout_timeout
+        self.connection_errors = tuple(connection_errors)
+
+        self._cond = threading.Condition()
+        # Conexiones libres: lista de (conn, ultimo_uso); LIFO para reusar las "calientes"
+        self._idle = []
+        self._in_use = 0
+        self._closed = False
+
+        # Estadísticas
+        self._checkouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._created = 0
+        self._reconnects = 0
+        self._evicted = 0
+        self._timeouts = 0
+
+    # ----------- CHECKOUT / CHECKIN ------------
+    def acquire(self):
+        """Obtiene una conexión sana del pool (bloquea hasta `checkout_timeout`)."""
+        start = time.monotonic()
+        deadline = start + self.checkout_timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolTimeout("Pool cerrado")
+                self._evict_idle_locked()
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    self._in_use += 1
+                    break
+                if self._in_use < self.max_size:
+                    conn, last_used = None, None
+                    self._in_use += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout(f"Sin conexiones libres tras {self.checkout_timeout}s")
+                self._cond.wait(remaining)
+
+        # Conectar / verificar fuera del lock para no serializar el pool
+        try:
+            if conn is None:
+                conn = self._new_connection()
+            elif time.monotonic() - last_used > self.health_check_interval:
+                conn = self._ensure_healthy(conn)
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+        waited = time.monotonic() - start
+        with self._cond:
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        return conn
+
+    def release(self, conn, discard=False):
+        """Devuelve la conexión al pool; con `discard=True` se cierra y se descarta."""
+        with self._cond:
+            self._in_use -= 1
+            if discard or self._closed:
+                self._close_quietly(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Context manager: ``with pool.connection() as conn: ...``.
+
+        Si el bloque lanza un error de conexión, ésta se descarta.
+        """
+        conn = self.acquire()
+        broken = False
+        try:
+            yield conn
+        except self.connection_errors:
+            broken = True
+            raise
+        except Exception:
+            # Error de SQL: deshacer la transacción antes de devolver la conexión
+            try:
+                conn.rollback()
+            except Exception:
+                broken = True
+            raise
+        finally:
+            self.release(conn, discard=broken)
+
+    def execute(self, sql, params=(), many=False, fetch=None):
+        """Ejecuta una sentencia con commit; reintenta una vez con conexión nueva
+        si la conexión estaba rota. `fetch` puede ser None, 'one' o 'all'.
+        """
+        for attempt in (1, 2):
+            try:
+                with self.connection() as conn:
+                    cur = conn.cursor()
+                    try:
+                        if many:
+                            cur.executemany(sql, params)
+                        else:
+                            cur.execute(sql, params)
+                        result = None
+                        if fetch == "one":
+                            result = cur.fetchone()
+                        elif fetch == "all":
+                            result = cur.fetchall()
+                        conn.commit()
+                        return result
+                    finally:
+                        cur.close()
+            except self.connection_errors:
+                if attempt == 2:
+                    raise
+                with self._cond:
+                    self._reconnects += 1
+
+    # ----------- MANTENIMIENTO ------------
+    def _new_connection(self):
+        conn = self._connect_fn()
+        with self._cond:
+            self._created += 1
+        return conn
+
+    def _ensure_healthy(self, conn):
+        """Hace ping a una conexión que llevaba tiempo ociosa; si falla, reconecta."""
+        try:
+            conn.ping(reconnect=False)
+            return conn
+        except Exception:
+            self._close_quietly(conn)
+            with self._cond:
+                self._reconnects += 1
+            return self._new_connection()
+
+    def _evict_idle_locked(self):
+        if not self._idle or self.idle_timeout is None:
+            return
+        now = time.monotonic()
+        keep = []
+        for conn, last_used in self._idle:
+            if now - last_used > self.idle_timeout:
+                self._close_quietly(conn)
+                self._evicted += 1
+            else:
+                keep.append((conn, last_used))
+        self._idle = keep
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def close_all(self):
+        """Cierra las conexiones libres y rechaza nuevos checkouts."""
+        with self._cond:
+            self._closed = True
+            for conn, _ in self._idle:
+                self._close_quietly(conn)
+            self._idle = []
+            self._cond.notify_all()
+
+    def stats(self):
+        """Devuelve un dict con checkouts, tiempos de espera, reconexiones, etc."""
+        with self._cond:
+            return {
+                "checkouts": self._checkouts,
+                "wait_avg_ms": (self._wait_total / self._checkouts * 1000.0) if self._checkouts else 0.0,
+                "wait_max_ms": self._wait_max * 1000.0,
+                "reconnects": self._reconnects,
+                "created": self._created,
+                "evicted": self._evicted,
+                "timeouts": self._timeouts,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "max_size": self.max_size,
+            }
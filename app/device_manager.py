@@ -0,0 +1,164 @@
+# device_manager.py
+# Lectura simultánea de varios ESP32: detecta los puertos USB, abre cada uno y
+# lanza un SerialReader (hilo propio) por dispositivo. Todas las tramas llegan al
+# mismo callback etiquetadas con su dispositivo, de modo que comparten la cola
+# de escritura y la política de eventos de la aplicación.
+
+import threading
+
+from serial_protocol import FrameDecoder, negotiation_command
+from serial_reader import SerialReader
+
+# VID USB de los puentes serie habituales en placas ESP32
+ESP32_USB_VIDS = {
+    0x10C4: "CP210x",
+    0x1A86: "CH340",
+    0x0403: "FTDI",
+    0x303A: "Espressif (USB nativo)",
+}
+
+
+def discover_ports(vids=ESP32_USB_VIDS):
+    """Puertos serie cuyo VID USB corresponde a un ESP32, ordenados por nombre."""
+    from serial.tools import list_ports
+    return sorted(p.device for p in list_ports.comports() if p.vid in vids)
+
+
+def parse_ports(spec: str):
+    """"auto" -> None (detección); "COM3,COM4" -> ["COM3", "COM4"]."""
+    spec = (spec or "").strip()
+    if spec.lower() == "auto":
+        return None
+    return [p.strip() for p in spec.split(",") if p.strip()]
+
+
+class Device:
+    """Un equipo conectado: puerto abierto, hilo lector y estado de la aplicación (`state`)."""
+
+    def __init__(self, port, ser, state=None):
+        self.port = port
+        self.id = port   # etiqueta que va a la columna 'dispositivo'
+        self.ser = ser
+        self.state = state
+        self.reader = None
+
+    def write(self, data: bytes):
+        self.ser.write(data)
+
+
+class DeviceManager:
+    """Abre y vigila N puertos, cada uno con su propio hilo lector.
+
+    Un hilo por puerto: la lectura bloqueante libera el GIL, así que un equipo
+    lento o desconectado no frena a los demás y el caudal de cada dispositivo no
+    depende de cuántos haya. `on_frames(device, frames)` se llama desde el hilo
+    lector del dispositivo; `make_state(port)` crea el estado por dispositivo.
+    """
+
+    def __init__(self, on_frames, baud_rate=115200, protocol="auto", buffer_size=65536,
+                 make_state=None, open_serial=None):
+        self.on_frames = on_frames
+        self.protocol = protocol
+        self.buffer_size = buffer_size
+        self.make_state = make_state
+        self.baud_rate = baud_rate
+        self._open_serial = open_serial or self._open_pyserial
+        self._lock = threading.Lock()
+        self._devices = {}   # puerto -> Device
+        self._errors = {}    # puerto -> último error al abrirlo o al leerlo
+
+    def _open_pyserial(self, port):
+        import serial  # pyserial se importa al abrir el primer puerto, no al arrancar
+        return serial.Serial(port, self.baud_rate, timeout=1)
+
+    @property
+    def errors(self):
+        """Copia de {puerto: último error al abrirlo o leerlo}; rescan() la modifica desde otro hilo."""
+        with self._lock:
+            return dict(self._errors)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._devices)
+
+    def devices(self):
+        with self._lock:
+            return [self._devices[p] for p in sorted(self._devices)]
+
+    def get(self, port):
+        with self._lock:
+            return self._devices.get(port)
+
+    def open(self, port):
+        """Abre `port`, negocia el protocolo y arranca su lector. None si no se pudo abrir."""
+        existing = self.get(port)
+        if existing is not None:
+            return existing
+        try:
+            ser = self._open_serial(port)
+        except Exception as e:
+            with self._lock:
+                self._errors[port] = str(e)
+            return None
+        with self._lock:
+            self._errors.pop(port, None)
+        dev = Device(port, ser, self.make_state(port) if self.make_state else None)
+        try:
+            if self.protocol != "json":
+                ser.write(negotiation_command(self.protocol))
+        except Exception:
+            pass
+        dev.reader = SerialReader(ser, FrameDecoder(self.protocol),
+                                  lambda frames: self.on_frames(dev, frames),
+                                  buffer_size=self.buffer_size, name=f"serial-{port}")
+        with self._lock:
+            self._devices[port] = dev
+        dev.reader.start()
+        return dev
+
+    def close(self, port):
+        with self._lock:
+            dev = self._devices.pop(port, None)
+        if dev is None:
+            return None
+        dev.reader.stop()
+        try:
+            dev.ser.close()
+        except Exception:
+            pass
+        return dev
+
+    def close_all(self):
+        for dev in self.devices():
+            self.close(dev.port)
+
+    def rescan(self, wanted=None):
+        """Sincroniza los puertos abiertos con `wanted` (None: los ESP32 detectados).
+
+        Abre los nuevos (o los que fallaron antes) y cierra los que ya no están.
+        Un puerto cuyo lector no puede leer (equipo desenchufado aunque el puerto
+        siga en `wanted`) se cierra y se intenta abrir de nuevo. Devuelve
+        (abiertos, cerrados) como listas de Device.
+        """
+        if wanted is None:
+            try:
+                wanted = discover_ports()
+            except Exception:
+                return [], []
+        with self._lock:
+            current = set(self._devices)
+            failed = {p: dev.reader.last_error for p, dev in self._devices.items()
+                      if dev.reader.failed}
+        removed = [dev for dev in (self.close(p) for p in sorted(set(failed) | (current - set(wanted))))
+                   if dev]
+        with self._lock:
+            for port, error in failed.items():
+                if port in wanted:
+                    self._errors[port] = error
+        current -= set(failed)
+        added = [dev for dev in (self.open(p) for p in wanted if p not in current) if dev]
+        return added, removed
+
+    def stats(self):
+        """Métricas de SerialReader por puerto."""
+        return {dev.port: dev.reader.stats() for dev in self.devices()}
@@ -0,0 +1,102 @@
+# distance_plot.py
+# Gráfico en tiempo real de la distancia del HC-SR05 dibujado con QPainter.
+# Se alimenta de distance_series.DistanceHistory y sólo se recalcula cuando la
+# GUI lo pide en su fotograma (render_tick), nunca por cada trama serial.
+
+import time
+
+from PyQt5.QtCore import Qt, QPointF
+from PyQt5.QtGui import QPainter, QPen, QColor, QPolygonF
+from PyQt5.QtWidgets import QWidget
+
+# Ventanas seleccionables: (etiqueta, segundos)
+PLOT_WINDOWS = [
+    ("10 s", 10),
+    ("1 min", 60),
+    ("10 min", 600),
+    ("1 h", 3600),
+    ("6 h", 6 * 3600),
+    ("24 h", 24 * 3600),
+]
+
+
+class DistancePlot(QWidget):
+    """Serie temporal min/max decimada al ancho del widget."""
+
+    MARGIN = 36
+
+    def __init__(self, history, parent=None):
+        super().__init__(parent)
+        self.history = history
+        self.span = PLOT_WINDOWS[0][1]
+        self._drawn_version = -1
+        self._points = QPolygonF()
+        self._ylim = (0.0, 1.0)
+        self.setMinimumHeight(160)
+
+    def set_span(self, seconds):
+        self.span = seconds
+        self._drawn_version = -1
+        self.refresh()
+
+    def set_history(self, history):
+        """Cambia la serie que se dibuja (otro dispositivo)."""
+        self.history = history
+        self.refresh(force=True)
+
+    def refresh(self, force=False):
+        """Recalcula la polilínea si hubo muestras nuevas (llamar desde el fotograma de la GUI)."""
+        if not force and self.history.version == self._drawn_version:
+            return
+        self._drawn_version = self.history.version
+        width = max(1, self.width() - 2 * self.MARGIN)
+        t_end = time.time()
+        x, ymin, ymax = self.history.decimate(t_end, self.span, width)
+        if len(x):
+            lo, hi = float(ymin.min()), float(ymax.max())
+            if hi - lo < 1.0:
+                lo, hi = lo - 0.5, hi + 0.5
+            self._ylim = (lo, hi)
+        self._build_polygon(t_end - self.span, x, ymin, ymax)
+        self.update()
+
+    def _build_polygon(self, t0, x, ymin, ymax):
+        # Cada bin aporta dos vértices (min y max): coste proporcional al ancho en píxeles
+        m = self.MARGIN
+        w = max(1, self.width() - 2 * m)
+        h = max(1, self.height() - 2 * m)
+        lo, hi = self._ylim
+        sx = w / self.span
+        sy = h / (hi - lo)
+        base_y = m + h
+        poly = QPolygonF()
+        for xi, a, b in zip(((x - t0) * sx + m).tolist(),
+                            (base_y - (ymin - lo) * sy).tolist(),
+                            (base_y - (ymax - lo) * sy).tolist()):
+            poly.append(QPointF(xi, a))
+            if a != b:
+                poly.append(QPointF(xi, b))
+        self._points = poly
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.refresh(force=True)
+
+    def paintEvent(self, event):
+        p = QPainter(self)
+        p.fillRect(self.rect(), QColor("#101317"))
+        m = self.MARGIN
+        w = self.width() - 2 * m
+        h = self.height() - 2 * m
+        p.setPen(QPen(QColor("#3a3f47"), 1))
+        p.drawRect(m, m, w, h)
+        lo, hi = self._ylim
+        p.setPen(QColor("#bbb"))
+        p.drawText(4, m + 10, f"{hi:.0f}")
+        p.drawText(4, m + h, f"{lo:.0f}")
+        p.drawText(m, self.height() - 8, "cm")
+        if self._points.count():
+            p.setRenderHint(QPainter.Antialiasing, False)
+            p.setPen(QPen(QColor("cyan"), 1.5))
+            p.drawPolyline(self._points)
+        p.end()
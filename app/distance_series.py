@@ -0,0 +1,104 @@
+# distance_series.py
+# Historial de distancias en búferes NumPy de tamaño fijo con decimación min/max.
+# El coste de preparar un gráfico depende del ancho en píxeles, no del número
+# de muestras: las ventanas largas usan un nivel agregado por segundo.
+
+import threading
+
+import numpy as np
+
+
+class RingSeries:
+    """Anillo NumPy de tamaño fijo con columnas float64.
+
+    Cada valor se escribe dos veces (posición i e i + capacity) para que la
+    ventana válida sea siempre una vista contigua, sin copias ni concatenaciones.
+    """
+
+    def __init__(self, capacity, columns=2):
+        self.capacity = capacity
+        self._data = np.empty((columns, 2 * capacity), dtype=np.float64)
+        self._next = 0
+        self.count = 0
+
+    def append(self, *values):
+        i = self._next
+        self._data[:, i] = values
+        self._data[:, i + self.capacity] = values
+        self._next = (i + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def view(self):
+        """Vistas contiguas (una por columna) en orden cronológico."""
+        start = (self._next - self.count) % self.capacity
+        return self._data[:, start:start + self.count]
+
+
+def minmax_decimate(t, vmin, vmax, t0, t1, bins):
+    """Reduce las muestras de [t0, t1] a como mucho `bins` pares (min, max).
+
+    `t` debe estar ordenado. Devuelve (x, ymin, ymax) con x = centro del bin;
+    los bins sin muestras se omiten.
+    """
+    lo = np.searchsorted(t, t0, side="left")
+    hi = np.searchsorted(t, t1, side="right")
+    if hi <= lo or bins <= 0:
+        empty = np.empty(0)
+        return empty, empty, empty
+    t, vmin, vmax = t[lo:hi], vmin[lo:hi], vmax[lo:hi]
+    edges = np.linspace(t0, t1, bins + 1)
+    starts = np.searchsorted(t, edges[:-1], side="left")
+    ends = np.searchsorted(t, edges[1:], side="left")
+    ends[-1] = len(t)
+    nonempty = ends > starts
+    starts = starts[nonempty]
+    x = (edges[:-1][nonempty] + edges[1:][nonempty]) * 0.5
+    return x, np.minimum.reduceat(vmin, starts), np.maximum.reduceat(vmax, starts)
+
+
+class DistanceHistory:
+    """Historial de dos niveles: muestras crudas recientes + agregado min/max por segundo.
+
+    `add` se llama desde el hilo lector y `decimate` desde la GUI; ambos con lock.
+    """
+
+    def __init__(self, raw_capacity=200_000, agg_seconds=24 * 3600):
+        self._lock = threading.Lock()
+        self._raw = RingSeries(raw_capacity, columns=2)        # t, v
+        self._agg = RingSeries(agg_seconds, columns=3)         # t, min, max
+        self._bucket = None
+        self._bmin = self._bmax = 0.0
+        self.version = 0
+
+    def add(self, t, value):
+        value = float(value)
+        with self._lock:
+            self._raw.append(t, value)
+            bucket = int(t)
+            if bucket != self._bucket:
+                if self._bucket is not None:
+                    self._agg.append(self._bucket + 0.5, self._bmin, self._bmax)
+                self._bucket, self._bmin, self._bmax = bucket, value, value
+            else:
+                self._bmin = min(self._bmin, value)
+                self._bmax = max(self._bmax, value)
+            self.version += 1
+
+    def decimate(self, t_end, span, bins):
+        """Pares min/max para la ventana (t_end - span, t_end]; elige el nivel adecuado."""
+        t0 = t_end - span
+        with self._lock:
+            raw = self._raw.view()
+            complete = self._raw.count < self._raw.capacity
+            if raw.shape[1] and (complete or raw[0, 0] <= t0):
+                # Las muestras crudas cubren toda la ventana
+                return minmax_decimate(raw[0], raw[1], raw[1], t0, t_end, bins)
+            agg = self._agg.view()
+            x, ymin, ymax = minmax_decimate(agg[0], agg[1], agg[2], t0, t_end, bins)
+            # El segundo en curso (todavía no agregado) sale de las muestras crudas
+            if self._bucket is not None and raw.shape[1]:
+                xr, rmin, rmax = minmax_decimate(raw[0], raw[1], raw[1],
+                                                 max(t0, float(self._bucket)), t_end, 1)
+                x, ymin, ymax = (np.concatenate((x, xr)), np.concatenate((ymin, rmin)),
+                                 np.concatenate((ymax, rmax)))
+            return x, ymin, ymax
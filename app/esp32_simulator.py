@@ -0,0 +1,363 @@
+# esp32_simulator.py
+# ESP32 virtual para pruebas de carga sin hardware: abre un pseudo-terminal (pty)
+# y emite las mismas tramas que el firmware (JSON o binarias, ver serial_protocol.py)
+# a la tasa pedida, con ruido y jitter. También graba sesiones reales a un archivo
+# de captura con marcas de tiempo y las reproduce a N× velocidad.
+#
+# Uso (Linux/macOS):
+#   python esp32_simulator.py simulate --rate 1000 --noise 0.5 --jitter 0.2
+#   python esp32_simulator.py simulate --devices 4 --link /tmp/ttyESP32
+#   python esp32_simulator.py record --port /dev/ttyUSB0 --out sesion.cap
+#   python esp32_simulator.py replay sesion.cap --speed 10 --loop
+# y después:  python app_pyqt_hcsr05.py --port /dev/pts/5   (ruta que imprime el simulador)
+
+import argparse
+import base64
+import bisect
+import itertools
+import json
+import math
+import os
+import random
+import select
+import sys
+import threading
+import time
+from datetime import datetime
+
+from serial_protocol import encode_frame, encode_json_frame, NUM_CANALES
+
+# Máximo de bytes por write() al pty (el lado esclavo tiene un búfer limitado)
+WRITE_CHUNK = 4096
+# Cabecera de los archivos de captura (primera línea)
+CAPTURE_FORMAT = "hcsr05-captura/1"
+
+
+# ---------------- PSEUDO-TERMINAL ----------------
+class VirtualPort:
+    """pty en modo raw; la app abre `path` como si fuera el puerto del ESP32."""
+
+    def __init__(self, link=None):
+        import pty
+        import tty
+        self.master, self.slave = pty.openpty()
+        tty.setraw(self.slave)  # sin eco ni traducción de fin de línea
+        self.path = os.ttyname(self.slave)
+        self.link = link
+        if link:
+            try:
+                os.unlink(link)
+            except FileNotFoundError:
+                pass
+            os.symlink(self.path, link)
+        self.dropped = 0   # tramas descartadas porque la app no leía
+        self._closed = threading.Event()
+
+    def write(self, data, stop=None):
+        """Escribe todo `data`, esperando a que la app lea si el búfer del pty está
+        lleno (como un UART con control de flujo). Para antes sólo con `stop` o close()."""
+        view = memoryview(data)
+        while view and not self._closed.is_set() and not (stop and stop.is_set()):
+            _, ready, _ = select.select([], [self.master], [], 0.1)
+            if ready:
+                view = view[os.write(self.master, view[:WRITE_CHUNK]):]
+        return not view
+
+    def write_frames(self, frames, stop=None):
+        """Escribe tramas completas en una sola pasada. Si la app deja de leer, las
+        que aún no se empezaron se descartan enteras (se cuentan en `dropped`);
+        una trama empezada se termina siempre, para no cortar el framing."""
+        data = memoryview(b"".join(frames))
+        ends = list(itertools.accumulate(len(f) for f in frames))
+        pos = 0
+        while pos < len(data) and not self._closed.is_set() and not (stop and stop.is_set()):
+            _, ready, _ = select.select([], [self.master], [], 0.1)
+            if ready:
+                pos += os.write(self.master, data[pos:pos + WRITE_CHUNK])
+                continue
+            done = bisect.bisect_right(ends, pos)
+            if pos == 0 or ends[done - 1] == pos:
+                self.dropped += len(frames) - done
+                return done
+        return len(frames)
+
+    def read(self, timeout=0.0):
+        """Bytes enviados por la app (comandos), o b"" si no hay."""
+        ready, _, _ = select.select([self.master], [], [], timeout)
+        if not ready:
+            return b""
+        try:
+            return os.read(self.master, 4096)
+        except OSError:
+            return b""
+
+    def close(self):
+        self._closed.set()
+        for fd in (self.master, self.slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        if self.link:
+            try:
+                os.unlink(self.link)
+            except OSError:
+                pass
+
+
+# ---------------- SIMULADOR ----------------
+class SimulatedESP32:
+    """Genera tramas como el firmware: sensor + pulsadores en cada muestra y los
+    LEDs cuando cambian. Atiende {"proto": ...} y {"led": i, "state": b} de la app.
+
+    - distancia: senoide entre `dist_min` y `dist_max` con periodo `period` s
+      más ruido gaussiano (`noise`, cm de desviación típica)
+    - jitter: variación aleatoria del intervalo entre muestras (fracción del periodo)
+    - presses: pulsaciones por segundo de media; cada una conmuta su LED
+    """
+
+    def __init__(self, port, rate=10.0, noise=0.5, jitter=0.0, proto="json",
+                 dist_min=5.0, dist_max=150.0, period=10.0, presses=0.2,
+                 seed=None):
+        self.port = port
+        self.rate = rate
+        self.noise = noise
+        self.jitter = jitter
+        self.binary = proto == "bin"
+        self.dist_min = dist_min
+        self.dist_max = dist_max
+        self.period = period
+        self.presses = presses
+        self.rnd = random.Random(seed)
+        self.pulsadores = [False] * NUM_CANALES
+        self.leds = [False] * NUM_CANALES
+        self._leds_sent = None
+        self._release_at = [0.0] * NUM_CANALES
+        self._cmd = bytearray()
+        self._stop = threading.Event()
+        self.seq = 0
+        self.frames = 0
+
+    def stop(self):
+        self._stop.set()
+
+    def distance(self, t):
+        mid = (self.dist_min + self.dist_max) / 2
+        amplitude = (self.dist_max - self.dist_min) / 2
+        d = mid + amplitude * math.sin(2 * math.pi * t / self.period)
+        d += self.rnd.gauss(0.0, self.noise) if self.noise else 0.0
+        return round(max(2.0, min(400.0, d)), 1)
+
+    def _commands(self):
+        data = self.port.read()
+        if not data:
+            return
+        self._cmd += data
+        while b"\n" in self._cmd:
+            line, _, rest = self._cmd.partition(b"\n")
+            self._cmd = bytearray(rest)
+            try:
+                cmd = json.loads(line)
+            except ValueError:
+                continue
+            if "proto" in cmd:
+                self.binary = cmd["proto"] == "bin"
+                self._leds_sent = None
+            elif "led" in cmd:
+                i = int(cmd["led"]) - 1
+                if 0 <= i < NUM_CANALES:
+                    self.leds[i] = bool(cmd.get("state"))
+
+    def _buttons(self, t, dt):
+        extra = []
+        for i in range(NUM_CANALES):
+            if self.pulsadores[i] and t >= self._release_at[i]:
+                self.pulsadores[i] = False
+            elif not self.pulsadores[i] and self.rnd.random() < self.presses * dt / NUM_CANALES:
+                self.pulsadores[i] = True
+                self._release_at[i] = t + 0.15
+                self.leds[i] = not self.leds[i]
+                if not self.binary:
+                    extra.append((json.dumps({"led": i + 1, "state": self.leds[i]}) + "\n").encode())
+        return extra
+
+    def frame(self, t, dt):
+        """Bytes de una muestra (más las tramas 'led' de las pulsaciones en modo JSON)."""
+        parts = self._buttons(t, dt)
+        leds = tuple(self.leds)
+        send_leds = leds != self._leds_sent
+        self._leds_sent = leds
+        dist = self.distance(t)
+        if self.binary:
+            parts.append(encode_frame(self.seq, dist, self.pulsadores, leds if send_leds else None))
+        else:
+            parts.append(encode_json_frame(dist, self.pulsadores, leds if send_leds else None))
+        self.seq += 1
+        self.frames += 1
+        return b"".join(parts)
+
+    def run(self, duration=None):
+        """Emite muestras hasta `stop()` o `duration` s. A tasas altas se agrupan
+        las muestras vencidas en una sola escritura (como un enlace rápido)."""
+        interval = 1.0 / self.rate
+        start = time.monotonic()
+        next_t = start
+        while not self._stop.is_set():
+            now = time.monotonic()
+            if duration is not None and now - start >= duration:
+                break
+            self._commands()
+            batch = []
+            while next_t <= now:
+                dt = interval * (1.0 + self.rnd.uniform(-self.jitter, self.jitter))
+                batch.append(self.frame(next_t - start, dt))
+                next_t += dt
+            if batch:
+                self.port.write_frames(batch, self._stop)
+            wait = next_t - time.monotonic()
+            if wait > 0:
+                self._stop.wait(min(wait, 0.05))
+
+
+# ---------------- CAPTURA / REPRODUCCIÓN ----------------
+def record(port, out, baud=115200, duration=None):
+    """Guarda lo que llega por `port` en `out`: una línea JSON por lectura
+    {"t": segundos desde el inicio, "b": bytes en base64}."""
+    import serial
+    ser = serial.Serial(port, baud, timeout=0.2)
+    start = time.monotonic()
+    total = 0
+    with open(out, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"format": CAPTURE_FORMAT, "port": port, "baud": baud,
+                            "start": datetime.now().isoformat()}) + "\n")
+        try:
+            while duration is None or time.monotonic() - start < duration:
+                data = ser.read(max(1, ser.in_waiting))
+                if not data:
+                    continue
+                t = time.monotonic() - start
+                f.write(json.dumps({"t": round(t, 6), "b": base64.b64encode(data).decode()}) + "\n")
+                total += len(data)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            ser.close()
+    return total
+
+
+def load_capture(path):
+    """Devuelve (cabecera, [(t, bytes), ...])."""
+    with open(path, encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        if header.get("format") != CAPTURE_FORMAT:
+            raise ValueError(f"{path}: no es una captura {CAPTURE_FORMAT}")
+        chunks = [(r["t"], base64.b64decode(r["b"])) for r in map(json.loads, f) if r]
+    return header, chunks
+
+
+def replay(port, chunks, speed=1.0, loop=False, stop=None):
+    """Escribe los bloques en `port` respetando sus tiempos divididos por `speed`."""
+    stop = stop or threading.Event()
+    sent = 0
+    while not stop.is_set():
+        start = time.monotonic()
+        for t, data in chunks:
+            wait = start + t / speed - time.monotonic()
+            if wait > 0 and stop.wait(wait):
+                return sent
+            if not port.write(data, stop):
+                return sent
+            sent += len(data)
+        if not loop:
+            break
+    return sent
+
+
+# ---------------- CLI ----------------
+def _open_ports(n, link_path):
+    ports = []
+    for i in range(n):
+        link = link_path if n == 1 else (f"{link_path}{i}" if link_path else None)
+        ports.append(VirtualPort(link))
+    for p in ports:
+        print(f"ESP32 virtual en {p.path}" + (f" (enlace {p.link})" if p.link else ""), flush=True)
+    return ports
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ESP32 virtual y captura/reproducción serial")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    sim = sub.add_parser("simulate", help="Emitir tramas sintéticas por un pty")
+    sim.add_argument("--rate", type=float, default=10.0, help="muestras/s por dispositivo")
+    sim.add_argument("--noise", type=float, default=0.5, help="desviación típica del ruido (cm)")
+    sim.add_argument("--jitter", type=float, default=0.0, help="variación del intervalo (0..1)")
+    sim.add_argument("--proto", choices=("json", "bin"), default="json",
+                     help="formato inicial (la app puede pedir otro con {\"proto\": ...})")
+    sim.add_argument("--presses", type=float, default=0.2, help="pulsaciones/s de media")
+    sim.add_argument("--devices", type=int, default=1, help="número de ESP32 virtuales")
+    sim.add_argument("--duration", type=float, help="segundos (por defecto, hasta Ctrl+C)")
+    sim.add_argument("--link", help="crear un enlace simbólico a la ruta del pty")
+    sim.add_argument("--seed", type=int)
+
+    rec = sub.add_parser("record", help="Guardar lo que emite un puerto real")
+    rec.add_argument("--port", required=True)
+    rec.add_argument("--baud", type=int, default=int(os.environ.get("HCSR05_BAUD", "115200")))
+    rec.add_argument("--out", required=True, help="archivo de captura")
+    rec.add_argument("--duration", type=float)
+
+    rep = sub.add_parser("replay", help="Reproducir una captura por un pty")
+    rep.add_argument("capture")
+    rep.add_argument("--speed", type=float, default=1.0, help="factor N× de velocidad")
+    rep.add_argument("--loop", action="store_true")
+    rep.add_argument("--link")
+
+    args = parser.parse_args(argv)
+
+    if args.cmd == "record":
+        total = record(args.port, args.out, args.baud, args.duration)
+        print(f"{total} bytes guardados en {args.out}")
+        return
+
+    if args.cmd == "replay":
+        header, chunks = load_capture(args.capture)
+        port = _open_ports(1, args.link)[0]
+        print(f"Reproduciendo {len(chunks)} bloques de {header.get('port')} a {args.speed:g}×")
+        try:
+            sent = replay(port, chunks, args.speed, args.loop)
+            print(f"{sent} bytes enviados")
+        except KeyboardInterrupt:
+            pass
+        finally:
+            port.close()
+        return
+
+    ports = _open_ports(args.devices, args.link)
+    sims = [SimulatedESP32(p, rate=args.rate, noise=args.noise, jitter=args.jitter,
+                           proto=args.proto, presses=args.presses,
+                           seed=None if args.seed is None else args.seed + i)
+            for i, p in enumerate(ports)]
+    threads = [threading.Thread(target=s.run, args=(args.duration,), daemon=True) for s in sims]
+    for t in threads:
+        t.start()
+    start = time.monotonic()
+    try:
+        while any(t.is_alive() for t in threads):
+            time.sleep(1.0)
+            dt = time.monotonic() - start
+            print(" | ".join(f"{p.path}: {s.frames / dt:.0f} tramas/s"
+                             + (f" ({p.dropped} tramas descartadas)" if p.dropped else "")
+                             for p, s in zip(ports, sims)), flush=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for s in sims:
+            s.stop()
+        for t in threads:
+            t.join(1.0)
+        for p in ports:
+            p.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+# event_policy.py
+# Motor de políticas para la tabla 'eventos': limita la frecuencia por acción,
+# agrupa eventos repetidos en una sola fila con contador y decide cuándo una
+# lectura del sensor merece un evento (banda muerta / cruce de umbral con histéresis).
+
+import threading
+import time
+
+# Regla por defecto: eventos idénticos dentro de la ventana se agrupan
+DEFAULT_RULE = {"min_interval": 2.0, "por": "detalles"}
+
+
+class EventPolicy:
+    """Decide qué eventos se escriben y cuáles se acumulan.
+
+    Reglas por acción: {"min_interval": segundos, "por": "accion" | "detalles"}.
+      - por "detalles": sólo se agrupan eventos idénticos (misma acción y detalles).
+      - por "accion": cualquier evento de esa acción cuenta para el límite; la fila
+        resumen conserva los detalles del último.
+    El primer evento de cada clave se emite enseguida; los que llegan antes de
+    `min_interval` se acumulan y salen como una fila "... (xN)" al vencer el plazo.
+
+    Con varios equipos, `dispositivo` forma parte de la clave: cada uno se limita
+    y agrupa por separado. Todos los métodos devuelven listas de filas
+    (usuario, accion, detalles, dispositivo) a escribir.
+
+    Un umbral cruzado no vuelve a dispararse en sentido contrario hasta que la
+    lectura sale de la banda [umbral - sensor_hysteresis, umbral + sensor_hysteresis].
+    """
+
+    def __init__(self, rules=None, default_rule=None, sensor_deadband=5.0,
+                 sensor_thresholds=(), sensor_hysteresis=1.0, clock=time.monotonic):
+        self.rules = dict(rules or {})
+        self.default_rule = dict(default_rule or DEFAULT_RULE)
+        self.sensor_deadband = sensor_deadband
+        self.sensor_thresholds = sorted(sensor_thresholds)
+        self.sensor_hysteresis = sensor_hysteresis
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._last_emit = {}     # clave -> instante de la última fila emitida
+        self._pending = {}       # clave -> [usuario, accion, ultimos_detalles, contador, dispositivo]
+        self._last_sensor = {}   # (usuario, dispositivo) -> último valor reportado
+        self._below = {}         # (usuario, dispositivo, umbral) -> lado actual (True = por debajo)
+        # Estadísticas
+        self.submitted = 0
+        self.emitted = 0
+        self.suppressed = 0
+
+    def _rule(self, accion):
+        return self.rules.get(accion, self.default_rule)
+
+    def submit(self, usuario, accion, detalles=None, dispositivo=None):
+        """Registra un evento; devuelve las filas que deben escribirse ahora."""
+        now = self._clock()
+        rule = self._rule(accion)
+        interval = rule.get("min_interval", 0) or 0
+        with self._lock:
+            self.submitted += 1
+            rows = self._collect_due_locked(now)
+            if interval <= 0:
+                rows.append((usuario, accion, detalles, dispositivo))
+                self.emitted += 1
+                return rows
+            key = ((usuario, dispositivo, accion) if rule.get("por") == "accion"
+                   else (usuario, dispositivo, accion, detalles))
+            last = self._last_emit.get(key)
+            if last is None or now - last >= interval:
+                pend = self._pending.pop(key, None)
+                if pend is not None:
+                    rows.append(self._summary(pend))
+                rows.append((usuario, accion, detalles, dispositivo))
+                self._last_emit[key] = now
+                self.emitted += 1
+            else:
+                pend = self._pending.get(key)
+                if pend is None:
+                    self._pending[key] = [usuario, accion, detalles, 1, dispositivo]
+                else:
+                    pend[2] = detalles
+                    pend[3] += 1
+                self.suppressed += 1
+            return rows
+
+    def sensor(self, usuario, value, tipo="HC-SR05", dispositivo=None):
+        """Eventos derivados de una lectura: cruce de umbral y/o lectura fuera de la banda muerta."""
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return []
+        h = self.sensor_hysteresis
+        with self._lock:
+            prev = self._last_sensor.get((usuario, dispositivo))
+            crossings = []
+            for th in self.sensor_thresholds:
+                side = (usuario, dispositivo, th)
+                below = self._below.get(side)
+                if below is None:
+                    self._below[side] = value < th
+                elif below and value >= th + h or not below and value < th - h:
+                    self._below[side] = not below
+                    crossings.append(f"{tipo} cruzó {th:g} cm {'↑' if below else '↓'} (HW)")
+            report = prev is None or abs(value - prev) >= self.sensor_deadband or crossings
+            if report:
+                self._last_sensor[(usuario, dispositivo)] = value
+        rows = []
+        for det in crossings:
+            rows.extend(self.submit(usuario, "sensor_umbral", det, dispositivo))
+        if report:
+            rows.extend(self.submit(usuario, "sensor_read", f"{tipo}={value} cm (HW)", dispositivo))
+        return rows
+
+    def flush_due(self):
+        """Filas resumen cuyo plazo ya venció (llamar periódicamente)."""
+        with self._lock:
+            return self._collect_due_locked(self._clock())
+
+    def flush_all(self):
+        """Emite todo lo acumulado (logout / cierre)."""
+        with self._lock:
+            rows = [self._summary(p) for p in self._pending.values()]
+            self._pending.clear()
+            return rows
+
+    def _collect_due_locked(self, now):
+        rows = []
+        for key in list(self._pending):
+            pend = self._pending[key]
+            rule = self._rule(pend[1])
+            if now - self._last_emit.get(key, 0) >= rule.get("min_interval", 0):
+                rows.append(self._summary(pend))
+                del self._pending[key]
+                self._last_emit[key] = now
+        # Claves cuyo plazo ya venció: la siguiente fila saldría enseguida igual
+        for key in [k for k, t in self._last_emit.items()
+                    if k not in self._pending
+                    and now - t >= (self._rule(k[2]).get("min_interval", 0) or 0)]:
+            del self._last_emit[key]
+        return rows
+
+    def _summary(self, pend):
+        usuario, accion, detalles, count, dispositivo = pend
+        self.emitted += 1
+        return (usuario, accion, f"{detalles} (x{count})" if detalles else f"x{count}", dispositivo)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "submitted": self.submitted,
+                "emitted": self.emitted,
+                "suppressed": self.suppressed,
+                "pending": len(self._pending),
+            }
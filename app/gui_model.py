@@ -0,0 +1,113 @@
+# gui_model.py
+# Modelo de estado compartido entre el hilo lector serial y el hilo de la GUI.
+# El hilo lector sólo escribe aquí (nunca toca widgets); la GUI toma una
+# instantánea como mucho una vez por fotograma y aplica sólo lo que cambió.
+
+import threading
+from collections import deque
+from datetime import datetime
+
+
+class PanelSnapshot:
+    """Cambios acumulados desde la última instantánea."""
+
+    __slots__ = ("sensor", "readings", "last_update", "pulsadores", "leds", "log", "log_dropped")
+
+    def __init__(self):
+        self.sensor = None          # último valor (sólo si cambió)
+        self.readings = 0           # total acumulado de lecturas
+        self.last_update = None     # datetime de la última lectura
+        self.pulsadores = {}        # índice (1..n) -> estado
+        self.leds = {}              # índice (1..n) -> estado
+        self.log = []               # líneas nuevas para el LCD
+        self.log_dropped = 0        # líneas descartadas por exceder el máximo por fotograma
+
+
+class PanelModel:
+    """Estado del panel protegido por lock, con coalescencia de actualizaciones.
+
+    Los métodos `set_*`/`add_log` devuelven True cuando el modelo pasa de
+    "limpio" a "sucio": sólo entonces hace falta avisar a la GUI.
+    """
+
+    def __init__(self, n_leds=3, n_pulsadores=3, max_log_per_frame=200):
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._sensor = None
+        self._sensor_dirty = False
+        self._readings = 0
+        self._last_update = None
+        self._leds = [False] * n_leds
+        self._pulsadores = [False] * n_pulsadores
+        self._leds_dirty = {}
+        self._puls_dirty = {}
+        self._log = deque(maxlen=max_log_per_frame)
+        self._log_dropped = 0
+
+    def _mark_locked(self):
+        was_clean = not self._dirty
+        self._dirty = True
+        return was_clean
+
+    def set_sensor(self, value):
+        with self._lock:
+            self._sensor = value
+            self._sensor_dirty = True
+            self._readings += 1
+            self._last_update = datetime.now()
+            return self._mark_locked()
+
+    def set_pulsador(self, index, state):
+        with self._lock:
+            self._pulsadores[index - 1] = bool(state)
+            self._puls_dirty[index] = bool(state)
+            return self._mark_locked()
+
+    def set_led(self, index, state):
+        with self._lock:
+            self._leds[index - 1] = bool(state)
+            self._leds_dirty[index] = bool(state)
+            return self._mark_locked()
+
+    def led_state(self, index):
+        with self._lock:
+            return self._leds[index - 1]
+
+    def touch_all(self):
+        """Marca todo el estado como cambiado (p.ej. al mostrar este modelo en el panel)."""
+        with self._lock:
+            self._sensor_dirty = self._sensor is not None
+            self._leds_dirty = dict(enumerate(self._leds, start=1))
+            self._puls_dirty = dict(enumerate(self._pulsadores, start=1))
+            return self._mark_locked()
+
+    def add_log(self, line):
+        with self._lock:
+            if len(self._log) == self._log.maxlen:
+                self._log_dropped += 1
+            self._log.append(line)
+            return self._mark_locked()
+
+    def readings(self):
+        with self._lock:
+            return self._readings, self._last_update
+
+    def take(self):
+        """Devuelve los cambios pendientes (o None si no hay) y deja el modelo limpio."""
+        with self._lock:
+            if not self._dirty:
+                return None
+            snap = PanelSnapshot()
+            if self._sensor_dirty:
+                snap.sensor = self._sensor
+            snap.readings = self._readings
+            snap.last_update = self._last_update
+            snap.pulsadores, self._puls_dirty = self._puls_dirty, {}
+            snap.leds, self._leds_dirty = self._leds_dirty, {}
+            snap.log = list(self._log)
+            snap.log_dropped = self._log_dropped
+            self._log.clear()
+            self._log_dropped = 0
+            self._sensor_dirty = False
+            self._dirty = False
+            return snap
@@ -0,0 +1,109 @@
+# log_view.py
+# Display LCD acotado: modelo en anillo de capacidad fija + vista virtualizada.
+# La memoria y el coste por línea no crecen con el tiempo de ejecución; las líneas
+# expulsadas pueden guardarse opcionalmente en un fichero con rotación.
+
+import logging
+from logging.handlers import RotatingFileHandler
+
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex
+from PyQt5.QtWidgets import QListView, QAbstractItemView
+
+
+class LogModel(QAbstractListModel):
+    """Modelo de líneas en un anillo de `capacity` elementos.
+
+    `append_lines` inserta un lote completo con una sola notificación a la
+    vista (y una sola de borrado para las líneas más antiguas expulsadas).
+    """
+
+    def __init__(self, capacity=2000, rotate_path=None, rotate_bytes=1_000_000,
+                 rotate_backups=3, parent=None):
+        super().__init__(parent)
+        self.capacity = capacity
+        self._ring = [None] * capacity
+        self._head = 0
+        self._count = 0
+        self.evicted = 0
+        self._archive = None
+        if rotate_path:
+            self._archive = logging.getLogger(f"hcsr05.lcd.{id(self)}")
+            self._archive.propagate = False
+            self._archive.setLevel(logging.INFO)
+            handler = RotatingFileHandler(rotate_path, maxBytes=rotate_bytes,
+                                          backupCount=rotate_backups, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._archive.addHandler(handler)
+
+    # ----------- INTERFAZ QT ------------
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._count
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        row = index.row()
+        if row >= self._count:
+            return None
+        return self._ring[(self._head + row) % self.capacity]
+
+    # ----------- INSERCIÓN POR LOTES ------------
+    def append_lines(self, lines):
+        if not lines:
+            return
+        if len(lines) > self.capacity:
+            # Lo que ni siquiera llega a mostrarse va directo al archivo
+            self._archive_lines(lines[:-self.capacity])
+            lines = lines[-self.capacity:]
+        n = len(lines)
+
+        overflow = self._count + n - self.capacity
+        if overflow > 0:
+            self.beginRemoveRows(QModelIndex(), 0, overflow - 1)
+            self._archive_lines([self._ring[(self._head + i) % self.capacity]
+                                 for i in range(overflow)])
+            self._head = (self._head + overflow) % self.capacity
+            self._count -= overflow
+            self.evicted += overflow
+            self.endRemoveRows()
+
+        first = self._count
+        self.beginInsertRows(QModelIndex(), first, first + n - 1)
+        for i, line in enumerate(lines):
+            self._ring[(self._head + first + i) % self.capacity] = line
+        self._count += n
+        self.endInsertRows()
+
+    def _archive_lines(self, lines):
+        if self._archive is not None and lines:
+            self._archive.info("\n".join(lines))
+
+    def clear(self):
+        self.beginResetModel()
+        self._ring = [None] * self.capacity
+        self._head = self._count = 0
+        self.endResetModel()
+
+
+class LogView(QListView):
+    """Vista virtualizada del LCD: sólo se pintan las filas visibles y se sigue
+    la última línea mientras el usuario no se haya desplazado hacia arriba."""
+
+    def __init__(self, model, parent=None):
+        super().__init__(parent)
+        self.setModel(model)
+        self.setUniformItemSizes(True)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setSelectionMode(QAbstractItemView.NoSelection)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self._follow = True
+        self.verticalScrollBar().valueChanged.connect(self._on_scroll)
+        model.rowsInserted.connect(self._on_rows_inserted)
+
+    def _on_scroll(self, value):
+        bar = self.verticalScrollBar()
+        self._follow = value >= bar.maximum() - 2
+
+    def _on_rows_inserted(self, *args):
+        if self._follow:
+            self.scrollToBottom()
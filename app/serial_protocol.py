@@ -0,0 +1,256 @@
+# serial_protocol.py
+# Protocolo serial ESP32 <-> escritorio.
+#
+# Modo JSON (histórico): una trama por línea, p.ej. {"sensor": 12.3, "pulsadores": [0,1,0]}
+# Modo binario (negociado con {"proto":"bin"}): tramas de longitud prefijada
+#
+#   off  tam  campo
+#   0    2    sync 0xAA 0x55
+#   2    1    len  (bytes de carga útil, 8 para TIPO_DATOS)
+#   3    1    tipo
+#   4    2    seq        uint16 LE
+#   6    2    distancia  uint16 LE, décimas de cm (0xFFFF = sin lectura)
+#   8    1    pulsadores bitmask (bit0 = pulsador 1)
+#   9    1    leds       bitmask (bit0 = LED 1)
+#   10   1    flags      bit0 distancia válida, bit1 pulsadores, bit2 leds
+#   11   2    crc16      CRC-CCITT (0x1021, init 0xFFFF) sobre len + carga útil
+#
+# El decodificador trabaja sobre un bytearray (start, end) sin copiar las tramas
+# binarias; en modo "auto" acepta ambos formatos mezclados en el mismo flujo.
+
+import binascii
+import json
+import struct
+
+SYNC = b"\xaa\x55"
+SYNC0 = 0xAA
+TIPO_DATOS = 0x01
+
+FLAG_SENSOR = 0x01
+FLAG_PULSADORES = 0x02
+FLAG_LEDS = 0x04
+
+DIST_SIN_LECTURA = 0xFFFF
+NUM_CANALES = 3
+
+_HDR = struct.Struct("<BB")                # len, tipo
+_DATOS = struct.Struct("<HHBBB")           # seq, distancia, pulsadores, leds, flags
+_CRC = struct.Struct("<H")
+LEN_DATOS = _DATOS.size + 1                # + byte de tipo
+FRAME_SIZE = 2 + 1 + LEN_DATOS + 2         # 13 bytes
+
+# Tabla precalculada bitmask -> tupla de estados (sin asignaciones por trama)
+_BITS = tuple(tuple(bool(m & (1 << i)) for i in range(NUM_CANALES)) for m in range(256))
+
+MODES = ("auto", "json", "bin")
+
+
+def negotiation_command(mode: str) -> bytes:
+    """Comando que se envía al ESP32 para pedir un modo de protocolo."""
+    proto = "bin" if mode in ("bin", "auto") else "json"
+    return (json.dumps({"proto": proto}) + "\n").encode()
+
+
+def _mask(states) -> int:
+    m = 0
+    for i, st in enumerate(states or ()):
+        if st:
+            m |= 1 << i
+    return m
+
+
+def encode_frame(seq: int, distancia=None, pulsadores=None, leds=None) -> bytes:
+    """Construye una trama binaria TIPO_DATOS (referencia para firmware/simulador)."""
+    flags = 0
+    dist = DIST_SIN_LECTURA
+    if distancia is not None:
+        flags |= FLAG_SENSOR
+        dist = max(0, min(DIST_SIN_LECTURA - 1, int(round(float(distancia) * 10))))
+    if pulsadores is not None:
+        flags |= FLAG_PULSADORES
+    if leds is not None:
+        flags |= FLAG_LEDS
+    body = _HDR.pack(LEN_DATOS, TIPO_DATOS) + _DATOS.pack(
+        seq & 0xFFFF, dist, _mask(pulsadores), _mask(leds), flags)
+    return SYNC + body + _CRC.pack(binascii.crc_hqx(body, 0xFFFF))
+
+
+def encode_json_frame(distancia=None, pulsadores=None, leds=None) -> bytes:
+    """Trama equivalente en el formato JSON por líneas."""
+    data = {}
+    if distancia is not None:
+        data["sensor"] = distancia
+    if pulsadores is not None:
+        data["pulsadores"] = [1 if p else 0 for p in pulsadores]
+    if leds is not None:
+        data["leds"] = [bool(x) for x in leds]
+    return (json.dumps(data) + "\n").encode()
+
+
+class FrameDecoder:
+    """Decodificador incremental de tramas JSON y/o binarias.
+
+    `decode(buf, start, end)` analiza buf[start:end] y devuelve
+    (tramas, nueva_posición); los bytes desde nueva_posición son una trama
+    incompleta que debe conservarse hasta recibir más datos.
+    """
+
+    def __init__(self, mode="auto", max_line=1024):
+        if mode not in MODES:
+            raise ValueError(f"Modo de protocolo desconocido: {mode}")
+        self.mode = mode
+        self.max_line = max_line
+        self._buf = bytearray()
+        self._last_seq = None
+        self._skipping = False
+        # Estadísticas
+        self.frames_json = 0
+        self.frames_bin = 0
+        self.malformed = 0
+        self.crc_errors = 0
+        self.lost = 0
+
+    @property
+    def frames(self):
+        return self.frames_json + self.frames_bin
+
+    def feed(self, data) -> list:
+        """Variante cómoda con búfer propio: añade bytes y devuelve las tramas completas."""
+        self._buf += data
+        frames, pos = self.decode(self._buf, 0, len(self._buf))
+        if pos:
+            del self._buf[:pos]
+        return frames
+
+    def decode(self, buf, start, end):
+        if self.mode == "json":
+            return self._decode_lines(buf, start, end)
+        frames = []
+        pos = start
+        want_bin = self.mode != "json"
+        want_json = self.mode != "bin"
+        mv = memoryview(buf)
+        try:
+            while pos < end:
+                b = buf[pos]
+                if b == SYNC0 and want_bin:
+                    if end - pos < 4:
+                        break
+                    if buf[pos + 1] != 0x55:
+                        self.malformed += 1
+                        pos = self._resync(buf, pos + 1, end, want_json)
+                        continue
+                    length = buf[pos + 2]
+                    total = 3 + length + 2
+                    if end - pos < total:
+                        break
+                    crc_end = pos + 3 + length
+                    if binascii.crc_hqx(mv[pos + 2:crc_end], 0xFFFF) != _CRC.unpack_from(buf, crc_end)[0]:
+                        self.crc_errors += 1
+                        self.malformed += 1
+                        pos = self._resync(buf, pos + 1, end, want_json)
+                        continue
+                    if buf[pos + 3] == TIPO_DATOS and length == LEN_DATOS:
+                        frames.append(self._parse_datos(buf, pos + 4))
+                        self.frames_bin += 1
+                    self._skipping = False
+                    pos += total
+                elif b == 0x7B and want_json:  # '{'
+                    nl = buf.find(b"\n", pos, end)
+                    if nl < 0:
+                        if end - pos > self.max_line:
+                            self.malformed += 1
+                            pos = self._resync(buf, pos + 1, end, want_json)
+                            continue
+                        break
+                    try:
+                        data = json.loads(mv[pos:nl].tobytes())
+                    except ValueError:
+                        data = None
+                    if isinstance(data, dict):
+                        frames.append(data)
+                        self.frames_json += 1
+                        self._skipping = False
+                    else:
+                        self.malformed += 1
+                    pos = nl + 1
+                elif b in (0x0A, 0x0D, 0x20):
+                    pos += 1
+                else:
+                    # Texto suelto o bytes corruptos: saltar hasta la siguiente trama posible
+                    # (una racha de basura cuenta como una sola trama malformada)
+                    if not self._skipping:
+                        self.malformed += 1
+                        self._skipping = True
+                    pos = self._resync(buf, pos + 1, end, want_json)
+        finally:
+            mv.release()
+        return frames, pos
+
+    def _decode_lines(self, buf, start, end):
+        """Ruta rápida para modo sólo-JSON: se parte el bloque completo por líneas."""
+        last = buf.rfind(b"\n", start, end)
+        if last < 0:
+            if end - start > self.max_line:
+                self.malformed += 1
+                return [], end
+            return [], start
+        frames = []
+        # Decodificar el bloque entero de una vez (json.loads con str evita detectar codificación)
+        for line in buf[start:last].decode("utf-8", "replace").split("\n"):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError:
+                data = None
+            if isinstance(data, dict):
+                frames.append(data)
+            else:
+                self.malformed += 1
+        self.frames_json += len(frames)
+        return frames, last + 1
+
+    def _resync(self, buf, pos, end, want_json):
+        """Posición del siguiente inicio de trama candidato (o `end`)."""
+        cands = []
+        if self.mode != "json":
+            i = buf.find(SYNC, pos, end)
+            if i >= 0:
+                cands.append(i)
+            elif end > pos and buf[end - 1] == SYNC0:
+                cands.append(end - 1)
+        if want_json:
+            i = buf.find(b"\n", pos, end)
+            if i >= 0:
+                cands.append(i + 1)
+            i = buf.find(b"{", pos, end)
+            if i >= 0:
+                cands.append(i)
+        return min(cands) if cands else end
+
+    def _parse_datos(self, buf, off):
+        seq, dist, puls, leds, flags = _DATOS.unpack_from(buf, off)
+        if self._last_seq is not None:
+            gap = (seq - self._last_seq - 1) & 0xFFFF
+            if gap < 0x8000:
+                self.lost += gap
+        self._last_seq = seq
+        frame = {"seq": seq}
+        if flags & FLAG_SENSOR and dist != DIST_SIN_LECTURA:
+            frame["sensor"] = dist / 10.0
+        if flags & FLAG_PULSADORES:
+            frame["pulsadores"] = _BITS[puls]
+        if flags & FLAG_LEDS:
+            frame["leds"] = _BITS[leds]
+        return frame
+
+    def stats(self):
+        return {
+            "frames_json": self.frames_json,
+            "frames_bin": self.frames_bin,
+            "malformed": self.malformed,
+            "crc_errors": self.crc_errors,
+            "lost": self.lost,
+        }
@@ -0,0 +1,152 @@
+# serial_reader.py
+# Lector serial con búfer preasignado: vacía `in_waiting` de una vez, separa las
+# tramas incrementalmente (serial_protocol.FrameDecoder) y entrega lotes de tramas.
+
+import threading
+import time
+
+
+class StreamBuffer:
+    """Búfer lineal preasignado con índices de lectura/escritura.
+
+    Los datos válidos están en buf[start:end]; cuando no cabe más al final se
+    compacta moviendo lo pendiente al principio (sólo la trama incompleta).
+    """
+
+    def __init__(self, capacity=65536):
+        self.buf = bytearray(capacity)
+        self.capacity = capacity
+        self.start = 0
+        self.end = 0
+        self.high_water = 0
+
+    def __len__(self):
+        return self.end - self.start
+
+    def free(self):
+        return self.capacity - len(self)
+
+    def writable(self, n):
+        """Devuelve una vista de hasta `n` bytes libres al final del búfer."""
+        if self.capacity - self.end < n and self.start:
+            pending = self.end - self.start
+            self.buf[:pending] = self.buf[self.start:self.end]
+            self.start, self.end = 0, pending
+        n = min(n, self.capacity - self.end)
+        return memoryview(self.buf)[self.end:self.end + n]
+
+    def commit(self, n):
+        self.end += n
+        self.high_water = max(self.high_water, self.end - self.start)
+
+    def consume(self, pos):
+        """Marca como procesado todo lo anterior a `pos`."""
+        self.start = pos
+        if self.start == self.end:
+            self.start = self.end = 0
+
+    def clear(self):
+        self.start = self.end = 0
+
+
+class SerialReader:
+    """Hilo lector: bytes del puerto -> StreamBuffer -> FrameDecoder -> on_frames(lote).
+
+    `on_frames` recibe listas de tramas (dicts) desde el hilo lector. Si el puerto
+    falla al leer (p.ej. equipo desenchufado), `failed` queda a True con el error en
+    `last_error` hasta la siguiente lectura correcta; quien abrió el puerto decide
+    si cerrarlo y volver a abrirlo (ver DeviceManager.rescan).
+    """
+
+    def __init__(self, ser, decoder, on_frames, buffer_size=65536, name="serial-reader"):
+        self.ser = ser
+        self.decoder = decoder
+        self.on_frames = on_frames
+        self.buffer = StreamBuffer(buffer_size)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+        # Estadísticas
+        self.bytes_total = 0
+        self.reads = 0
+        self.overflows = 0
+        self.read_errors = 0
+        self.failed = False
+        self.last_error = None
+        self._rate_t = time.monotonic()
+        self._rate_bytes = 0
+        self._rate_frames = 0
+        self.bytes_s = 0.0
+        self.frames_s = 0.0
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def _run(self):
+        buf = self.buffer
+        while not self._stop.is_set():
+            try:
+                waiting = self.ser.in_waiting
+                # Con datos: leer todo lo que haya; sin datos: esperar 1 byte (timeout del puerto)
+                view = buf.writable(max(1, waiting))
+                try:
+                    n = self.ser.readinto(view) if len(view) else 0
+                finally:
+                    view.release()
+            except Exception as e:
+                if self._stop.is_set():
+                    break
+                self.read_errors += 1
+                self.last_error = str(e) or type(e).__name__
+                self.failed = True
+                time.sleep(0.1)
+                continue
+            self.failed = False
+            if not n:
+                if not buf.free():
+                    # Búfer lleno sin ninguna trama reconocible: se descarta
+                    self.overflows += 1
+                    self.decoder.malformed += 1
+                    buf.clear()
+                continue
+            buf.commit(n)
+            self.reads += 1
+            self.bytes_total += n
+
+            frames, pos = self.decoder.decode(buf.buf, buf.start, buf.end)
+            buf.consume(pos)
+            if frames:
+                try:
+                    self.on_frames(frames)
+                except Exception:
+                    pass
+
+    def stats(self):
+        """Instantánea de métricas; las tasas se calculan desde la llamada anterior."""
+        now = time.monotonic()
+        dt = now - self._rate_t
+        frames = self.decoder.frames
+        if dt >= 0.5:
+            self.bytes_s = (self.bytes_total - self._rate_bytes) / dt
+            self.frames_s = (frames - self._rate_frames) / dt
+            self._rate_t, self._rate_bytes, self._rate_frames = now, self.bytes_total, frames
+        return {
+            "bytes_total": self.bytes_total,
+            "frames_total": frames,
+            "bytes_s": self.bytes_s,
+            "frames_s": self.frames_s,
+            "malformed": self.decoder.malformed,
+            "crc_errors": self.decoder.crc_errors,
+            "lost": self.decoder.lost,
+            "reads": self.reads,
+            "buffer_high_water": self.buffer.high_water,
+            "buffer_capacity": self.buffer.capacity,
+            "overflows": self.overflows,
+            "read_errors": self.read_errors,
+            "failed": self.failed,
+        }
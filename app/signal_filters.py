@@ -0,0 +1,178 @@
+# signal_filters.py
+# Acondicionamiento de la señal del HC-SR05: filtros en streaming con memoria fija.
+# Cada filtro procesa una muestra con coste constante (ventanas de tamaño fijo)
+# y devuelve el valor filtrado o None si la muestra se descarta.
+#
+# Se encadenan en un FilterPipeline, que puede construirse desde un texto, p.ej.:
+#   "rango:2:400,hampel:7:3,mediana:5,ema:0.3,pendiente:300"
+
+import bisect
+from collections import deque
+
+
+class RangeGate:
+    """Descarta lecturas fuera del rango físico del sensor (ecos perdidos, timeouts).
+
+    `maximo` es exclusivo: el firmware envía exactamente 400 cuando no hay eco.
+    """
+
+    def __init__(self, minimo=2.0, maximo=400.0):
+        self.minimo = minimo
+        self.maximo = maximo
+
+    def update(self, value, t):
+        return value if self.minimo <= value < self.maximo else None
+
+    def reset(self):
+        pass
+
+
+class MedianFilter:
+    """Mediana de las últimas `n` muestras (ventana ordenada mantenida con bisect)."""
+
+    def __init__(self, n=5):
+        self.n = n
+        self._window = deque()
+        self._sorted = []
+
+    def update(self, value, t):
+        if len(self._window) == self.n:
+            old = self._window.popleft()
+            del self._sorted[bisect.bisect_left(self._sorted, old)]
+        self._window.append(value)
+        bisect.insort(self._sorted, value)
+        return self._sorted[len(self._sorted) // 2]
+
+    def reset(self):
+        self._window.clear()
+        self._sorted.clear()
+
+
+class EmaFilter:
+    """Media móvil exponencial: y = y + alpha * (x - y)."""
+
+    def __init__(self, alpha=0.3):
+        self.alpha = alpha
+        self._y = None
+
+    def update(self, value, t):
+        if self._y is None:
+            self._y = value
+        else:
+            self._y += self.alpha * (value - self._y)
+        return self._y
+
+    def reset(self):
+        self._y = None
+
+
+class HampelFilter:
+    """Rechazo de valores atípicos: si |x - mediana| > k * 1.4826 * MAD se
+    sustituye por la mediana de la ventana (o se descarta si `replace=False`).
+
+    Todas las muestras crudas entran en la ventana, también las atípicas: ante un
+    cambio real de distancia la mediana lo sigue en cuanto la mitad de la ventana
+    tiene el valor nuevo. La MAD tiene un mínimo de `min_mad` cm o `rel_mad` de la
+    mediana (el ruido del HC-SR05 crece con la distancia), para que unas lecturas
+    idénticas no conviertan cualquier variación de milímetros en atípica.
+    """
+
+    def __init__(self, window=7, k=3.0, min_mad=0.3, rel_mad=0.005, replace=True):
+        self.k = k
+        self.min_mad = min_mad
+        self.rel_mad = rel_mad
+        self.replace = replace
+        self._median = MedianFilter(window)
+        self.outliers = 0
+
+    def update(self, value, t):
+        window = self._median._sorted
+        result = value
+        if len(window) >= 3:
+            med = window[len(window) // 2]
+            mad = sorted(abs(v - med) for v in window)[len(window) // 2]
+            mad = max(mad, self.min_mad, self.rel_mad * abs(med))
+            if abs(value - med) > self.k * 1.4826 * mad:
+                self.outliers += 1
+                result = med if self.replace else None
+        self._median.update(value, t)
+        return result
+
+    def reset(self):
+        self._median.reset()
+
+
+class RateClamp:
+    """Limita la variación a `max_rate` cm/s respecto a la última salida."""
+
+    def __init__(self, max_rate=300.0):
+        self.max_rate = max_rate
+        self._last = None
+        self._last_t = None
+
+    def update(self, value, t):
+        if self._last is None:
+            self._last, self._last_t = value, t
+            return value
+        step = self.max_rate * max(t - self._last_t, 0.0)
+        value = min(max(value, self._last - step), self._last + step)
+        self._last, self._last_t = value, t
+        return value
+
+    def reset(self):
+        self._last = self._last_t = None
+
+
+# Nombre en la especificación -> (clase, conversores de los parámetros)
+FILTERS = {
+    "rango": (RangeGate, (float, float)),
+    "mediana": (MedianFilter, (int,)),
+    "ema": (EmaFilter, (float,)),
+    "hampel": (HampelFilter, (int, float, float, float)),
+    "pendiente": (RateClamp, (float,)),
+}
+
+
+class FilterPipeline:
+    """Cadena de filtros; una muestra descartada por un filtro no llega a los siguientes."""
+
+    def __init__(self, filters=()):
+        self.filters = list(filters)
+        self.samples = 0
+        self.rejected = 0
+
+    @classmethod
+    def from_spec(cls, spec):
+        """Construye la cadena desde "nombre:param:param,..." (cadena vacía = sin filtros)."""
+        filters = []
+        for item in filter(None, (s.strip() for s in (spec or "").split(","))):
+            name, *params = item.split(":")
+            try:
+                klass, convs = FILTERS[name]
+            except KeyError:
+                raise ValueError(f"Filtro desconocido: {name!r}")
+            filters.append(klass(*(conv(p) for conv, p in zip(convs, params))))
+        return cls(filters)
+
+    def update(self, value, t):
+        """Filtra una muestra (cm, instante en s); None si se descarta."""
+        self.samples += 1
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            self.rejected += 1
+            return None
+        for f in self.filters:
+            value = f.update(value, t)
+            if value is None:
+                self.rejected += 1
+                return None
+        return value
+
+    def reset(self):
+        for f in self.filters:
+            f.reset()
+
+    def stats(self):
+        outliers = sum(getattr(f, "outliers", 0) for f in self.filters)
+        return {"samples": self.samples, "rejected": self.rejected, "outliers": outliers}
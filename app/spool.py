@@ -0,0 +1,134 @@
+# spool.py
+# Diario local durable (SQLite en modo WAL) para filas que no pudieron escribirse
+# en MySQL. Se reproducen en bloque y en orden cuando la BD vuelve a estar disponible.
+
+import sqlite3
+import threading
+import time
+import uuid
+
+from write_behind import dump_item, load_item
+
+
+class SqliteSpool:
+    """Cola FIFO persistente con clave de deduplicación por fila.
+
+    Cada fila guarda: seq (orden), dedup_key (única), lote (clave del lote
+    original si la fila viene de un lote fallido), sentencia y parámetros.
+    """
+
+    def __init__(self, path, synchronous="FULL"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(f"PRAGMA synchronous={synchronous}")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS spool (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                dedup_key TEXT NOT NULL UNIQUE,
+                lote TEXT,
+                item TEXT NOT NULL,
+                creado REAL NOT NULL
+            )
+            """
+        )
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS spool_rechazados (
+                seq INTEGER PRIMARY KEY,
+                dedup_key TEXT NOT NULL,
+                item TEXT NOT NULL,
+                error TEXT,
+                fecha REAL NOT NULL
+            )
+            """
+        )
+        self._depth = self._db.execute("SELECT COUNT(*) FROM spool").fetchone()[0]
+
+        # Estadísticas
+        self.spooled = 0
+        self.replayed = 0
+        self.rejected = 0
+        self.duplicates = 0
+        self.replay_rows_s = 0.0
+
+    def append(self, items, lote=None):
+        """Añade filas (sql, params) al final del diario en una sola transacción.
+
+        Si `lote` se indica, las claves se derivan de él para poder reconocer
+        un lote que llegó a confirmarse en MySQL aunque la app no se enterase.
+        """
+        rows = []
+        now = time.time()
+        for i, item in enumerate(items):
+            key = f"{lote}-{i}" if lote else uuid.uuid4().hex
+            rows.append((key, lote, dump_item(item), now))
+        if not rows:
+            return
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                self._db.executemany(
+                    "INSERT INTO spool (dedup_key, lote, item, creado) VALUES (?, ?, ?, ?)", rows)
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+            self._depth += len(rows)
+            self.spooled += len(rows)
+
+    def read_chunk(self, n):
+        """Devuelve hasta `n` filas en orden: [(seq, dedup_key, lote, sql, params), ...]."""
+        with self._lock:
+            cur = self._db.execute(
+                "SELECT seq, dedup_key, lote, item FROM spool ORDER BY seq LIMIT ?", (n,))
+            rows = cur.fetchall()
+        out = []
+        for seq, key, lote, item in rows:
+            sql, params = load_item(item)
+            out.append((seq, key, lote, sql, params))
+        return out
+
+    def ack(self, last_seq, count):
+        """Elimina del diario todo lo que tenga seq <= last_seq (ya aplicado en MySQL).
+
+        Válido porque seq es AUTOINCREMENT y las filas sólo se añaden al final:
+        orden de seq = orden de escritura, y read_chunk lee siempre el principio.
+        """
+        with self._lock:
+            self._db.execute("DELETE FROM spool WHERE seq <= ?", (last_seq,))
+            self._depth = max(0, self._depth - count)
+            self.replayed += count
+
+    def reject(self, row, error):
+        """Mueve una fila que MySQL rechaza (no por conexión) a 'spool_rechazados'."""
+        seq, key, _lote, sql, params = row
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.execute(
+                "INSERT OR REPLACE INTO spool_rechazados (seq, dedup_key, item, error, fecha) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (seq, key, dump_item((sql, params)), str(error), time.time()))
+            self._db.execute("DELETE FROM spool WHERE seq = ?", (seq,))
+            self._db.execute("COMMIT")
+            self._depth = max(0, self._depth - 1)
+            self.rejected += 1
+
+    def depth(self):
+        return self._depth
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def stats(self):
+        return {
+            "spool_depth": self._depth,
+            "spooled": self.spooled,
+            "replayed": self.replayed,
+            "replay_rows_s": self.replay_rows_s,
+            "duplicates": self.duplicates,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,44 @@
+# startup_profiler.py
+# Medición del arranque por fases (importaciones, construcción de ventanas,
+# primera pintura, apertura de puertos...). Se activa con --profile-startup o
+# HCSR05_PROFILE_STARTUP=1; desactivado, `mark` no hace nada.
+
+import os
+import sys
+import time
+
+
+class StartupProfiler:
+    """Cronómetro de fases desde el arranque del proceso (o desde su creación)."""
+
+    def __init__(self, enabled=False, stream=None):
+        self.enabled = enabled
+        self.stream = stream or sys.stderr
+        self.t0 = time.perf_counter()
+        self._last = self.t0
+        self.phases = []   # (fase, ms de la fase, ms acumulados)
+
+    @classmethod
+    def from_argv(cls, argv=None):
+        argv = sys.argv if argv is None else argv
+        enabled = "--profile-startup" in argv or os.environ.get("HCSR05_PROFILE_STARTUP") == "1"
+        return cls(enabled)
+
+    def mark(self, phase):
+        """Cierra la fase en curso con el nombre `phase`."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.phases.append((phase, (now - self._last) * 1000.0, (now - self.t0) * 1000.0))
+        self._last = now
+
+    def report(self, title="Arranque"):
+        """Escribe las fases registradas desde el último informe."""
+        if not self.enabled or not self.phases:
+            return
+        width = max(len(p[0]) for p in self.phases)
+        lines = [f"[perfil] {title}:"]
+        for phase, ms, total in self.phases:
+            lines.append(f"[perfil]   {phase:<{width}}  {ms:8.1f} ms  (t={total:8.1f} ms)")
+        print("\n".join(lines), file=self.stream, flush=True)
+        self.phases.clear()
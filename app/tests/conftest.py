@@ -0,0 +1,138 @@
+# Los módulos de app/ se importan entre sí como módulos sueltos (se ejecuta como script)
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeDown(Exception):
+    """Conexión perdida (equivale a mysql.connector.errors.OperationalError)."""
+
+
+class FakeSQLError(Exception):
+    """Error de MySQL con su código (por defecto 1264, dato fuera de rango)."""
+
+    def __init__(self, msg, errno=1264):
+        super().__init__(msg)
+        self.errno = errno
+
+
+class FakeMySQL:
+    """Servidor MySQL mínimo en memoria: filas confirmadas, tabla spool_aplicados,
+    caída simulada (`down`), filas que se rechazan (`reject(params)` devuelve True
+    o un errno) y un error opcional para CREATE TABLE (`create_error`)."""
+
+    Down = FakeDown
+    SQLError = FakeSQLError
+
+    def __init__(self):
+        self.rows = []
+        self.aplicados = set()
+        self.down = False
+        self.reject = lambda params: False
+        self.create_error = None
+        self.connects = 0
+
+    def connect(self):
+        if self.down:
+            raise FakeDown("sin conexión")
+        self.connects += 1
+        return FakeConnection(self)
+
+    def values(self):
+        return [p[0] for _sql, p in self.rows]
+
+
+class FakeConnection:
+    def __init__(self, db):
+        self.db = db
+        self.pending = []
+        self.pending_keys = set()
+        self.closed = False
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        if self.db.down:
+            raise FakeDown("sin conexión")
+        self.db.rows.extend(self.pending)
+        self.db.aplicados |= self.pending_keys
+        self.rollback()
+
+    def rollback(self):
+        self.pending, self.pending_keys = [], set()
+
+    def ping(self, reconnect=False):
+        if self.db.down or self.closed:
+            raise FakeDown("sin conexión")
+
+    def close(self):
+        self.closed = True
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self._result = []
+
+    def execute(self, sql, params=()):
+        db = self.conn.db
+        if db.down:
+            raise FakeDown("sin conexión")
+        if sql.startswith("CREATE") and db.create_error is not None:
+            raise db.create_error
+        if sql.startswith("SELECT dedup_key"):
+            self._result = [(k,) for k in params if k in db.aplicados]
+        elif sql.startswith("INSERT INTO spool_aplicados"):
+            self.conn.pending_keys.add(params[0])
+        elif sql.startswith("INSERT"):
+            errno = db.reject(params)
+            if errno:
+                raise FakeSQLError(f"fila rechazada: {params}", 1264 if errno is True else errno)
+            self.conn.pending.append((sql, tuple(params)))
+
+    def executemany(self, sql, seq):
+        for params in seq:
+            self.execute(sql, params)
+
+    def fetchone(self):
+        return self._result[0] if self._result else None
+
+    def fetchall(self):
+        return self._result
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def mysql():
+    return FakeMySQL()
+
+
+@pytest.fixture
+def pool(mysql):
+    from db_pool import ConnectionPool
+    p = ConnectionPool(mysql.connect, max_size=2, checkout_timeout=1.0,
+                       connection_errors=(FakeDown,))
+    yield p
+    p.close_all()
+
+
+def _wait_until(cond, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if cond():
+            return True
+        time.sleep(0.01)
+    return cond()
+
+
+@pytest.fixture
+def wait_until():
+    """Espera activa corta para los tests con hilo escritor."""
+    return _wait_until
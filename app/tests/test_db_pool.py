@@ -0,0 +1,74 @@
+import threading
+
+import pytest
+
+from db_pool import ConnectionPool, PoolTimeout
+
+
+def test_connections_are_reused(mysql, pool):
+    for _ in range(5):
+        pool.execute("INSERT INTO sensores VALUES (%s)", (1,))
+    assert mysql.connects == 1
+    assert len(mysql.rows) == 5
+    assert pool.stats()["checkouts"] == 5
+
+
+def test_checkout_blocks_at_max_size(mysql):
+    pool = ConnectionPool(mysql.connect, max_size=1, checkout_timeout=0.05,
+                          connection_errors=(mysql.Down,))
+    conn = pool.acquire()
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+    assert pool.stats()["timeouts"] == 1
+
+    got = []
+    t = threading.Thread(target=lambda: got.append(pool.acquire()))
+    pool.checkout_timeout = 2.0
+    t.start()
+    pool.release(conn)
+    t.join(2.0)
+    assert got == [conn]
+
+
+def test_broken_connection_is_discarded(mysql, pool):
+    with pool.connection() as conn:
+        pass
+    mysql.down = True
+    with pytest.raises(mysql.Down):
+        with pool.connection() as c:
+            assert c is conn
+            c.cursor().execute("INSERT INTO sensores VALUES (%s)", (1,))
+    assert conn.closed
+    assert pool.stats()["idle"] == 0 and pool.stats()["in_use"] == 0
+
+
+def test_execute_retries_once_on_a_fresh_connection(mysql, pool):
+    with pool.connection() as conn:
+        pass
+    conn.db = FlakyOnce(mysql)
+    pool.execute("INSERT INTO sensores VALUES (%s)", (7,))
+    assert mysql.values() == [7]
+    assert mysql.connects == 2
+    assert pool.stats()["reconnects"] == 1
+
+
+def test_failed_connect_frees_the_slot(mysql):
+    pool = ConnectionPool(mysql.connect, max_size=1, checkout_timeout=0.05,
+                          connection_errors=(mysql.Down,))
+    mysql.down = True
+    with pytest.raises(mysql.Down):
+        pool.acquire()
+    mysql.down = False
+    pool.release(pool.acquire())
+    assert pool.stats()["in_use"] == 0
+
+
+class FlakyOnce:
+    """Vista de FakeMySQL cuya conexión ya está rota (el servidor sigue vivo)."""
+
+    def __init__(self, db):
+        self._db = db
+        self.down = True
+
+    def __getattr__(self, name):
+        return getattr(self._db, name)
@@ -0,0 +1,104 @@
+import threading
+import time
+
+from device_manager import DeviceManager, parse_ports
+from serial_protocol import encode_frame
+
+
+class Cable:
+    """Equipo conectado a un puerto: al desenchufarlo, el puerto abierto deja de leer
+    y no se puede volver a abrir hasta que se enchufa de nuevo."""
+
+    def __init__(self):
+        self.plugged = True
+        self.opened = 0
+
+    def open(self, port):
+        if not self.plugged:
+            raise OSError(f"could not open port {port}")
+        self.opened += 1
+        return Port(self)
+
+
+class Port:
+    def __init__(self, cable):
+        self.cable = cable
+        self.data = bytearray()
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def feed(self, data):
+        with self.lock:
+            self.data += data
+
+    @property
+    def in_waiting(self):
+        if not self.cable.plugged:
+            raise OSError("device disconnected")
+        return len(self.data)
+
+    def readinto(self, view):
+        if not self.cable.plugged or self.closed:
+            raise OSError("device disconnected")
+        with self.lock:
+            n = min(len(view), len(self.data))
+            view[:n] = self.data[:n]
+            del self.data[:n]
+        if not n:
+            time.sleep(0.005)
+        return n
+
+    def write(self, data):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def wait_for(cond, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while not cond() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return cond()
+
+
+def test_parse_ports():
+    assert parse_ports("auto") is None
+    assert parse_ports(" COM3, COM4 ,") == ["COM3", "COM4"]
+
+
+def test_unplugged_port_is_reopened_when_it_comes_back():
+    cable, frames = Cable(), []
+    manager = DeviceManager(lambda dev, fr: frames.extend(fr), protocol="bin", open_serial=cable.open)
+    added, removed = manager.rescan(["COM3"])
+    first = added[0]
+    first.ser.feed(encode_frame(1, 10.0, [False] * 3))
+    assert wait_for(lambda: len(frames) == 1)
+
+    cable.plugged = False
+    assert wait_for(lambda: first.reader.failed)
+    added, removed = manager.rescan(["COM3"])
+    assert (added, removed) == ([], [first])
+    assert first.ser.closed and "COM3" in manager.errors
+    assert manager.rescan(["COM3"]) == ([], [])
+
+    cable.plugged = True
+    added, removed = manager.rescan(["COM3"])
+    assert len(added) == 1 and removed == [] and cable.opened == 2
+    assert manager.errors == {}
+    added[0].ser.feed(encode_frame(2, 20.0, [False] * 3))
+    assert wait_for(lambda: len(frames) == 2)
+    assert [f["seq"] for f in frames] == [1, 2]
+    manager.close_all()
+
+
+def test_healthy_ports_are_left_alone():
+    cable = Cable()
+    manager = DeviceManager(lambda dev, fr: None, protocol="bin", open_serial=cable.open)
+    manager.rescan(["COM3", "COM4"])
+    time.sleep(0.05)
+    assert manager.rescan(["COM3", "COM4"]) == ([], [])
+    added, removed = manager.rescan(["COM4"])
+    assert added == [] and [d.port for d in removed] == ["COM3"]
+    assert cable.opened == 2
+    manager.close_all()
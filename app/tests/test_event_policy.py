@@ -0,0 +1,77 @@
+from event_policy import EventPolicy
+
+
+class Clock:
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self):
+        return self.t
+
+
+def make_policy(clock, **kwargs):
+    config = dict(
+        sensor_deadband=50.0, sensor_thresholds=[10.0, 30.0], sensor_hysteresis=1.0,
+        rules={"sensor_umbral": {"min_interval": 1.0, "por": "accion"},
+               "sensor_read": {"min_interval": 60.0, "por": "accion"}},
+        clock=clock)
+    config.update(kwargs)
+    return EventPolicy(**config)
+
+
+def umbral(rows):
+    return [r for r in rows if r[1] == "sensor_umbral"]
+
+
+def test_oscillating_reading_writes_one_row_per_interval():
+    clock = Clock()
+    policy = make_policy(clock)
+    rows = []
+    # 20 muestras/s oscilando alrededor de 10 cm durante 5 s
+    for i in range(100):
+        clock.t = i * 0.05
+        rows += policy.sensor("ana", 8.0 if i % 2 else 12.0)
+    rows += policy.flush_all()
+    crossings = umbral(rows)
+    assert 5 <= len(crossings) <= 6
+    assert sum(int(r[2].rsplit("(x", 1)[1][:-1]) if "(x" in r[2] else 1 for r in crossings) == 99
+
+
+def test_hysteresis_ignores_noise_around_the_threshold():
+    clock = Clock()
+    policy = make_policy(clock)
+    rows = []
+    for i, value in enumerate([12.0, 9.5, 10.5, 9.2, 10.8, 9.5, 8.5, 9.5, 10.5, 11.5]):
+        clock.t = i * 10.0
+        rows += policy.sensor("ana", value)
+    assert [r[2] for r in umbral(rows)] == ["HC-SR05 cruzó 10 cm ↓ (HW)", "HC-SR05 cruzó 10 cm ↑ (HW)"]
+
+
+def test_devices_are_limited_separately():
+    clock = Clock()
+    policy = make_policy(clock)
+    rows = []
+    for dev in ("esp32-1", "esp32-2"):
+        rows += policy.sensor("ana", 12.0, dispositivo=dev)
+        rows += policy.sensor("ana", 8.0, dispositivo=dev)
+    assert [r[3] for r in umbral(rows)] == ["esp32-1", "esp32-2"]
+
+
+def test_repeated_events_are_coalesced():
+    clock = Clock()
+    policy = EventPolicy(default_rule={"min_interval": 2.0, "por": "detalles"}, clock=clock)
+    rows = policy.submit("ana", "led_toggle_hw", "LED1 ON")
+    for _ in range(4):
+        rows += policy.submit("ana", "led_toggle_hw", "LED1 ON")
+    assert rows == [("ana", "led_toggle_hw", "LED1 ON", None)]
+    clock.t = 2.0
+    assert policy.flush_due() == [("ana", "led_toggle_hw", "LED1 ON (x4)", None)]
+
+
+def test_expired_keys_are_evicted():
+    clock = Clock()
+    policy = EventPolicy(default_rule={"min_interval": 2.0, "por": "detalles"}, clock=clock)
+    for i in range(1000):
+        clock.t = i * 0.1
+        policy.submit("ana", "led_toggle_hw", f"detalle {i}")
+    assert len(policy._last_emit) <= 21
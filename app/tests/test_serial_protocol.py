@@ -0,0 +1,55 @@
+import pytest
+
+from serial_protocol import FrameDecoder, encode_frame, encode_json_frame
+
+
+def test_binary_round_trip():
+    dec = FrameDecoder("bin")
+    frames = dec.feed(encode_frame(7, 123.4, [True, False, True], [False, True, False]))
+    assert frames == [{"seq": 7, "sensor": 123.4,
+                       "pulsadores": (True, False, True), "leds": (False, True, False)}]
+
+
+def test_frame_split_across_reads():
+    data = encode_frame(1, 50.0, [False] * 3) + encode_frame(2, 51.0, [False] * 3)
+    dec = FrameDecoder("bin")
+    out = []
+    for i in range(len(data)):
+        out += dec.feed(data[i:i + 1])
+    assert [f["seq"] for f in out] == [1, 2]
+
+
+def test_resync_after_garbage_and_bad_crc():
+    good1 = encode_frame(1, 10.0, [False] * 3)
+    bad = bytearray(encode_frame(2, 20.0, [False] * 3))
+    bad[-1] ^= 0xFF
+    good3 = encode_frame(3, 30.0, [False] * 3)
+    dec = FrameDecoder("bin")
+    frames = dec.feed(good1 + b"\x01\x02basura\xaa" + bytes(bad) + good3)
+    assert [f["seq"] for f in frames] == [1, 3]
+    st = dec.stats()
+    assert st["crc_errors"] == 1
+    assert st["malformed"] >= 2
+    assert st["lost"] == 1   # seq 2 no llegó
+
+
+def test_auto_mode_mixes_json_and_binary():
+    dec = FrameDecoder("auto")
+    data = (encode_json_frame(12.5, [False, True, False]) + encode_frame(9, 40.0, [False] * 3)
+            + b"texto de arranque\n" + encode_json_frame(13.0))
+    frames = dec.feed(data)
+    assert [f.get("sensor") for f in frames] == [12.5, 40.0, 13.0]
+    assert dec.stats()["frames_json"] == 2 and dec.stats()["frames_bin"] == 1
+
+
+def test_json_mode_skips_bad_lines():
+    dec = FrameDecoder("json")
+    frames = dec.feed(b'{"sensor": 1}\nno json\n{"sensor": 2}\n{"sensor"')
+    assert [f["sensor"] for f in frames] == [1, 2]
+    assert dec.malformed == 1
+    assert dec.feed(b': 3}\n') == [{"sensor": 3}]
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        FrameDecoder("xml")
@@ -0,0 +1,94 @@
+import threading
+import time
+
+from serial_protocol import FrameDecoder, encode_frame
+from serial_reader import SerialReader, StreamBuffer
+
+
+class FakeSerial:
+    """Puerto con `in_waiting` y `readinto`; sin datos espera como el timeout de pyserial."""
+
+    def __init__(self, chunks=()):
+        self._data = bytearray()
+        self._lock = threading.Lock()
+        for chunk in chunks:
+            self.feed(chunk)
+
+    def feed(self, data):
+        with self._lock:
+            self._data += data
+
+    @property
+    def in_waiting(self):
+        with self._lock:
+            return len(self._data)
+
+    def readinto(self, view):
+        with self._lock:
+            n = min(len(view), len(self._data))
+            view[:n] = self._data[:n]
+            del self._data[:n]
+        if not n:
+            time.sleep(0.005)
+        return n
+
+
+def test_buffer_compacts_only_the_pending_tail():
+    buf = StreamBuffer(8)
+    view = buf.writable(6)
+    view[:6] = b"abcdef"
+    view.release()
+    buf.commit(6)
+    buf.consume(4)
+    view = buf.writable(5)       # no cabe al final: se mueve "ef" al principio
+    assert (buf.start, buf.end, len(view)) == (0, 2, 5)
+    view.release()
+    assert bytes(buf.buf[:2]) == b"ef"
+
+
+def run_reader(ser, frames_out, until, **kwargs):
+    reader = SerialReader(ser, FrameDecoder("bin"), frames_out.extend, **kwargs)
+    reader.start()
+    deadline = time.monotonic() + 3.0
+    while not until() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    reader.stop()
+    return reader
+
+
+def test_reader_decodes_frames_in_bulk():
+    data = b"".join(encode_frame(i, float(i), [False] * 3) for i in range(200))
+    ser, frames = FakeSerial([data[:1000], data[1000:]]), []
+    reader = run_reader(ser, frames, lambda: len(frames) == 200, buffer_size=512)
+    assert [f["seq"] for f in frames] == list(range(200))
+    st = reader.stats()
+    assert st["bytes_total"] == len(data)
+    assert st["frames_total"] == 200 and st["malformed"] == 0
+    assert st["buffer_high_water"] <= 512
+
+
+def test_reader_skips_garbage_between_frames():
+    frame = encode_frame(1, 10.0, [False] * 3)
+    ser, frames = FakeSerial([b"\xaa" * 100, frame[:5], frame[5:] + b"basura"]), []
+    reader = run_reader(ser, frames, lambda: bool(frames), buffer_size=64)
+    assert [f["seq"] for f in frames] == [1]
+    assert reader.stats()["malformed"] >= 1
+
+
+def test_callback_errors_do_not_stop_the_reader():
+    calls = []
+
+    def on_frames(batch):
+        calls.append(len(batch))
+        raise RuntimeError("fallo en la UI")
+
+    ser = FakeSerial([encode_frame(1, 1.0, [False] * 3)])
+    reader = SerialReader(ser, FrameDecoder("bin"), on_frames)
+    reader.start()
+    time.sleep(0.05)
+    ser.feed(encode_frame(2, 2.0, [False] * 3))
+    deadline = time.monotonic() + 3.0
+    while sum(calls) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    reader.stop()
+    assert sum(calls) == 2
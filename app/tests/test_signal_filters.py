@@ -0,0 +1,59 @@
+import pytest
+
+from signal_filters import FilterPipeline, HampelFilter
+
+DEFAULT_SPEC = "rango:2:400,hampel:7:3,mediana:5,ema:0.3"
+
+
+def run(pipeline, values, dt=0.02):
+    return [pipeline.update(v, i * dt) for i, v in enumerate(values)]
+
+
+def test_hampel_replaces_isolated_spike():
+    h = HampelFilter(7, 3)
+    out = [h.update(v, 0) for v in [100.0, 100.2, 99.9, 100.1, 250.0, 100.0]]
+    assert out[4] == pytest.approx(100.0, abs=0.2)
+    assert h.outliers == 1
+
+
+def test_hampel_follows_step_change():
+    h = HampelFilter(7, 3)
+    out = [h.update(v, 0) for v in [100.0] * 20 + [30.0] * 20]
+    # Sólo las primeras muestras del escalón se tratan como atípicas
+    assert h.outliers <= 4
+    assert out[-1] == 30.0
+
+
+def test_default_chain_tracks_step_change():
+    pipeline = FilterPipeline.from_spec(DEFAULT_SPEC)
+    out = run(pipeline, [100.0] * 20 + [30.0] * 180)
+    assert out[-1] == pytest.approx(30.0, abs=0.01)
+    assert pipeline.stats()["outliers"] <= 4
+
+
+def test_hampel_tolerates_sensor_noise_on_steady_readings():
+    h = HampelFilter(7, 3)
+    for v in [100.0] * 10:
+        h.update(v, 0)
+    assert h.update(100.8, 0) == 100.8
+    assert h.outliers == 0
+
+
+def test_range_gate_rejects_and_counts():
+    pipeline = FilterPipeline.from_spec("rango:2:400")
+    assert run(pipeline, [1.0, 50.0, 450.0, "x"]) == [None, 50.0, None, None]
+    assert pipeline.stats()["rejected"] == 3
+
+
+def test_default_pipeline_rejects_firmware_timeouts():
+    # Sin eco (timeout o eco nulo) el ESP32 envía exactamente 400 cm
+    pipeline = FilterPipeline.from_spec(DEFAULT_SPEC)
+    out = run(pipeline, [50.0] * 10 + [400.0] * 20)
+    assert out[10:] == [None] * 20
+    assert pipeline.stats()["rejected"] == 20
+    assert pipeline.update(399.0, 1.0) is not None
+
+
+def test_unknown_filter_in_spec():
+    with pytest.raises(ValueError):
+        FilterPipeline.from_spec("rango:2:400,kalman:1")
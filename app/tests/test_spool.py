@@ -0,0 +1,124 @@
+import pytest
+
+from spool import SqliteSpool
+from write_behind import WriteBehindQueue
+
+SQL = "INSERT INTO sensores (distancia) VALUES (%s)"
+
+
+@pytest.fixture
+def spool(tmp_path):
+    s = SqliteSpool(str(tmp_path / "spool.db"), synchronous="OFF")
+    yield s
+    s.close()
+
+
+def test_append_read_and_ack(spool):
+    spool.append([(SQL, (1,)), (SQL, (2,))])
+    spool.append([(SQL, (3,))], lote="abc")
+    rows = spool.read_chunk(10)
+    assert [r[4] for r in rows] == [(1,), (2,), (3,)]
+    assert rows[2][1:3] == ("abc-0", "abc")
+
+    spool.ack(rows[1][0], 2)
+    assert spool.depth() == 1
+    assert [r[4] for r in spool.read_chunk(10)] == [(3,)]
+
+
+def test_depth_survives_reopen(tmp_path):
+    path = str(tmp_path / "spool.db")
+    s = SqliteSpool(path)
+    s.append([(SQL, (i,)) for i in range(5)])
+    s.close()
+    s = SqliteSpool(path)
+    assert s.depth() == 5
+    s.close()
+
+
+def test_failed_batch_is_replayed_in_order(mysql, pool, spool, wait_until):
+    mysql.down = True
+    q = WriteBehindQueue(pool, batch_size=10, max_age=0.01, spool=spool, retry_interval=0.05)
+    for i in range(25):
+        q.put(SQL, (i,))
+    assert wait_until(lambda: spool.depth() == 25)
+
+    mysql.down = False
+    for i in range(25, 30):
+        q.put(SQL, (i,))
+    assert wait_until(lambda: spool.depth() == 0 and len(mysql.rows) == 30)
+    assert mysql.values() == list(range(30))
+    # Con diario pendiente, lo nuevo también pasa por él para no adelantarse
+    assert q.stats()["replayed"] == 30
+    q.close()
+
+
+def test_replay_skips_rows_already_applied(mysql, pool, spool, wait_until):
+    # El lote llegó a MySQL pero la app no recibió la confirmación
+    spool.append([(SQL, (1,)), (SQL, (2,))], lote="lote1")
+    spool.append([(SQL, (3,))])
+    mysql.aplicados.add("lote1")
+    q = WriteBehindQueue(pool, batch_size=10, max_age=0.01, spool=spool)
+    assert wait_until(lambda: spool.depth() == 0)
+    assert mysql.values() == [3]
+    assert spool.stats()["duplicates"] == 2
+    q.close()
+
+
+def test_rejected_row_does_not_block_the_spool(mysql, pool, spool, wait_until):
+    spool.append([(SQL, (i,)) for i in range(5)])
+    mysql.reject = lambda params: params == (2,)
+    q = WriteBehindQueue(pool, batch_size=10, max_age=0.01, spool=spool)
+    assert wait_until(lambda: spool.depth() == 0)
+    assert mysql.values() == [0, 1, 3, 4]
+    assert spool.stats()["rejected"] == 1
+    rejected = spool._db.execute("SELECT item, error FROM spool_rechazados").fetchall()
+    assert len(rejected) == 1 and "fila rechazada" in rejected[0][1]
+    q.close()
+
+
+def test_writer_survives_a_failing_spool(mysql, pool, spool, wait_until, monkeypatch):
+    mysql.down = True
+    real_append = spool.append
+    calls = []
+
+    def failing_append(items, lote=None):
+        calls.append(len(items))
+        raise OSError("disco lleno")
+
+    monkeypatch.setattr(spool, "append", failing_append)
+    q = WriteBehindQueue(pool, batch_size=10, max_age=0.01, spool=spool, retry_interval=0.02)
+    for i in range(15):
+        q.put(SQL, (i,))
+    assert wait_until(lambda: len(calls) >= 2)
+    assert q._thread.is_alive()
+    assert q.stats()["queued"] > 0
+
+    monkeypatch.setattr(spool, "append", real_append)
+    mysql.down = False
+    assert wait_until(lambda: len(mysql.rows) == 15 and spool.depth() == 0)
+    assert mysql.values() == list(range(15))
+    q.close()
+
+
+def test_replay_waits_while_the_dedup_table_cannot_be_created(mysql, pool, spool, wait_until):
+    spool.append([(SQL, (i,)) for i in range(3)])
+    mysql.create_error = mysql.SQLError("CREATE command denied", errno=1142)
+    q = WriteBehindQueue(pool, batch_size=10, max_age=0.01, spool=spool, retry_interval=0.02)
+    assert wait_until(lambda: q.stats()["errors"] >= 3)
+    assert spool.depth() == 3 and spool.stats()["rejected"] == 0
+
+    mysql.create_error = None
+    assert wait_until(lambda: spool.depth() == 0)
+    assert mysql.values() == [0, 1, 2]
+    q.close()
+
+
+def test_deadlock_postpones_instead_of_rejecting(mysql, pool, spool, wait_until):
+    spool.append([(SQL, (i,)) for i in range(3)])
+    deadlocks = [1213, 1213, 1205]
+    mysql.reject = lambda params: params == (1,) and deadlocks and deadlocks.pop()
+    q = WriteBehindQueue(pool, batch_size=10, max_age=0.01, spool=spool, retry_interval=0.02)
+    assert wait_until(lambda: spool.depth() == 0)
+    assert mysql.values() == [0, 1, 2]
+    assert spool.stats()["rejected"] == 0 and q.stats()["errors"] == 3
+    q.close()
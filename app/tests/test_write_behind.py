@@ -0,0 +1,110 @@
+from datetime import datetime
+
+import pytest
+
+from spool import SqliteSpool
+from write_behind import WriteBehindQueue, dump_item, group_runs, load_item
+
+SQL = "INSERT INTO sensores (distancia) VALUES (%s)"
+
+
+def test_item_round_trip_keeps_datetimes():
+    item = (SQL, (1.5, datetime(2024, 5, 1, 12, 30, 15, 250000), None))
+    assert load_item(dump_item(item)) == item
+
+
+def test_group_runs_keeps_order():
+    batch = [("a", (1,)), ("a", (2,)), ("b", (3,)), ("a", (4,))]
+    assert group_runs(batch) == [("a", [(1,), (2,)]), ("b", [(3,)]), ("a", [(4,)])]
+
+
+def test_rows_are_written_in_batches_and_in_order(mysql, pool):
+    q = WriteBehindQueue(pool, batch_size=10, max_age=60)
+    for i in range(25):
+        q.put(SQL, (i,))
+    assert q.close()
+    assert mysql.values() == list(range(25))
+    st = q.stats()
+    assert st["written"] == 25 and st["batches"] == 3
+
+
+def test_partial_batch_is_written_after_max_age(mysql, pool, wait_until):
+    q = WriteBehindQueue(pool, batch_size=100, max_age=0.05)
+    q.put(SQL, (1,))
+    assert wait_until(lambda: mysql.values() == [1])
+    q.close()
+
+
+def test_drop_oldest_policy(mysql, pool):
+    mysql.down = True
+    q = WriteBehindQueue(pool, batch_size=100, max_age=60, capacity=3,
+                         policy="drop_oldest", retry_interval=0.01)
+    for i in range(5):
+        q.put(SQL, (i,))
+    assert q.stats()["dropped"] == 2
+    mysql.down = False
+    assert q.close()
+    assert mysql.values() == [2, 3, 4]
+
+
+def test_block_policy_times_out(pool, mysql):
+    mysql.down = True
+    q = WriteBehindQueue(pool, batch_size=100, max_age=60, capacity=2,
+                         policy="block", block_timeout=0.05)
+    q.put(SQL, (1,))
+    q.put(SQL, (2,))
+    with pytest.raises(TimeoutError):
+        q.put(SQL, (3,))
+    mysql.down = False
+    q.close()
+
+
+def test_spill_moves_overflow_to_the_spool_in_order(mysql, pool, tmp_path, wait_until):
+    spool = SqliteSpool(str(tmp_path / "spool.db"), synchronous="OFF")
+    mysql.down = True
+    q = WriteBehindQueue(pool, batch_size=100, max_age=60, capacity=5,
+                         policy="spill", spool=spool, retry_interval=0.05)
+    for start in (0, 8, 16):
+        for i in range(start, start + 8):
+            q.put(SQL, (i,))
+        # Por encima de capacity el productor no espera: el escritor lo pasa al diario
+        assert q.flush()
+    assert spool.depth() == 24 and q.stats()["dropped"] == 0
+
+    mysql.down = False
+    assert wait_until(lambda: len(mysql.rows) == 24 and spool.depth() == 0)
+    assert mysql.values() == list(range(24))
+    q.close()
+    spool.close()
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        WriteBehindQueue(None, policy="otra")
+    with pytest.raises(ValueError):
+        WriteBehindQueue(None, policy="spill")
+
+
+def test_rejected_row_is_dropped_without_stalling_the_queue(mysql, pool, wait_until):
+    mysql.reject = lambda params: params == (3,)
+    q = WriteBehindQueue(pool, batch_size=10, max_age=60, retry_interval=5.0)
+    for i in range(10):
+        q.put(SQL, (i,))
+    assert wait_until(lambda: len(mysql.rows) == 9)
+    for i in range(10, 15):
+        q.put(SQL, (i,))
+    assert q.close(timeout=1.0)
+    assert mysql.values() == [0, 1, 2, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14]
+    st = q.stats()
+    assert st["dropped"] == 1 and st["written"] == 14
+
+
+def test_connection_loss_keeps_the_batch(mysql, pool, wait_until):
+    mysql.down = True
+    q = WriteBehindQueue(pool, batch_size=5, max_age=60, retry_interval=0.02)
+    for i in range(5):
+        q.put(SQL, (i,))
+    assert wait_until(lambda: q.stats()["errors"] >= 2)
+    mysql.down = False
+    assert q.close()
+    assert mysql.values() == list(range(5)) and q.stats()["dropped"] == 0
@@ -0,0 +1,468 @@
+# write_behind.py
+# Cola de escritura diferida (write-behind) para la aplicación de escritorio.
+# Los hilos productores (lector serial, UI) sólo encolan filas; un hilo escritor
+# dedicado las agrupa y las inserta con executemany por tamaño o antigüedad.
+# Si la BD no responde, las filas pasan al diario local (spool.py).
+
+import json
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timedelta
+
+from db_pool import PoolTimeout
+
+
+# ---------------- SERIALIZACIÓN ----------------
+def _json_default(obj):
+    if isinstance(obj, datetime):
+        return {"__dt__": obj.isoformat()}
+    raise TypeError(f"No serializable: {type(obj).__name__}")
+
+
+def _json_object_hook(obj):
+    if "__dt__" in obj and len(obj) == 1:
+        return datetime.fromisoformat(obj["__dt__"])
+    return obj
+
+
+def dump_item(item) -> str:
+    """Serializa un elemento (sql, params) a una línea JSON (las fechas se conservan)."""
+    return json.dumps(item, default=_json_default, separators=(",", ":"))
+
+
+def load_item(line: str):
+    sql, params = json.loads(line, object_hook=_json_object_hook)
+    return sql, tuple(params)
+
+
+# ---------------- COLA WRITE-BEHIND ----------------
+# Tabla en MySQL con las claves ya aplicadas; permite que una reproducción del
+# diario (spool.py) nunca inserte dos veces la misma fila.
+SQL_CREATE_APLICADOS = (
+    "CREATE TABLE IF NOT EXISTS spool_aplicados ("
+    "dedup_key VARCHAR(64) PRIMARY KEY, fecha DATETIME NOT NULL)"
+)
+SQL_INSERT_APLICADO = "INSERT INTO spool_aplicados (dedup_key, fecha) VALUES (%s, %s)"
+APLICADOS_RETENCION = timedelta(days=7)
+
+# Errores de MySQL que no dependen de la fila (bloqueos, permisos, servidor
+# saturado o caído): se reintenta más tarde en lugar de rechazar las filas
+RETRY_ERRNOS = {
+    1040,   # ER_CON_COUNT_ERROR
+    1044,   # ER_DBACCESS_DENIED_ERROR
+    1053,   # ER_SERVER_SHUTDOWN
+    1142,   # ER_TABLEACCESS_DENIED_ERROR
+    1205,   # ER_LOCK_WAIT_TIMEOUT
+    1213,   # ER_LOCK_DEADLOCK
+    1227,   # ER_SPECIFIC_ACCESS_DENIED_ERROR
+}
+
+
+class WriteBehindQueue:
+    """Cola acotada en memoria con hilo escritor y lotes executemany.
+
+    policy (cuando la cola en memoria está llena):
+      - 'block': el productor espera a que haya hueco (hasta `block_timeout`).
+      - 'drop_oldest': se descarta la fila más antigua de la cola.
+      - 'spill': el hilo escritor mueve la cola en memoria al diario en disco
+        (`spool`). El productor no espera al disco: mientras tanto se admite hasta
+        el doble de `capacity` y, por encima, se descarta lo más antiguo.
+
+    Si se indica `spool` (ver spool.py), los lotes que fallan por caída de la BD
+    se guardan en él y se reproducen en orden cuando vuelve; sin diario se
+    reintentan desde memoria y, si MySQL rechaza alguna fila (no por conexión),
+    el lote se escribe fila a fila descartando las rechazadas. `adapt(sql, filas)`
+    puede reescribir cada grupo justo antes de ejecutarlo (p.ej. según el esquema
+    real de la BD); lo encolado y lo guardado en el diario no cambia. Invariante: lo que
+    está en el diario es siempre anterior a lo que está en memoria; mientras el
+    diario tenga filas, el escritor mueve los lotes de memoria a su final en vez
+    de escribirlos en MySQL, así que el orden se conserva.
+    """
+
+    POLICIES = ("block", "drop_oldest", "spill")
+
+    def __init__(self, pool, batch_size=200, max_age=0.5, capacity=10000,
+                 policy="block", spool=None, block_timeout=None,
+                 retry_interval=2.0, adapt=None):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Política desconocida: {policy}")
+        if policy == "spill" and spool is None:
+            raise ValueError("La política 'spill' requiere un spool")
+        self.pool = pool
+        self.batch_size = batch_size
+        self.max_age = max_age
+        self.capacity = capacity
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.retry_interval = retry_interval
+        self._spool = spool
+        self.adapt = adapt
+
+        self._cond = threading.Condition()
+        self._items = deque()        # (sql, params, t_encolado)
+        self._inflight = 0
+        self._flush_requested = False
+        self._spill_requested = False
+        self._closed = False
+        self._next_replay = 0.0
+        self._aplicados_ready = False
+        self._next_prune = 0.0
+
+        # Estadísticas
+        self._enqueued = 0
+        self._written = 0
+        self._batches = 0
+        self._dropped = 0
+        self._errors = 0
+        self._high_water = 0
+
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+
+    @property
+    def spool(self):
+        return self._spool
+
+    # ----------- PRODUCTORES ------------
+    def put(self, sql, params):
+        """Encola una fila. No toca la BD: sólo la política de backpressure puede bloquear."""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Cola de escritura cerrada")
+            self._enqueued += 1
+            if len(self._items) >= self.capacity:
+                if self.policy == "block":
+                    ok = self._cond.wait_for(
+                        lambda: len(self._items) < self.capacity or self._closed,
+                        self.block_timeout)
+                    if not ok or self._closed:
+                        self._dropped += 1
+                        raise TimeoutError("Cola de escritura llena")
+                elif self.policy == "drop_oldest":
+                    self._items.popleft()
+                    self._dropped += 1
+                else:
+                    # El escritor pasa la cola al diario (fuera de este lock y de
+                    # este hilo); el productor sólo lo pide y sigue
+                    self._spill_requested = True
+                    self._cond.notify_all()
+                    if len(self._items) >= 2 * self.capacity:
+                        self._items.popleft()
+                        self._dropped += 1
+            self._items.append((sql, params, time.monotonic()))
+            self._high_water = max(self._high_water, len(self._items))
+            # Primera fila: el escritor dormía sin plazo y debe empezar a contar max_age
+            if len(self._items) == 1 or len(self._items) >= self.batch_size:
+                self._cond.notify_all()
+
+    def flush(self, timeout=5.0):
+        """Fuerza la escritura de lo encolado en memoria; True si quedó en la BD
+        o a salvo en el diario dentro del plazo."""
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+            ok = self._cond.wait_for(lambda: not self._items and not self._inflight, timeout)
+            self._flush_requested = False
+            return ok
+
+    def close(self, timeout=5.0):
+        """Vacía la cola y detiene el hilo escritor (el diario se reproduce al volver a abrir)."""
+        ok = self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        return ok
+
+    # ----------- HILO ESCRITOR ------------
+    def _spool_pending_locked(self):
+        return self._spool is not None and self._spool.depth() > 0
+
+    def _replay_due_locked(self):
+        return self._spool_pending_locked() and time.monotonic() >= self._next_replay
+
+    def _batch_ready_locked(self):
+        if self._closed or self._flush_requested or self._spill_requested:
+            return bool(self._items)
+        if len(self._items) >= self.batch_size:
+            return True
+        if self._items and time.monotonic() - self._items[0][2] >= self.max_age:
+            return True
+        return self._replay_due_locked()
+
+    def _wait_timeout_locked(self):
+        timeouts = []
+        now = time.monotonic()
+        if self._items:
+            timeouts.append(self.max_age - (now - self._items[0][2]))
+        if self._spool_pending_locked():
+            timeouts.append(self._next_replay - now)
+        return max(0.0, min(timeouts)) if timeouts else None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._batch_ready_locked():
+                    if self._closed:
+                        return
+                    self._cond.wait(self._wait_timeout_locked())
+                spill, self._spill_requested = self._spill_requested, False
+                to_spool = spill or self._spool_pending_locked()
+                items_ready = self._items and (self._closed or self._flush_requested or spill
+                                               or len(self._items) >= self.batch_size
+                                               or time.monotonic() - self._items[0][2] >= self.max_age)
+                if items_ready:
+                    # Con diario pendiente, todo lo que hay en memoria va a su final de una vez
+                    n = len(self._items) if to_spool else min(self.batch_size, len(self._items))
+                    batch = [self._items.popleft()[:2] for _ in range(n)]
+                    self._inflight = len(batch)
+                else:
+                    batch = None
+                self._cond.notify_all()
+
+            if batch is None:
+                self._replay_once()
+                continue
+
+            if to_spool:
+                try:
+                    self._spool.append(batch)
+                except Exception:
+                    # Disco no disponible: devolver a memoria y reintentar luego
+                    with self._cond:
+                        self._errors += 1
+                        now = time.monotonic()
+                        self._items.extendleft((q, p, now) for q, p in reversed(batch))
+                        self._inflight = 0
+                        self._cond.notify_all()
+                    time.sleep(self.retry_interval)
+                    continue
+                with self._cond:
+                    self._inflight = 0
+                    self._cond.notify_all()
+                continue
+
+            lote = uuid.uuid4().hex if self._spool is not None else None
+            try:
+                self._write_batch(batch, lote)
+            except Exception as e:
+                self._on_batch_failed(batch, lote, e)
+                continue
+
+            with self._cond:
+                self._written += len(batch)
+                self._batches += 1
+                self._inflight = 0
+                self._cond.notify_all()
+
+    def _on_batch_failed(self, batch, lote, error):
+        if self._spool is not None:
+            try:
+                # Sólo este hilo escribe en el diario y el lote se sacó con el diario
+                # vacío: al añadirlo al final sigue siendo lo más antiguo que hay en él
+                self._spool.append(batch, lote=lote)
+            except Exception:
+                pass   # disco no disponible: el lote se queda en memoria (abajo)
+            else:
+                with self._cond:
+                    self._errors += 1
+                    self._next_replay = time.monotonic() + self.retry_interval
+                    self._inflight = 0
+                    self._cond.notify_all()
+                return
+        elif not self._retryable(error):
+            # MySQL rechaza alguna fila: se escriben de una en una y se descartan
+            # las rechazadas, para que una fila mala no bloquee la cola entera
+            batch = self._write_rows_one_by_one(batch)
+            if not batch:
+                return
+        # Reintentar más tarde conservando el orden
+        self._requeue(batch)
+
+    def _write_rows_one_by_one(self, batch):
+        """Escribe fila a fila; devuelve lo pendiente si se pierde la conexión."""
+        for i, row in enumerate(batch):
+            try:
+                self._write_batch([row])
+            except Exception as e:
+                if self._retryable(e):
+                    return batch[i:]
+                with self._cond:
+                    self._errors += 1
+                    self._dropped += 1
+            else:
+                with self._cond:
+                    self._written += 1
+                    self._batches += 1
+        with self._cond:
+            self._inflight = 0
+            self._cond.notify_all()
+        return []
+
+    def _requeue(self, batch):
+        with self._cond:
+            self._errors += 1
+            now = time.monotonic()
+            self._items.extendleft((sql, params, now) for sql, params in reversed(batch))
+            self._inflight = 0
+            self._cond.notify_all()
+            closing = self._closed
+        if not closing:
+            time.sleep(self.retry_interval)
+
+    def _write_batch(self, batch, lote=None):
+        """Escribe un lote en una sola transacción, agrupando sentencias iguales consecutivas.
+
+        Con `lote`, se registra también su clave en 'spool_aplicados' dentro de la
+        misma transacción (una fila extra por lote).
+        """
+        if lote is not None:
+            self._ensure_aplicados()
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
+            try:
+                for sql, rows in self._runs(batch):
+                    if len(rows) == 1:
+                        cur.execute(sql, rows[0])
+                    else:
+                        cur.executemany(sql, rows)
+                if lote is not None:
+                    cur.execute(SQL_INSERT_APLICADO, (lote, datetime.now()))
+                conn.commit()
+            finally:
+                cur.close()
+        self._prune_aplicados()
+
+    def _runs(self, batch):
+        runs = group_runs(batch)
+        return [self.adapt(sql, rows) for sql, rows in runs] if self.adapt else runs
+
+    def _ensure_aplicados(self):
+        if not self._aplicados_ready:
+            self.pool.execute(SQL_CREATE_APLICADOS)
+            self._aplicados_ready = True
+
+    def _prune_aplicados(self):
+        """Borra periódicamente claves antiguas de 'spool_aplicados'."""
+        if self._spool is None or time.monotonic() < self._next_prune:
+            return
+        self._next_prune = time.monotonic() + 3600
+        try:
+            self.pool.execute("DELETE FROM spool_aplicados WHERE fecha < %s",
+                              (datetime.now() - APLICADOS_RETENCION,))
+        except Exception:
+            pass
+
+    # ----------- REPRODUCCIÓN DEL DIARIO ------------
+    def _replay_once(self):
+        """Reproduce un bloque del diario; ante fallo de conexión, bloqueo o permisos
+        pospone el reintento. Sólo se rechaza una fila cuando es ella la que falla."""
+        rows = self._spool.read_chunk(self.batch_size)
+        if not rows:
+            return
+        try:
+            # Sin la tabla de claves no se puede reproducir nada sin duplicar
+            self._ensure_aplicados()
+        except Exception:
+            self._postpone_replay()
+            return
+        t0 = time.monotonic()
+        try:
+            applied = self._replay_rows(rows)
+            self._spool.ack(rows[-1][0], len(rows))
+        except Exception as e:
+            if self._retryable(e):
+                self._postpone_replay()
+                return
+            # Alguna fila es rechazada por MySQL: se aplica de una en una
+            applied = 0
+            for row in rows:
+                try:
+                    applied += self._replay_rows([row])
+                    self._spool.ack(row[0], 1)
+                except Exception as e:
+                    if self._retryable(e):
+                        self._postpone_replay()
+                        return
+                    self._spool.reject(row, e)
+        elapsed = time.monotonic() - t0
+        if elapsed > 0:
+            self._spool.replay_rows_s = len(rows) / elapsed
+        with self._cond:
+            self._written += applied
+            self._batches += 1
+            self._cond.notify_all()
+
+    def _postpone_replay(self):
+        with self._cond:
+            self._errors += 1
+            self._next_replay = time.monotonic() + self.retry_interval
+
+    def _replay_rows(self, rows):
+        """Aplica filas del diario saltando las que ya constan en 'spool_aplicados'.
+        Devuelve cuántas se insertaron realmente."""
+        keys = {key for _seq, key, _lote, _sql, _params in rows}
+        keys.update(lote for _seq, _key, lote, _sql, _params in rows if lote)
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
+            try:
+                marks = ", ".join(["%s"] * len(keys))
+                cur.execute(f"SELECT dedup_key FROM spool_aplicados WHERE dedup_key IN ({marks})",
+                            tuple(keys))
+                done = {r[0] for r in cur.fetchall()}
+                pending = [r for r in rows if r[1] not in done and r[2] not in done]
+                now = datetime.now()
+                for sql, params in self._runs((r[3], r[4]) for r in pending):
+                    if len(params) == 1:
+                        cur.execute(sql, params[0])
+                    else:
+                        cur.executemany(sql, params)
+                if pending:
+                    cur.executemany(SQL_INSERT_APLICADO, [(r[1], now) for r in pending])
+                conn.commit()
+            finally:
+                cur.close()
+        if len(pending) < len(rows):
+            self._spool.duplicates += len(rows) - len(pending)
+        return len(pending)
+
+    def _connection_errors(self):
+        return tuple(self.pool.connection_errors) + (PoolTimeout,)
+
+    def _retryable(self, error):
+        """True si el error no es culpa de las filas y basta con reintentar más tarde."""
+        return (isinstance(error, self._connection_errors())
+                or getattr(error, "errno", None) in RETRY_ERRNOS)
+
+    def stats(self):
+        with self._cond:
+            st = {
+                "enqueued": self._enqueued,
+                "written": self._written,
+                "batches": self._batches,
+                "avg_batch": (self._written / self._batches) if self._batches else 0.0,
+                "dropped": self._dropped,
+                "errors": self._errors,
+                "queued": len(self._items),
+                "high_water": self._high_water,
+            }
+        if self._spool is not None:
+            st.update(self._spool.stats())
+        else:
+            st.update({"spool_depth": 0, "spooled": 0, "replayed": 0,
+                       "replay_rows_s": 0.0, "duplicates": 0, "rejected": 0})
+        return st
+
+
+def group_runs(batch):
+    """Agrupa elementos (sql, params) consecutivos con la misma sentencia,
+    conservando el orden original entre grupos."""
+    runs = []
+    for sql, params in batch:
+        if runs and runs[-1][0] == sql:
+            runs[-1][1].append(params)
+        else:
+            runs.append((sql, [params]))
+    return runs
@@ -33,12 +33,42 @@ unsigned long lastApiUpdate = 0;
 const unsigned long SENSOR_INTERVAL = 2000;
 const unsigned long API_INTERVAL = 3000;
 
+// Protocolo serial con la app de escritorio: JSON por líneas o binario
+// (negociado con {"proto":"bin"} / {"proto":"json"}). Ver app/serial_protocol.py
+bool protoBinario = false;
+uint16_t serialSeq = 0;
+uint8_t ledsEnviados = 0xFF;
+String serialCmd = "";
+
 int menuState = 0;
 int subMenuState = 0;
 String currentUser = "";
+// Envío de lecturas por lotes a /sensores/lote (false = una petición por lectura)
+bool modoLote = true;
+const int LOTE_CAPACIDAD = 64;               // lecturas guardadas como máximo (se pisan las más viejas)
+const int LOTE_TAMANO = 20;                  // lecturas que disparan un envío
+const unsigned long LOTE_INTERVALO = 30000;  // ms máximos entre envíos
+const unsigned long LOTE_REINTENTO_MIN = 1000;  // primera espera tras un envío fallido (se duplica)
+const uint16_t LOTE_HTTP_TIMEOUT = 3000;     // ms máximos que un envío bloquea el loop()
+struct LecturaLote {
+  float valor;
+  unsigned long t;
+  uint32_t seq;
+};
+LecturaLote lote[LOTE_CAPACIDAD];
+int loteInicio = 0;
+int loteCuenta = 0;
+uint32_t loteSeq = 0;
+uint32_t arranqueId = 0;   // distingue las secuencias de cada arranque
+unsigned long ultimoEnvioLote = 0;
+unsigned long loteEspera = 0;   // backoff tras fallos (0 = último envío correcto)
+String dispositivoId = "";
+
+// ETag de la última respuesta de /eventos: si nada cambió la API responde 304 sin cuerpo
+String etagEventos = "";
 
 void setup() {
-  Serial.begin(9600);
+  Serial.begin(115200);  // debe coincidir con BAUD_RATE de la app de escritorio
 
   pinMode(TRIG_PIN, OUTPUT);
   pinMode(ECHO_PIN, INPUT);
@@ -73,6 +103,8 @@ void setup() {
   lcd.clear();
   lcd.setCursor(0, 0);
   lcd.print("WiFi Conectado");
+  dispositivoId = WiFi.macAddress();
+  arranqueId = esp_random() & 0x7FFFFFFF;
   delay(2000);
 
   mostrarMenuPrincipal();
@@ -82,6 +114,7 @@ void loop() {
   unsigned long currentMillis = millis();
 
   leerPulsadores();
+  leerComandoSerial();
 
   char key = leerTecladoMatricial();
   if (key) {
@@ -91,7 +124,20 @@ void loop() {
   if (currentMillis - lastSensorRead >= SENSOR_INTERVAL) {
     lastSensorRead = currentMillis;
     float distancia = leerDistancia();
-    enviarSensorAPI(distancia);
+    enviarTramaSerial(distancia);
+    if (modoLote) {
+      encolarLectura(distancia, currentMillis);
+    } else {
+      enviarSensorAPI(distancia);
+    }
+  }
+
+  // Tras un fallo no se reintenta hasta pasada la espera, aunque el lote esté lleno:
+  // un POST bloqueante en cada pasada dejaría sin atender teclado, botones y sensor
+  if (modoLote && loteCuenta > 0 &&
+      (loteEspera == 0 || currentMillis - ultimoEnvioLote >= loteEspera) &&
+      (loteCuenta >= LOTE_TAMANO || currentMillis - ultimoEnvioLote >= LOTE_INTERVALO)) {
+    enviarLoteAPI();
   }
 
   if (currentMillis - lastApiUpdate >= API_INTERVAL) {
@@ -117,6 +163,83 @@ float leerDistancia() {
   return distancia;
 }
 
+uint16_t crc16Ccitt(const uint8_t* data, size_t len) {
+  uint16_t crc = 0xFFFF;
+  for (size_t i = 0; i < len; i++) {
+    crc ^= (uint16_t)data[i] << 8;
+    for (int b = 0; b < 8; b++) {
+      crc = (crc & 0x8000) ? (crc << 1) ^ 0x1021 : (crc << 1);
+    }
+  }
+  return crc;
+}
+
+void leerComandoSerial() {
+  while (Serial.available()) {
+    char c = Serial.read();
+    if (c == '\n') {
+      if (serialCmd.indexOf("\"proto\"") >= 0) {
+        protoBinario = serialCmd.indexOf("\"bin\"") >= 0;
+        ledsEnviados = 0xFF;
+      }
+      serialCmd = "";
+    } else if (serialCmd.length() < 64) {
+      serialCmd += c;
+    }
+  }
+}
+
+void enviarTramaSerial(float distancia) {
+  uint8_t puls = 0;
+  uint8_t leds = 0;
+  for (int i = 0; i < 3; i++) {
+    if (lastBtnStates[i]) puls |= (1 << i);
+    if (ledStates[i]) leds |= (1 << i);
+  }
+  // Los LEDs sólo se informan cuando cambian
+  bool enviarLeds = leds != ledsEnviados;
+  ledsEnviados = leds;
+
+  if (protoBinario) {
+    uint8_t f[13];
+    uint16_t dist = (uint16_t)(distancia * 10);
+    f[0] = 0xAA;
+    f[1] = 0x55;
+    f[2] = 8;      // len
+    f[3] = 0x01;   // TIPO_DATOS
+    f[4] = serialSeq & 0xFF;
+    f[5] = serialSeq >> 8;
+    f[6] = dist & 0xFF;
+    f[7] = dist >> 8;
+    f[8] = puls;
+    f[9] = leds;
+    f[10] = 0x03 | (enviarLeds ? 0x04 : 0);
+    uint16_t crc = crc16Ccitt(f + 2, 9);
+    f[11] = crc & 0xFF;
+    f[12] = crc >> 8;
+    Serial.write(f, sizeof(f));
+    serialSeq++;
+  } else {
+    Serial.print("{\"sensor\":");
+    Serial.print(distancia, 1);
+    Serial.print(",\"pulsadores\":[");
+    for (int i = 0; i < 3; i++) {
+      Serial.print((puls >> i) & 1);
+      if (i < 2) Serial.print(",");
+    }
+    Serial.print("]");
+    if (enviarLeds) {
+      Serial.print(",\"leds\":[");
+      for (int i = 0; i < 3; i++) {
+        Serial.print(((leds >> i) & 1) ? "true" : "false");
+        if (i < 2) Serial.print(",");
+      }
+      Serial.print("]");
+    }
+    Serial.println("}");
+  }
+}
+
 void leerPulsadores() {
   for (int i = 0; i < 3; i++) {
     bool currentState = digitalRead(BTN_PINS[i]);
@@ -338,6 +461,67 @@ void enviarSensorAPI(float distancia) {
   }
 }
 
+void encolarLectura(float distancia, unsigned long t) {
+  if (loteCuenta == LOTE_CAPACIDAD) {
+    // Sin red durante mucho tiempo: se descarta la lectura más antigua
+    loteInicio = (loteInicio + 1) % LOTE_CAPACIDAD;
+    loteCuenta--;
+  }
+  int pos = (loteInicio + loteCuenta) % LOTE_CAPACIDAD;
+  lote[pos].valor = distancia;
+  lote[pos].t = t;
+  lote[pos].seq = loteSeq++;
+  loteCuenta++;
+}
+
+void fallarLote() {
+  loteEspera = loteEspera == 0 ? LOTE_REINTENTO_MIN : min(loteEspera * 2, LOTE_INTERVALO);
+}
+
+void enviarLoteAPI() {
+  ultimoEnvioLote = millis();
+  if (WiFi.status() != WL_CONNECTED) {
+    fallarLote();
+    return;
+  }
+
+  HTTPClient http;
+  String url = String(apiUrl) + "/sensores/lote";
+  http.begin(url);
+  http.setConnectTimeout(LOTE_HTTP_TIMEOUT);
+  http.setTimeout(LOTE_HTTP_TIMEOUT);
+  http.addHeader("Content-Type", "application/json");
+
+  // seq = arranque (31 bits) << 32 | contador: reintentar un lote no duplica filas
+  DynamicJsonDocument doc(8192);
+  doc["dispositivo"] = dispositivoId;
+  JsonArray lecturas = doc.createNestedArray("lecturas");
+  int enviadas = loteCuenta;
+  unsigned long ahora = millis();
+  for (int i = 0; i < enviadas; i++) {
+    LecturaLote& l = lote[(loteInicio + i) % LOTE_CAPACIDAD];
+    JsonObject item = lecturas.createNestedObject();
+    item["valor"] = l.valor;
+    item["seq"] = ((uint64_t)arranqueId << 32) | l.seq;
+    item["edad_ms"] = ahora - l.t;
+  }
+
+  String jsonString;
+  serializeJson(doc, jsonString);
+
+  int httpCode = http.POST(jsonString);
+  http.end();
+
+  // 201: todo insertado; 207: hubo lecturas inválidas que no tiene sentido reintentar
+  if (httpCode == 201 || httpCode == 207) {
+    loteInicio = (loteInicio + enviadas) % LOTE_CAPACIDAD;
+    loteCuenta -= enviadas;
+    loteEspera = 0;
+  } else {
+    fallarLote();
+  }
+}
+
 void actualizarLedAPI(int ledId, bool estado) {
   if (WiFi.status() == WL_CONNECTED) {
     HTTPClient http;
@@ -363,10 +547,17 @@ void verificarLogin() {
     HTTPClient http;
     String url = String(apiUrl) + "/eventos?limit=1";
     http.begin(url);
+    const char* cabeceras[] = {"ETag"};
+    http.collectHeaders(cabeceras, 1);
+    if (etagEventos.length() > 0) {
+      http.addHeader("If-None-Match", etagEventos);
+    }
 
     int httpCode = http.GET();
 
+    // 304: el último evento no cambió, no hay nada que descargar ni parsear
     if (httpCode == 200) {
+      etagEventos = http.header("ETag");
       String payload = http.getString();
       DynamicJsonDocument doc(1024);
       deserializeJson(doc, payload);
@@ -8,6 +8,7 @@ def main():
     parser.add_argument("--password", "-p", help="Contraseña en texto plano. Si se omite, se pedirá por entrada segura.")
     parser.add_argument("--username", "-u", help="Nombre de usuario (opcional, para generar SQL INSERT)")
     parser.add_argument("--role", "-r", default="user", help="Rol del usuario (por defecto: user). Solo se usa al imprimir SQL INSERT si tu tabla lo tiene.")
+    parser.add_argument("--rounds", type=int, default=12, help="Coste de bcrypt (por defecto: 12). Debe coincidir con BCRYPT_ROUNDS de la app y la API para evitar el rehash en el primer login.")
     parser.add_argument("--sql", action="store_true", help="Imprimir sentencia SQL INSERT lista para MySQL (no ejecuta nada)")
     args = parser.parse_args()
 
@@ -19,7 +20,7 @@ def main():
         if pwd_plain != confirm:
             raise SystemExit("Las contraseñas no coinciden.")
 
-    hashed = bcrypt.hashpw(pwd_plain.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    hashed = bcrypt.hashpw(pwd_plain.encode("utf-8"), bcrypt.gensalt(args.rounds)).decode("utf-8")
 
     print("Hash bcrypt generado:")
     print(hashed)
@@ -0,0 +1,93 @@
+/*
+  # Estadísticas de sensores calculadas en la base de datos
+
+  1. Funciones Nuevas
+    - `sensor_estadisticas(p_desde, p_hasta, p_tipo, p_percentiles)`
+      - Devuelve un único objeto json con `total`, `promedio`, `minimo`, `maximo`,
+        `desviacion` y `percentiles` (array en el mismo orden que `p_percentiles`)
+      - Sin `p_desde`/`p_hasta` cubre todo el histórico
+    - `sensor_estadisticas_buckets(p_bucket, p_desde, p_hasta, p_tipo, p_percentiles)`
+      - Una fila por intervalo (`minute`, `hour` o `day`) con los mismos agregados
+
+  2. Índices
+    - `idx_sensores_tipo_fecha` para filtrar por tipo y rango de fechas
+
+  3. Notas
+    - El cliente sólo recibe los agregados: el coste de red y de CPU en la API
+      ya no depende del número de filas
+*/
+
+CREATE INDEX IF NOT EXISTS idx_sensores_tipo_fecha ON sensores(tipo, fecha DESC);
+
+CREATE OR REPLACE FUNCTION sensor_estadisticas(
+  p_desde timestamptz DEFAULT NULL,
+  p_hasta timestamptz DEFAULT NULL,
+  p_tipo text DEFAULT NULL,
+  p_percentiles float8[] DEFAULT '{}'
+)
+RETURNS json
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT json_build_object(
+    'total', count(*),
+    'promedio', coalesce(avg(valor), 0),
+    'minimo', coalesce(min(valor), 0),
+    'maximo', coalesce(max(valor), 0),
+    'desviacion', coalesce(stddev_samp(valor), 0),
+    'percentiles', CASE
+      WHEN cardinality(p_percentiles) = 0 OR count(*) = 0 THEN '{}'::float8[]
+      ELSE percentile_cont(p_percentiles) WITHIN GROUP (ORDER BY valor::float8)
+    END
+  )
+  FROM sensores
+  WHERE (p_desde IS NULL OR fecha >= p_desde)
+    AND (p_hasta IS NULL OR fecha < p_hasta)
+    AND (p_tipo IS NULL OR tipo = p_tipo);
+$$;
+
+CREATE OR REPLACE FUNCTION sensor_estadisticas_buckets(
+  p_bucket text,
+  p_desde timestamptz DEFAULT NULL,
+  p_hasta timestamptz DEFAULT NULL,
+  p_tipo text DEFAULT NULL,
+  p_percentiles float8[] DEFAULT '{}'
+)
+RETURNS TABLE (
+  bucket timestamptz,
+  total bigint,
+  promedio numeric,
+  minimo numeric,
+  maximo numeric,
+  percentiles float8[]
+)
+LANGUAGE plpgsql
+STABLE
+AS $$
+BEGIN
+  IF p_bucket NOT IN ('minute', 'hour', 'day') THEN
+    RAISE EXCEPTION 'bucket inválido: %', p_bucket USING ERRCODE = '22023';
+  END IF;
+
+  RETURN QUERY
+  SELECT
+    date_trunc(p_bucket, s.fecha) AS bucket,
+    count(*) AS total,
+    avg(s.valor) AS promedio,
+    min(s.valor) AS minimo,
+    max(s.valor) AS maximo,
+    CASE
+      WHEN cardinality(p_percentiles) = 0 THEN '{}'::float8[]
+      ELSE percentile_cont(p_percentiles) WITHIN GROUP (ORDER BY s.valor::float8)
+    END AS percentiles
+  FROM sensores s
+  WHERE (p_desde IS NULL OR s.fecha >= p_desde)
+    AND (p_hasta IS NULL OR s.fecha < p_hasta)
+    AND (p_tipo IS NULL OR s.tipo = p_tipo)
+  GROUP BY 1
+  ORDER BY 1;
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION sensor_estadisticas(timestamptz, timestamptz, text, float8[]) TO anon, authenticated;
+GRANT EXECUTE ON FUNCTION sensor_estadisticas_buckets(text, timestamptz, timestamptz, text, float8[]) TO anon, authenticated;
@@ -0,0 +1,194 @@
+/*
+  # Agregados incrementales del histórico de sensores (minuto / hora / día)
+
+  1. Tablas Nuevas
+    - `sensores_1m`, `sensores_1h`, `sensores_1d` (misma estructura)
+      - `tipo` (text, not null)
+      - `bucket` (timestamp with timezone, inicio del intervalo)
+      - `total` (bigint), `minimo` / `maximo` (numeric)
+      - `suma` / `suma_cuadrados` (double precision) para media y desviación
+      - primary key (`tipo`, `bucket`)
+
+  2. Alimentación
+    - Trigger por sentencia sobre `sensores` (tabla de transición): cada INSERT,
+      individual o por lotes, se agrupa y se suma a las tres tablas con un upsert
+    - Las filas ya existentes se cargan una vez al aplicar la migración
+
+  3. Funciones Nuevas
+    - `sensor_serie(p_resolucion, p_desde, p_hasta, p_tipo)`: serie con
+      total, promedio, mínimo, máximo y desviación por intervalo
+    - `purgar_sensores(p_dias_crudo, p_dias_minuto)`: borra las lecturas crudas
+      y los agregados por minuto más antiguos que N días; los agregados por hora
+      y día se conservan
+
+  4. Notas
+    - Borrar lecturas crudas no modifica los agregados
+    - Con pg_cron se puede programar la retención, p.ej.:
+        SELECT cron.schedule('purgar-sensores', '15 3 * * *', 'SELECT purgar_sensores(30, 90)');
+*/
+
+CREATE TABLE IF NOT EXISTS sensores_1m (
+  tipo text NOT NULL,
+  bucket timestamptz NOT NULL,
+  total bigint NOT NULL,
+  minimo numeric NOT NULL,
+  maximo numeric NOT NULL,
+  suma double precision NOT NULL,
+  suma_cuadrados double precision NOT NULL,
+  PRIMARY KEY (tipo, bucket)
+);
+
+CREATE TABLE IF NOT EXISTS sensores_1h (LIKE sensores_1m INCLUDING ALL);
+CREATE TABLE IF NOT EXISTS sensores_1d (LIKE sensores_1m INCLUDING ALL);
+
+CREATE INDEX IF NOT EXISTS idx_sensores_1m_bucket ON sensores_1m(bucket);
+CREATE INDEX IF NOT EXISTS idx_sensores_1h_bucket ON sensores_1h(bucket);
+CREATE INDEX IF NOT EXISTS idx_sensores_1d_bucket ON sensores_1d(bucket);
+
+-- Sentencia que suma un conjunto de lecturas (tabla de transición o carga inicial)
+-- a una tabla de agregados. Devuelve el texto: la tabla de transición sólo es
+-- visible para las consultas ejecutadas dentro de la propia función del trigger.
+CREATE OR REPLACE FUNCTION sensores_rollup_sql(p_tabla text, p_unidad text, p_origen text)
+RETURNS text
+LANGUAGE plpgsql
+IMMUTABLE
+AS $$
+BEGIN
+  RETURN format(
+    'INSERT INTO %I AS r (tipo, bucket, total, minimo, maximo, suma, suma_cuadrados)
+     SELECT tipo, date_trunc(%L, fecha), count(*), min(valor), max(valor),
+            sum(valor::float8), sum(valor::float8 * valor::float8)
+     FROM %I
+     WHERE fecha IS NOT NULL
+     GROUP BY 1, 2
+     ON CONFLICT (tipo, bucket) DO UPDATE SET
+       total = r.total + EXCLUDED.total,
+       minimo = least(r.minimo, EXCLUDED.minimo),
+       maximo = greatest(r.maximo, EXCLUDED.maximo),
+       suma = r.suma + EXCLUDED.suma,
+       suma_cuadrados = r.suma_cuadrados + EXCLUDED.suma_cuadrados',
+    p_tabla, p_unidad, p_origen);
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION sensores_rollup_trigger()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  EXECUTE sensores_rollup_sql('sensores_1m', 'minute', 'sensores_nuevos');
+  EXECUTE sensores_rollup_sql('sensores_1h', 'hour', 'sensores_nuevos');
+  EXECUTE sensores_rollup_sql('sensores_1d', 'day', 'sensores_nuevos');
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_sensores_rollup ON sensores;
+CREATE TRIGGER trg_sensores_rollup
+  AFTER INSERT ON sensores
+  REFERENCING NEW TABLE AS sensores_nuevos
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION sensores_rollup_trigger();
+
+-- Carga inicial con las lecturas existentes
+TRUNCATE sensores_1m, sensores_1h, sensores_1d;
+DO $$
+BEGIN
+  EXECUTE sensores_rollup_sql('sensores_1m', 'minute', 'sensores');
+  EXECUTE sensores_rollup_sql('sensores_1h', 'hour', 'sensores');
+  EXECUTE sensores_rollup_sql('sensores_1d', 'day', 'sensores');
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION sensor_serie(
+  p_resolucion text,
+  p_desde timestamptz,
+  p_hasta timestamptz,
+  p_tipo text DEFAULT NULL
+)
+RETURNS TABLE (
+  bucket timestamptz,
+  total bigint,
+  promedio double precision,
+  minimo numeric,
+  maximo numeric,
+  desviacion double precision
+)
+LANGUAGE plpgsql
+STABLE
+AS $$
+DECLARE
+  v_tabla text;
+BEGIN
+  v_tabla := CASE p_resolucion
+    WHEN '1m' THEN 'sensores_1m'
+    WHEN '1h' THEN 'sensores_1h'
+    WHEN '1d' THEN 'sensores_1d'
+  END;
+  IF v_tabla IS NULL THEN
+    RAISE EXCEPTION 'resolución inválida: %', p_resolucion USING ERRCODE = '22023';
+  END IF;
+
+  -- Con p_tipo NULL se combinan todos los tipos del mismo intervalo
+  RETURN QUERY EXECUTE format(
+    'SELECT bucket, sum(total)::bigint, sum(suma) / sum(total),
+            min(minimo), max(maximo),
+            CASE WHEN sum(total) > 1 THEN
+              sqrt(greatest(sum(suma_cuadrados) - sum(suma) ^ 2 / sum(total), 0) / (sum(total) - 1))
+            ELSE 0 END
+     FROM %I
+     WHERE bucket >= date_trunc(%L, $1) AND bucket < $2
+       AND ($3 IS NULL OR tipo = $3)
+     GROUP BY bucket
+     ORDER BY bucket',
+    v_tabla,
+    CASE p_resolucion WHEN '1m' THEN 'minute' WHEN '1h' THEN 'hour' ELSE 'day' END)
+  USING p_desde, p_hasta, p_tipo;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION purgar_sensores(p_dias_crudo integer, p_dias_minuto integer DEFAULT 90)
+RETURNS json
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  v_crudo bigint;
+  v_minuto bigint;
+BEGIN
+  IF p_dias_crudo IS NULL OR p_dias_crudo < 1 THEN
+    RAISE EXCEPTION 'p_dias_crudo debe ser >= 1' USING ERRCODE = '22023';
+  END IF;
+  DELETE FROM sensores WHERE fecha < now() - make_interval(days => p_dias_crudo);
+  GET DIAGNOSTICS v_crudo = ROW_COUNT;
+  DELETE FROM sensores_1m WHERE bucket < now() - make_interval(days => greatest(p_dias_minuto, p_dias_crudo));
+  GET DIAGNOSTICS v_minuto = ROW_COUNT;
+  RETURN json_build_object('crudo', v_crudo, 'minuto', v_minuto);
+END;
+$$;
+
+ALTER TABLE sensores_1m ENABLE ROW LEVEL SECURITY;
+ALTER TABLE sensores_1h ENABLE ROW LEVEL SECURITY;
+ALTER TABLE sensores_1d ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Authenticated users can read sensores_1m"
+  ON sensores_1m FOR SELECT
+  TO authenticated
+  USING (true);
+
+CREATE POLICY "Authenticated users can read sensores_1h"
+  ON sensores_1h FOR SELECT
+  TO authenticated
+  USING (true);
+
+CREATE POLICY "Authenticated users can read sensores_1d"
+  ON sensores_1d FOR SELECT
+  TO authenticated
+  USING (true);
+
+GRANT EXECUTE ON FUNCTION sensor_serie(text, timestamptz, timestamptz, text) TO anon, authenticated;
+REVOKE EXECUTE ON FUNCTION purgar_sensores(integer, integer) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION purgar_sensores(integer, integer) TO service_role;
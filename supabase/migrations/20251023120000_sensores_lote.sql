@@ -0,0 +1,29 @@
+/*
+  # Ingesta por lotes de lecturas de sensores
+
+  1. Cambios en `sensores`
+    - `dispositivo` (text, nullable): identificador del equipo que envía la lectura
+      (el ESP32 usa su dirección MAC)
+    - `seq` (bigint, nullable): número de secuencia asignado por el dispositivo
+    - restricción única (`dispositivo`, `seq`): reenviar un lote tras un fallo de red
+      no duplica filas (POST /api/sensores/lote inserta con ON CONFLICT DO NOTHING).
+      Las filas sin dispositivo o sin seq no participan (NULL nunca choca)
+
+  2. Índices
+    - `idx_sensores_dispositivo_fecha` para consultar por dispositivo
+*/
+
+ALTER TABLE sensores ADD COLUMN IF NOT EXISTS dispositivo text;
+ALTER TABLE sensores ADD COLUMN IF NOT EXISTS seq bigint;
+
+DO $$
+BEGIN
+  IF NOT EXISTS (
+    SELECT 1 FROM pg_constraint WHERE conname = 'sensores_dispositivo_seq_key'
+  ) THEN
+    ALTER TABLE sensores ADD CONSTRAINT sensores_dispositivo_seq_key UNIQUE (dispositivo, seq);
+  END IF;
+END;
+$$;
+
+CREATE INDEX IF NOT EXISTS idx_sensores_dispositivo_fecha ON sensores(dispositivo, fecha DESC);
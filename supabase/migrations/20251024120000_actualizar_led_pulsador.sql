@@ -0,0 +1,78 @@
+/*
+  # Escritura de LEDs y pulsadores en una sola llamada
+
+  1. Funciones Nuevas
+    - `actualizar_led(p_led_id, p_estado, p_usuario, p_fuente)`
+      - Actualiza `leds`, inserta en `led_hist` y en `eventos` en la misma transacción
+      - Devuelve json {led, hist, evento} o NULL si el LED no existe
+    - `actualizar_pulsador(p_pulsador_id, p_estado, p_usuario, p_fuente)`
+      - Actualiza `pulsadores` e inserta en `pulsador_hist` en la misma transacción
+      - Devuelve json {pulsador, hist} o NULL si el pulsador no existe
+
+  2. Notas
+    - La API pasa de 2-3 peticiones HTTP por PUT a una sola, y ya no pueden quedar
+      escrituras a medias (estado actualizado sin histórico, etc.)
+*/
+
+CREATE OR REPLACE FUNCTION actualizar_led(
+  p_led_id integer,
+  p_estado boolean,
+  p_usuario text DEFAULT 'API',
+  p_fuente text DEFAULT 'WEB'
+)
+RETURNS json
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_led leds;
+  v_hist led_hist;
+  v_evento eventos;
+BEGIN
+  UPDATE leds SET estado = p_estado WHERE id = p_led_id RETURNING * INTO v_led;
+  IF NOT FOUND THEN
+    RETURN NULL;
+  END IF;
+
+  INSERT INTO led_hist (usuario, led_id, estado, fuente, fecha)
+  VALUES (p_usuario, p_led_id, p_estado, p_fuente, now())
+  RETURNING * INTO v_hist;
+
+  INSERT INTO eventos (usuario, accion, detalles, fecha)
+  VALUES (p_usuario, 'led_toggle',
+          format('LED %s -> %s (%s)', p_led_id, CASE WHEN p_estado THEN 'ON' ELSE 'OFF' END, p_fuente),
+          now())
+  RETURNING * INTO v_evento;
+
+  RETURN json_build_object('led', row_to_json(v_led), 'hist', row_to_json(v_hist),
+                           'evento', row_to_json(v_evento));
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION actualizar_pulsador(
+  p_pulsador_id integer,
+  p_estado boolean,
+  p_usuario text DEFAULT 'API',
+  p_fuente text DEFAULT 'WEB'
+)
+RETURNS json
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_pulsador pulsadores;
+  v_hist pulsador_hist;
+BEGIN
+  UPDATE pulsadores SET estado = p_estado WHERE id = p_pulsador_id RETURNING * INTO v_pulsador;
+  IF NOT FOUND THEN
+    RETURN NULL;
+  END IF;
+
+  INSERT INTO pulsador_hist (usuario, pulsador_id, estado, fuente, fecha)
+  VALUES (p_usuario, p_pulsador_id, p_estado, p_fuente, now())
+  RETURNING * INTO v_hist;
+
+  RETURN json_build_object('pulsador', row_to_json(v_pulsador), 'hist', row_to_json(v_hist));
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION actualizar_led(integer, boolean, text, text) TO anon, authenticated;
+GRANT EXECUTE ON FUNCTION actualizar_pulsador(integer, boolean, text, text) TO anon, authenticated;
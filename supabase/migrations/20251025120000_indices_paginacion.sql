@@ -0,0 +1,27 @@
+/*
+  # Índices para la paginación por clave de los endpoints de listado
+
+  1. Índices
+    - (`fecha` DESC, `id` DESC) en `sensores`, `eventos`, `led_hist` y `pulsador_hist`:
+      la API recorre las páginas con `WHERE (fecha, id) < (cursor)` ordenado por
+      ambas columnas, sin OFFSET
+    - (`dispositivo`, `fecha` DESC, `id` DESC) en `sensores` y (`usuario`, `fecha` DESC,
+      `id` DESC) en `eventos` para los filtros más habituales
+
+  2. Notas
+    - Sustituyen a los índices solo por `fecha` del esquema inicial
+*/
+
+CREATE INDEX IF NOT EXISTS idx_sensores_fecha_id ON sensores(fecha DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_eventos_fecha_id ON eventos(fecha DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_led_hist_fecha_id ON led_hist(fecha DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_pulsador_hist_fecha_id ON pulsador_hist(fecha DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_sensores_dispositivo_fecha_id ON sensores(dispositivo, fecha DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_eventos_usuario_fecha_id ON eventos(usuario, fecha DESC, id DESC);
+
+DROP INDEX IF EXISTS idx_sensores_fecha;
+DROP INDEX IF EXISTS idx_eventos_fecha;
+DROP INDEX IF EXISTS idx_led_hist_fecha;
+DROP INDEX IF EXISTS idx_pulsador_hist_fecha;
+DROP INDEX IF EXISTS idx_sensores_dispositivo_fecha;
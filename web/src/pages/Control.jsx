@@ -1,6 +1,6 @@
 import { useEffect, useState } from 'react'
 import { useAuth } from '../context/AuthContext'
-import { sensoresAPI, ledsAPI, pulsadoresAPI, eventosAPI } from '../services/api'
+import { sensoresAPI, ledsAPI, pulsadoresAPI, eventosAPI, suscribirStream } from '../services/api'
 import { Lightbulb, Radio, Activity, Clock } from 'lucide-react'
 
 export default function Control() {
@@ -14,8 +14,22 @@ export default function Control() {
 
   useEffect(() => {
     loadData()
-    const interval = setInterval(loadData, 2000)
-    return () => clearInterval(interval)
+    // Los cambios llegan por el canal en tiempo real; el sondeo lento sólo es respaldo
+    const cerrar = suscribirStream({
+      led: (led) => setLeds((prev) => prev.map((l) => (l.id === led.id ? led : l))),
+      pulsador: (p) => setPulsadores((prev) => prev.map((x) => (x.id === p.id ? p : x))),
+      sensor: (s) => {
+        setSensores((prev) => [s, ...prev].slice(0, 20))
+        setUltimaLectura(s)
+      },
+      evento: (e) => setEventos((prev) => [e, ...prev].slice(0, 15)),
+      reset: () => loadData(),
+    })
+    const interval = setInterval(loadData, 30000)
+    return () => {
+      cerrar()
+      clearInterval(interval)
+    }
   }, [])
 
   const loadData = async () => {
@@ -1,5 +1,5 @@
 import { useState, useEffect } from 'react'
-import { sensoresAPI, historialAPI } from '../services/api'
+import { sensoresAPI, historialAPI, urlExportar } from '../services/api'
 import { jsPDF } from 'jspdf'
 import * as XLSX from 'xlsx'
 import { FileText, Download, Calendar, Filter } from 'lucide-react'
@@ -52,6 +52,18 @@ export default function Reportes() {
     })
   }
 
+  // Descarga todas las filas del rango desde el servidor (no sólo las 1000 cargadas)
+  const exportarServidor = (formato) => {
+    const params = { formato }
+    if (fechaInicio) params.desde = fechaInicio
+    if (fechaFin) {
+      const fin = new Date(fechaFin)
+      fin.setDate(fin.getDate() + 1)
+      params.hasta = fin.toISOString().split('T')[0]
+    }
+    window.location.href = urlExportar(tipoReporte === 'sensores' ? 'sensores' : 'led_hist', params)
+  }
+
   const generarPDF = () => {
     const doc = new jsPDF()
     const datos = tipoReporte === 'sensores' ? sensores : ledHist
@@ -242,6 +254,14 @@ export default function Reportes() {
             <Download className="w-5 h-5" />
             <span>Exportar Excel</span>
           </button>
+
+          <button
+            onClick={() => exportarServidor('csv')}
+            className="flex items-center space-x-2 px-6 py-3 bg-gray-700 text-white rounded-lg hover:bg-gray-800 transition font-medium"
+          >
+            <Download className="w-5 h-5" />
+            <span>CSV completo</span>
+          </button>
         </div>
       </div>
 
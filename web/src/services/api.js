@@ -24,8 +24,16 @@ export const authAPI = {
 
 export const sensoresAPI = {
   getAll: (limit = 100) => api.get(`/sensores?limit=${limit}`),
+  // Sólo las lecturas con id > sinceId, en orden ascendente
+  getSince: (sinceId, limit = 100) => api.get('/sensores', { params: { since_id: sinceId, limit } }),
+  // Página de historial: { limit, cursor, fields, desde, hasta, dispositivo, tipo }.
+  // El cursor de la página siguiente llega en la cabecera x-next-cursor
+  getPagina: (params = {}) => api.get('/sensores', { params }),
   create: (data) => api.post('/sensores', data),
-  getEstadisticas: () => api.get('/sensores/estadisticas'),
+  // params opcionales: { desde, hasta, tipo, bucket: '1m' | '1h' | '1d', percentiles: '50,95,99' }
+  getEstadisticas: (params = {}) => api.get('/sensores/estadisticas', { params }),
+  // Serie para gráficos con resolución automática: { desde, hasta, tipo, puntos, resolucion }
+  getSerie: (params = {}) => api.get('/sensores/serie', { params }),
 }
 
 export const ledsAPI = {
@@ -42,6 +50,7 @@ export const pulsadoresAPI = {
 
 export const eventosAPI = {
   getAll: (limit = 50) => api.get(`/eventos?limit=${limit}`),
+  getSince: (sinceId, limit = 50) => api.get('/eventos', { params: { since_id: sinceId, limit } }),
 }
 
 export const historialAPI = {
@@ -49,4 +58,21 @@ export const historialAPI = {
   getPulsadorHist: (limit = 100) => api.get(`/pulsador_hist?limit=${limit}`),
 }
 
+// Canal en tiempo real (Server-Sent Events). handlers: { led, pulsador, sensor, evento,
+// led_hist, pulsador_hist, reset }. EventSource reconecta solo y reenvía Last-Event-ID.
+// Devuelve una función para cerrar la conexión.
+export const suscribirStream = (handlers, tipos = Object.keys(handlers)) => {
+  const url = `${API_BASE_URL}/stream?tipos=${tipos.filter((t) => t !== 'reset').join(',')}`
+  const source = new EventSource(url)
+  Object.entries(handlers).forEach(([tipo, handler]) => {
+    source.addEventListener(tipo, (e) => handler(JSON.parse(e.data)))
+  })
+  return () => source.close()
+}
+
+// URL de descarga directa (streaming en el servidor, sin límite de filas).
+// tabla: sensores | eventos | led_hist | pulsador_hist; params: { formato, desde, hasta, fields, ... }
+export const urlExportar = (tabla, params = {}) =>
+  `${API_BASE_URL}/export/${tabla}?${new URLSearchParams(params).toString()}`
+
 export default api